@@ -11,11 +11,20 @@ import oelite.arch
 import oelite.parse
 import oelite.task
 import oelite.item
+import oelite.path
+import oelite.schedule
+import oelite.stamp
+import oelite.prebake
+import oelite.reclaim
+import oelite.fakeroot
+import oelite.hashequiv
+import oelite.function
 from oelite.parse import *
 from oelite.cookbook import CookBook
 import oelite.profiling
 
 import oelite.fetch
+import oelite.fetch.srccache
 
 import bb.utils
 
@@ -23,7 +32,6 @@ import sys
 import os
 import glob
 import shutil
-import hashlib
 import logging
 
 INITIAL_OE_IMPORTS = "sys os time"
@@ -129,6 +137,15 @@ class OEliteBaker:
         # FIXME: refactor oelite.arch.init to a post_conf_parse hook
         oelite.arch.init(self.config)
 
+        oeparse.load_statement_cache(self.config.get("PARSE_CACHE"))
+        self.stamps = oelite.stamp.StampIndex(self.config.get("STAMP_JOURNAL"))
+        self.reclaimer = None
+        hashequiv_db = self.config.get("HASHEQUIV_DB")
+        if hashequiv_db:
+            self.hashequiv = oelite.hashequiv.HashEquivalence(hashequiv_db)
+        else:
+            self.hashequiv = None
+
         # Handle any INHERITs and inherit the base class
         inherits  = ["core"] + (self.config.get("INHERIT", 1) or "").split()
         self.oeparser = oeparse.OEParser(self.config)
@@ -139,6 +156,7 @@ class OEliteBaker:
         oelite.pyexec.exechooks(self.config, "post_common_inherits")
 
         self.cookbook = CookBook(self)
+        oeparse.save_statement_cache()
 
         # things (ritem, item, recipe, or package) to do
         if args:
@@ -162,6 +180,13 @@ class OEliteBaker:
             for recipe_type in recipe_types:
                 thing_todo(recipe_type + ":world")
 
+        # A lazy cookbook only creates the world recipes on demand
+        if self.cookbook.lazy:
+            for thing in self.things_todo:
+                if oelite.item.OEliteItem(thing).name == "world":
+                    self.cookbook.create_world_recipes()
+                    break
+
         return
 
 
@@ -298,12 +323,15 @@ class OEliteBaker:
                 die("No such task: %s: %s"%(thing, e.__str__()))
             except oebakery.FatalError, e:
                 die("Failed to add %s:%s to runqueue"%(thing, task))
+        self.runq.save_provider_cache()
         rusage.end()
 
         # Generate recipe dependency graph
         recipes = set([])
+        self.task_deps = {}
         for task in self.runq.get_tasks():
             task_deps = self.runq.task_dependencies(task, flatten=True)
+            self.task_deps[task] = task_deps
             recipe = task.recipe
             recipe.add_task(task, task_deps)
             recipes.add(recipe)
@@ -346,6 +374,7 @@ class OEliteBaker:
         task = self.runq.get_metahashable_task()
         total = self.runq.number_of_runq_tasks()
         count = 0
+        self.taskhashes = oelite.hashequiv.TaskHashes(self.hashequiv)
         rusage = oelite.profiling.Rusage("Calculating task metadata hashes")
         while task:
             oelite.util.progress_info("Calculating task metadata hashes",
@@ -354,13 +383,12 @@ class OEliteBaker:
 
             if task.nostamp:
                 self.runq.set_task_metahash(task, "0")
+                self.taskhashes.set_metahash(task, "0")
                 task = self.runq.get_metahashable_task()
                 count += 1
                 continue
 
-            dephashes = {}
-            for depend in self.runq.task_dependencies(task, flatten=True):
-                dephashes[depend] = self.runq.get_task_metahash(depend)
+            depends = self.runq.task_dependencies(task, flatten=True)
             try:
                 recipe_extra_arch = recipe.meta.get("EXTRA_ARCH")
             except oelite.meta.ExpansionError as e:
@@ -386,14 +414,8 @@ class OEliteBaker:
                 e.msg += " in %s"%(task)
                 raise
 
-            hasher = hashlib.md5()
-            hasher.update(str(sorted(dephashes.values())))
-            dephash = hasher.hexdigest()
-
-            hasher = hashlib.md5()
-            hasher.update(datahash)
-            hasher.update(dephash)
-            metahash = hasher.hexdigest()
+            recipe.task_datahashes[task.name] = datahash
+            metahash = self.taskhashes.add(task, datahash, depends)
 
             # FIXME: instad of all of the above
             # metasig = task.get_meta_signature()
@@ -421,6 +443,8 @@ class OEliteBaker:
                                   total, count)
 
         rusage.end()
+        with oelite.profiling.profile_output("stamp_index.txt") as f:
+            self.stamps.write_stats(f)
 
         if count != total:
             print ""
@@ -432,6 +456,12 @@ class OEliteBaker:
 
         self.runq.set_task_build_on_nostamp_tasks()
         self.runq.set_task_build_on_retired_tasks()
+        if self.hashequiv:
+            # Only tasks built because of changed metahashes may be
+            # skipped because of equivalent do_package output
+            self.taskhashes.set_forced(
+                [self.cookbook.get_task(id=task)
+                 for task in self.runq.get_tasks_to_build()])
         self.runq.set_task_build_on_hashdiff()
 
         # check for availability of prebaked packages, and set package
@@ -440,13 +470,18 @@ class OEliteBaker:
         url_prefix = self.config.get("PREBAKE_URL")
         if url_prefix is not None:
             info("Trying to use prebakes from url: %s"%(url_prefix))
+        prebake_paths = {}
         for package in depend_packages:
             recipe = self.cookbook.get_recipe(package=package)
             if recipe.get("REBUILD") == "1":
                 continue
-            prebake = self.find_prebaked_package(package)
-            if prebake:
-                self.runq.set_package_filename(package, prebake,
+            prebake_paths[package] = self.prebake_path(package)
+        resolver = oelite.prebake.PrebakeResolver(self.config,
+                                                  self.options.prebake)
+        prebakes = resolver.resolve(prebake_paths)
+        for package in depend_packages:
+            if package in prebakes:
+                self.runq.set_package_filename(package, prebakes[package],
                                                prebake=True)
 
         # clear parent_task for all runq_depends where all runq_depend
@@ -480,16 +515,11 @@ class OEliteBaker:
         if (build_count + nobuild_count) != total:
             die("build_count + nobuild_count != total")
 
-        deploy_dir = self.config.get("PACKAGE_DEPLOY_DIR", True)
         packages = self.runq.get_packages_to_build()
         for package in packages:
             package = self.cookbook.get_package(id=package)
-            recipe = self.cookbook.get_recipe(package=package.id)
             buildhash = self.runq.get_package_buildhash(package.id)
-            filename = os.path.join(
-                deploy_dir, package.type,
-                package.arch + (package.recipe.meta.get("EXTRA_ARCH") or ""),
-                "%s_%s_%s.tar"%(package.name, recipe.version, buildhash))
+            filename = self.package_filename(package, buildhash)
             debug("will use from build: %s"%(filename))
             self.runq.set_package_filename(package.id, filename)
 
@@ -521,6 +551,10 @@ class OEliteBaker:
                 debug("setting rmwork for %s:%s" % (recipe[1], recipe[2]))
                 recipe = self.cookbook.get_recipe(recipe[0])
                 recipe.rmwork = True
+            trashdir = self.config.get("RMWORK_TRASH")
+            if trashdir:
+                self.reclaimer = oelite.reclaim.Reclaimer(
+                    trashdir, int(self.config.get("RMWORK_JOBS") or "1"))
 
         text = []
         total_tasks = 0
@@ -540,6 +574,9 @@ class OEliteBaker:
             return 0
 
         self.cookbook.compute_recipe_build_priorities()
+        task_durations = oelite.schedule.TaskDurations(
+            self.config.get("TASK_DURATIONS"))
+        pending_key = self.task_priority_key(task_durations)
 
         if os.isatty(sys.stdin.fileno()) and not self.options.yes:
             while True:
@@ -568,27 +605,48 @@ class OEliteBaker:
         # prebaked_tasks, running_tasks, failed_tasks, done_tasks
         #
         # FIXME: add back support for options.fake_build
+
+        # Tasks may add files to directories already listed in the
+        # oelite.path directory cache.
+        oelite.path.revalidate()
+
         rusage = oelite.profiling.Rusage("Build")
         exitcode = 0
         pending = PriorityQueue(initial = self.runq.get_runabletasks(),
-                                key = lambda t: (-t.recipe.build_prio, t.recipe.remaining_tasks))
+                                key = pending_key)
 
-        oven = OEliteOven(self)
+        oven = self.oven = OEliteOven(self)
+        oelite.profiling.trace_event_thread_name(0, "baker")
+        waiting = None
         try:
             while oven.count < oven.total:
                 new_runable = self.runq.get_runabletasks()
-                for t in new_runable:
-                    pending.push(t)
-                if not pending or oven.capacity <= 0:
+                while new_runable:
+                    t = new_runable.pop(0)
+                    if self.hashequiv and self.rehash_task(t):
+                        oven.skip(t)
+                        new_runable += self.runq.get_runabletasks()
+                    else:
+                        pending.push(t)
+                if len(pending) != waiting:
+                    waiting = len(pending)
+                    oelite.profiling.trace_event_counter(
+                        "runable tasks", { "waiting": waiting })
+                task = None
+                if oven.available() > 0:
+                    task = oven.next_task(pending)
+                if task is None:
                     # If we have no runable tasks and nothing in the
                     # oven, some tasks must have failed.
                     if not oven.currently_baking():
                         break
                     # Gotta wait for some task to finish. That may
                     # make some new task eligible.
+                    wait_start = oelite.util.now()
                     oven.wait_any(False)
+                    oelite.profiling.trace_event_span(
+                        "waiting", wait_start, oelite.util.now(), cat="oven")
                     continue
-                task = pending.pop()
                 oven.start(task)
                 # After starting a task, always do an immediate poll -
                 # if it was a synchronous task, it is already done by
@@ -607,10 +665,43 @@ class OEliteBaker:
                 oven.wait_all(True)
         finally:
             oven.wait_all(False)
+            # Save the state of recipes not completed (fx. because a
+            # task failed)
+            oelite.fakeroot.stop_all()
 
         rusage.end()
         oven.write_profiling_data()
 
+        for task in oven.completed_tasks:
+            task_durations.add(task, task.task_time)
+        task_durations.save()
+        oven.task_memory.save()
+        self.stamps.close()
+        if self.hashequiv:
+            if oven.skipped_tasks:
+                info("skipped %d tasks with equivalent do_package output"%(
+                        len(oven.skipped_tasks)))
+            with oelite.profiling.profile_output("hashequiv.txt") as f:
+                self.hashequiv.write_stats(f)
+            self.hashequiv.close()
+        if self.reclaimer:
+            self.reclaimer.finish()
+        preamble_dir = self.config.get("RUNFILE_PREAMBLE_DIR")
+        if preamble_dir:
+            max_age = float(self.config.get("RUNFILE_PREAMBLE_MAX_AGE") or 0)
+            if max_age > 0:
+                removed = oelite.function.clean_preamble_dir(
+                    preamble_dir, max_age * 24 * 3600)
+                debug("removed %d unused run file preamble fragments"%(
+                        removed))
+        src_cache_dir = self.config.get("SRC_CACHE_DIR")
+        if src_cache_dir:
+            max_age = float(self.config.get("SRC_CACHE_MAX_AGE") or 0)
+            if max_age > 0:
+                removed = oelite.fetch.srccache.clean(
+                    src_cache_dir, max_age * 24 * 3600)
+                debug("removed %d unused source cache entries"%(removed))
+
         for task in oven.failed_tasks:
             exitcode = 1
             print "\nERROR: %s failed  %s"%(task,task.logfn)
@@ -622,6 +713,43 @@ class OEliteBaker:
                         print ''.join(fin.readlines()[-self.debug_loglines:])
         return exitcode
 
+    def task_priority_key(self, task_durations):
+        """Return the key function for ordering runable tasks.
+
+        With OVEN_SCHEDULER = "descendants" (default), tasks of the
+        recipes with the most recipes depending on them are started
+        first.  With OVEN_SCHEDULER = "critical-path", tasks are
+        started in order of their critical path, ie. the expected time
+        from the task is started until everything depending on it is
+        done, as estimated from the task durations of previous builds.
+        """
+        scheduler = self.config.get("OVEN_SCHEDULER") or "descendants"
+        build_tasks = set(self.runq.get_tasks_to_build())
+
+        with oelite.profiling.profile_output("task_deps.txt") as f:
+            for task in self.task_deps:
+                if not task.id in build_tasks:
+                    continue
+                f.write("%s\t%s\t%d\t%s\n"%(
+                        task, task.recipe, task.recipe.build_prio,
+                        " ".join([str(parent)
+                                  for parent in self.task_deps[task]
+                                  if parent.id in build_tasks])))
+
+        if scheduler == "descendants":
+            return lambda t: (-t.recipe.build_prio, t.recipe.remaining_tasks)
+        if scheduler != "critical-path":
+            die("Invalid OVEN_SCHEDULER: %s"%(scheduler))
+
+        def duration(task):
+            if task.id in build_tasks:
+                return task_durations.estimate(task)
+            return 0.0
+        paths = oelite.schedule.critical_paths(self.task_deps, duration)
+        return lambda t: (-paths.get(t, 0.0),
+                          -t.recipe.build_prio, t.recipe.remaining_tasks)
+
+
     def setup_tmpdir(self):
 
         tmpdir = os.path.realpath(self.config.get("TMPDIR", 1) or "tmp")
@@ -644,20 +772,37 @@ class OEliteBaker:
         return
 
 
-    def find_prebaked_package(self, package):
-        """return full-path filename string or None"""
-        package_deploy_dir = self.config.get("PACKAGE_DEPLOY_DIR")
-        prebake_url_cache_dir = self.config.get("PREBAKE_CACHE_DIR")
-        if not package_deploy_dir:
-            die("PACKAGE_DEPLOY_DIR not defined")
-        if self.options.prebake:
-            prebake_path = self.config.get("PREBAKE_PATH") or []
-            if prebake_path:
-                prebake_path = prebake_path.split(":")
-            prebake_path.insert(0, package_deploy_dir)
-            prebake_path.insert(0, prebake_url_cache_dir)
-        else:
-            prebake_path = [package_deploy_dir]
+    def package_filename(self, package, buildhash):
+        """return filename of package built with buildhash"""
+        deploy_dir = self.config.get("PACKAGE_DEPLOY_DIR", True)
+        return os.path.join(
+            deploy_dir, package.type,
+            package.arch + (package.recipe.meta.get("EXTRA_ARCH") or ""),
+            "%s_%s_%s.tar"%(package.name, package.recipe.version, buildhash))
+
+
+    def rehash_task(self, task):
+        """Recompute the metahash of a runable task with the unified
+        hashes of the do_package tasks built in this bake, updating
+        the build hash (and package filenames) of the task if it
+        changed.  Return True if the task is already built with the
+        recomputed metahash, so that it can be skipped."""
+        metahash = self.taskhashes.rehash(task)
+        if metahash != self.runq.get_task_metahash(task):
+            debug("%s metahash changed to %s"%(task, metahash))
+            self.runq.set_task_metahash(task, metahash)
+            self.runq.set_task_buildhash(task, metahash)
+            if task.name == "do_package":
+                for package in self.cookbook.get_packages(recipe=task.recipe):
+                    self.runq.set_package_filename(
+                        package.id, self.package_filename(package, metahash))
+        return self.taskhashes.skippable(
+            task, self.runq.get_task_tmphash(task))
+
+
+    def prebake_path(self, package):
+        """return prebake path of package, relative to the prebake
+        directories"""
         debug("package=%s"%(repr(package)))
         recipe = self.cookbook.get_recipe(package=package)
         if not recipe:
@@ -668,36 +813,10 @@ class OEliteBaker:
         if not package:
             raise NoSuchPackage()
         filename = "%s_%s_%s.tar"%(package.name, recipe.version, metahash)
-        debug("prebake_path=%s"%(prebake_path))
-        #test local paths first
-        for base_dir in prebake_path:
-            path = os.path.join(
-                base_dir,
-                package.type,
-                package.arch + (package.recipe.meta.get("EXTRA_ARCH") or ""),
-                filename)
-            debug("checking for prebake: %s"%(path))
-            if os.path.exists(path):
-                debug("found prebake: %s"%(path))
-                return path
-        #then test URLs from PREBAKE_URL
-        url_prefix = self.config.get("PREBAKE_URL")
-        if url_prefix is not None:
-            package_path =os.path.join(
-                    package.type,
-                    package.arch + (package.recipe.meta.get("EXTRA_ARCH") or ""),
-                    filename)
-            downloaded_file =os.path.join(
-                    prebake_url_cache_dir,
-                    package_path)
-            url = os.path.join(url_prefix, package_path)
-            if oelite.fetch.url.grab(url, downloaded_file, timeout=1, retry=1):
-                if os.path.exists(downloaded_file) and os.path.getsize(downloaded_file) > 0:
-                    debug("using prebake from web: %s"%(url))
-                    return downloaded_file
-                else:
-                    os.unlink(downloaded_file)
-        return None
+        return os.path.join(
+            package.type,
+            package.arch + (package.recipe.meta.get("EXTRA_ARCH") or ""),
+            filename)
 
 
     def normpath(self, path):
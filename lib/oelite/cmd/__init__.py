@@ -1 +1 @@
-manifest_cmds = [ "bake", "setup", "show", "cherry", "autodoc", "add-layer" ]
+manifest_cmds = [ "bake", "setup", "show", "cherry", "autodoc", "add-layer", "simulate", "prebake-publish", "runfile-bench", "imageqa-bench" ]
@@ -0,0 +1,130 @@
+import oebakery
+from oebakery import die, err, warn, info, debug
+import oelite.libindex
+import oelite.util
+import logging
+import os
+import random
+import shutil
+import tempfile
+from glob import glob
+
+
+description = "Benchmark image QA library lookups"
+
+
+def add_parser_options(parser):
+    parser.add_option("-n", "--files",
+                      action="store", type="int", default=5000,
+                      help="Number of ELF files in the rootfs (default 5000)")
+    parser.add_option("-N", "--needed",
+                      action="store", type="int", default=8,
+                      help="Number of libraries needed by each ELF file (default 8)")
+    parser.add_option("-L", "--libdirs",
+                      action="store", type="int", default=4,
+                      help="Number of library directories (default 4)")
+    parser.add_option("-d", "--debug",
+                      action="store_true", default=False,
+                      help="Debug the OE-lite metadata")
+    return
+
+
+def parse_args(options, args):
+    if options.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    else:
+        logging.getLogger().setLevel(logging.INFO)
+
+
+def make_rootfs(root, files, needed, libdirs):
+    """Create a synthetic rootfs with files ELF files (a third of them
+    libraries, with a SONAME symlink each), spread over libdirs
+    library directories, with /lib a symlink to usr/lib.  Returns
+    list of (elffile, needed libs, rpath) and list of the library
+    directories."""
+    rand = random.Random(42)
+    lib_dirs = ["usr/lib"] + ["usr/lib/lib%d"%(i)
+                              for i in range(1, libdirs)]
+    for lib_dir in lib_dirs + ["usr/bin", "usr/lib/private"]:
+        oelite.util.makedirs(os.path.join(root, lib_dir))
+    os.symlink("usr/lib", os.path.join(root, "lib"))
+    open(os.path.join(root, "usr/lib/private/libprivate.so.1"), "w").close()
+    sonames = []
+    elffiles = []
+    for i in range(files // 3):
+        lib_dir = lib_dirs[i % len(lib_dirs)]
+        soname = "libbench%d.so.1"%(i)
+        filename = os.path.join(lib_dir, soname + ".0.0")
+        open(os.path.join(root, filename), "w").close()
+        os.symlink(soname + ".0.0", os.path.join(root, lib_dir, soname))
+        sonames.append(soname)
+        elffiles.append(filename)
+    for i in range(files - len(elffiles)):
+        filename = os.path.join("usr/bin", "bench%d"%(i))
+        open(os.path.join(root, filename), "w").close()
+        elffiles.append(filename)
+    dynamic = []
+    for elffile in elffiles:
+        libs = rand.sample(sonames, min(needed, len(sonames)))
+        # Some missing libraries, and some only found with RPATH
+        if rand.random() < 0.01:
+            libs.append("libmissing.so.1")
+        rpath = None
+        if rand.random() < 0.1:
+            libs.append("libprivate.so.1")
+            rpath = "$ORIGIN/../lib/private"
+        dynamic.append((elffile, libs, rpath))
+    lib_dirs = ["lib"] + lib_dirs
+    return (dynamic, lib_dirs)
+
+
+def glob_lookup(root, dynamic, lib_dirs):
+    """Look up libraries like image-qa did before the rootfs index
+    (not using RPATH)."""
+    lib_dirs = [os.path.join(root, lib_dir) for lib_dir in lib_dirs]
+    missing = 0
+    for (elffile, libs, rpath) in dynamic:
+        for lib in libs:
+            found = False
+            for lib_dir in lib_dirs:
+                if glob(os.path.join(lib_dir, lib)):
+                    found = True
+            if not found:
+                missing += 1
+    return missing
+
+
+def index_lookup(root, dynamic, lib_dirs):
+    index = oelite.libindex.RootfsIndex(root)
+    lib_dirs = [os.path.join(root, lib_dir) for lib_dir in lib_dirs]
+    missing = 0
+    for (elffile, libs, rpath) in dynamic:
+        dirs = index.search_dirs(elffile, lib_dirs, rpath)
+        for lib in libs:
+            if index.lookup(lib, dirs) is None:
+                missing += 1
+    return missing
+
+
+def run(options, args, config):
+    """Look up the needed libraries of all ELF files in a synthetic
+    rootfs, like image-qa does, by globbing the library directories
+    and with the rootfs index, and print the time used and the number
+    of libraries not found.  The dynamic sections are generated, as
+    reading them with readelf takes the same time with both."""
+    tmpdir = tempfile.mkdtemp(prefix="imageqa-bench.")
+    try:
+        (dynamic, lib_dirs) = make_rootfs(
+            tmpdir, options.files, options.needed, options.libdirs)
+        print "Looking up %d needed libraries of %d ELF files in %d dirs"%(
+            sum([len(libs) for (elffile, libs, rpath) in dynamic]),
+            len(dynamic), len(lib_dirs))
+        for (mode, lookup) in (("glob", glob_lookup),
+                               ("index", index_lookup)):
+            start = oelite.util.now()
+            missing = lookup(tmpdir, dynamic, lib_dirs)
+            elapsed = oelite.util.now() - start
+            print "%-8s %8.3f s %6d missing"%(mode + ":", elapsed, missing)
+    finally:
+        shutil.rmtree(tmpdir)
+    return 0
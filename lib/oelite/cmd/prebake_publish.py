@@ -0,0 +1,43 @@
+import oebakery
+from oebakery import die, err, warn, info, debug
+import oelite.prebake
+import logging
+import os
+
+
+description = "Publish packages as prebakes, for use with PREBAKE_URL"
+arguments = (
+    ("destination", "Prebake directory to publish to (fx. served by a web server as PREBAKE_URL)", 0),)
+
+
+def add_parser_options(parser):
+    parser.add_option("-s", "--source",
+                      action="store", default=None, metavar="DIR",
+                      help="Package directory to publish (default is tmp/packages)")
+    parser.add_option("-d", "--debug",
+                      action="store_true", default=False,
+                      help="Debug the OE-lite metadata")
+    return
+
+
+def parse_args(options, args):
+    if options.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    else:
+        logging.getLogger().setLevel(logging.INFO)
+    if len(args) != 1:
+        return "bad argument count: %d (1 required)"%(len(args))
+    options.destination = args.pop(0)
+    if options.source is None:
+        options.source = os.path.join("tmp", "packages")
+    return
+
+
+def run(options, args, config):
+    if not os.path.isdir(options.source):
+        return "No such package directory: %s"%(options.source)
+    (published, objects) = oelite.prebake.publish(
+        options.source, options.destination)
+    info("Published %d packages (%d new files) to %s"%(
+            published, objects, options.destination))
+    return 0
@@ -0,0 +1,83 @@
+import oebakery
+from oebakery import die, err, warn, info, debug
+import oelite.baker
+import oelite.function
+import oelite.util
+import logging
+import os
+import shutil
+import tempfile
+
+
+description = "Benchmark shell task run file generation"
+
+
+def add_parser_options(parser):
+    oelite.baker.add_bake_parser_options(parser)
+    parser.add_option("-d", "--debug",
+                      action="store_true", default=False,
+                      help="Debug the OE-lite metadata")
+    return
+
+
+def parse_args(options, args):
+    if options.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    else:
+        logging.getLogger().setLevel(logging.INFO)
+    options.dryrun = True
+    options.yes = True
+
+
+def du(path):
+    total = 0
+    for (dirpath, dirnames, filenames) in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+
+def run(options, args, config):
+    """Generate run files for all shell tasks of the build of the
+    given things (like "oe bake --dryrun"), with and without shared
+    preamble fragments, and print time used and bytes written."""
+    try:
+        baker = oelite.baker.OEliteBaker(options, args, config)
+    except oelite.parse.ParseError as e:
+        print "\nParse error"
+        e.print_details()
+        print
+        return "Parse error"
+    baker.bake()
+    tasks = []
+    for task in baker.runq.get_tasks():
+        meta = task.meta()
+        if meta.get_flag(task.name, "python") or not meta.get(task.name):
+            continue
+        tasks.append((task, meta))
+    print "Generating run files for %d shell tasks"%(len(tasks))
+
+    tmpdir = tempfile.mkdtemp(prefix="runfile-bench.")
+    try:
+        preamble_dir = os.path.join(tmpdir, "preamble")
+        runfn = os.path.join(tmpdir, "task.run")
+        for (mode, preamble) in (("full", None),
+                                 ("preamble (cold)", preamble_dir),
+                                 ("preamble (warm)", preamble_dir)):
+            oelite.function.preamble_written.clear()
+            before = preamble and du(preamble_dir) or 0
+            elapsed = 0.0
+            written = 0
+            for (task, meta) in tasks:
+                function = oelite.function.ShellFunction(
+                    meta, task.name, tmpdir=tmpdir)
+                start = oelite.util.now()
+                function.write_runfile(runfn, preamble)
+                elapsed += oelite.util.now() - start
+                written += os.path.getsize(runfn)
+            if preamble:
+                written += du(preamble_dir) - before
+            print "%-16s %8.3f s %12d bytes"%(mode + ":", elapsed, written)
+    finally:
+        shutil.rmtree(tmpdir)
+    return 0
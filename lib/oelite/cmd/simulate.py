@@ -0,0 +1,107 @@
+import oebakery
+from oebakery import die, err, warn, info, debug
+import oelite.schedule
+import logging
+import os
+
+
+description = "Replay a recorded build with different schedulers"
+arguments = (
+    ("profiledir", "Profiling data directory of the build to replay (default is tmp/profiling/latest)", 1),)
+
+
+def add_parser_options(parser):
+    parser.add_option("-c", "--capacity",
+                      action="store", type="int", default=None,
+                      help="Oven capacity (default is PARALLEL_MAKE + 2 of the recorded build)")
+    parser.add_option("-d", "--debug",
+                      action="store_true", default=False,
+                      help="Debug the OE-lite metadata")
+    return
+
+
+def parse_args(options, args):
+    if options.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    else:
+        logging.getLogger().setLevel(logging.INFO)
+    if len(args) > 1:
+        return "too many arguments"
+    if args:
+        options.profiledir = args.pop(0)
+    else:
+        options.profiledir = os.path.join("tmp", "profiling", "latest")
+    return
+
+
+def read_build(profiledir):
+    deps = {}
+    recipe = {}
+    build_prio = {}
+    with open(os.path.join(profiledir, "task_deps.txt")) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            task = fields[0]
+            recipe[task] = fields[1]
+            build_prio[task] = int(fields[2])
+            deps[task] = fields[3].split()
+    duration = {}
+    weight = {}
+    with open(os.path.join(profiledir, "task_times.txt")) as f:
+        for line in f:
+            fields = line.split()
+            duration[fields[0]] = float(fields[1])
+            if len(fields) > 5:
+                weight[fields[0]] = int(fields[5])
+    return (deps, recipe, build_prio, duration, weight)
+
+
+def recorded_capacity(profiledir):
+    try:
+        with open(os.path.join(profiledir, "info.txt")) as f:
+            for line in f:
+                if line.startswith("PARALLEL_MAKE:"):
+                    pmake = line.split(":", 1)[1].strip()
+                    if pmake:
+                        return int(pmake.replace("-j", "")) + 2
+    except (IOError, ValueError):
+        pass
+    return 3
+
+
+def run(options, args, config):
+    try:
+        (deps, recipe, build_prio, duration, weight) = read_build(
+            options.profiledir)
+    except IOError, e:
+        return "Cannot read recorded build: %s"%(e)
+    if not deps:
+        return "No tasks were built in %s"%(options.profiledir)
+    missing = [task for task in deps if not task in duration]
+    if missing:
+        warn("%d tasks have no recorded duration (failed or interrupted "
+             "build?), assuming they take no time"%(len(missing)))
+    capacity = options.capacity or recorded_capacity(options.profiledir)
+
+    # The baker orders by the number of remaining tasks of the recipe
+    # as a tie-breaker.  That changes as the build progresses, so the
+    # initial number of tasks is used as an approximation here.
+    recipe_tasks = {}
+    for task in deps:
+        recipe_tasks[recipe[task]] = recipe_tasks.get(recipe[task], 0) + 1
+    paths = oelite.schedule.critical_paths(
+        deps, lambda task: duration.get(task, 0.0))
+    schedulers = (
+        ("descendants",
+         lambda t: (-build_prio[t], recipe_tasks[recipe[t]])),
+        ("critical-path",
+         lambda t: (-paths[t], -build_prio[t], recipe_tasks[recipe[t]])))
+
+    print "Replaying %d tasks with oven capacity %d"%(len(deps), capacity)
+    print "Total task time:    %10.3f s"%(sum(duration.values()))
+    print "Critical path:      %10.3f s"%(max(paths.values()))
+    for (name, key) in schedulers:
+        makespan = oelite.schedule.simulate(
+            deps, duration, weight, capacity, key)
+        print "%-19s %10.3f s"%(name + ":", makespan)
+    return 0
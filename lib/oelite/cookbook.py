@@ -15,6 +15,7 @@ import oelite.profiling
 import sys
 import os
 import glob
+import hashlib
 import inspect
 import re
 from types import *
@@ -39,6 +40,17 @@ class CookBook(Mapping):
         self.packages = {}
         self.tasks = {}
         self.cachedir = self.config.get("CACHEDIR") or ""
+        archive = self.config.get("METACACHE_ARCHIVE")
+        if archive:
+            self.meta_cache_archive = oelite.meta.MetaCacheArchive(
+                archive, self.baker)
+        else:
+            self.meta_cache_archive = None
+        self.lazy = (self.config.get("COOKBOOK_LAZY") or "0") != "0"
+        if self.lazy and self.meta_cache_archive is None:
+            warn("COOKBOOK_LAZY requires METACACHE_ARCHIVE, ignoring")
+            self.lazy = False
+        self.world_recipes = False
         self.debug = self.baker.debug
         fail = False
         recipefiles = self.list_recipefiles()
@@ -74,15 +86,24 @@ class CookBook(Mapping):
                 err("Uncaught Python exception in %s"%(
                         self.shortfilename(recipefile)))
                 fail = True
+        if self.meta_cache_archive is not None:
+            self.meta_cache_archive.commit()
+        self.flush_db()
+        self.create_db_indexes()
         rusage.end()
         if fail:
             die("Errors while adding recipes to cookbook")
 
-        self.create_world_recipes()
+        # In lazy mode, the world recipes are only created when
+        # needed, as they depend on (and thus materialize) all recipes.
+        if not self.lazy:
+            self.create_world_recipes()
 
         # All recipes parsed, no reason to hold on to the layer
-        # metadata (this frees a few MB of memory).
-        del self.layer_meta
+        # metadata (this frees a few MB of memory).  A lazy cookbook
+        # needs it for parsing the world recipes when created.
+        if not self.lazy:
+            del self.layer_meta
 
         #print "when instantiating from a parsed oefile, do some 'finalizing', ie. collapsing of overrides and append, and remember to save expand_cache also"
 
@@ -150,6 +171,11 @@ class CookBook(Mapping):
 
     def init_db(self):
 
+        # The tables are bulk loaded from the rows queued by
+        # add_recipe() and add_recipe_tasks(), with ids assigned here
+        # instead of by sqlite, and the indexes are only created when
+        # all recipe files have been added.
+
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS recipe ( "
             "id          INTEGER PRIMARY KEY, "
@@ -157,8 +183,7 @@ class CookBook(Mapping):
             "type        TEXT, "
             "name        TEXT, "
             "version     TEXT, "
-            "priority    INTEGER, "
-            "UNIQUE (file, type) ON CONFLICT FAIL ) ")
+            "priority    INTEGER )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS package ( "
@@ -167,50 +192,238 @@ class CookBook(Mapping):
             "name        TEXT, "
             "type        TEXT, "
             "arch        TEXT, "
-            "UNIQUE (recipe, name) ON CONFLICT ABORT )")
+            "priority    INTEGER )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS task ( "
             "id          INTEGER PRIMARY KEY, "
             "recipe      INTEGER, "
             "name        TEXT, "
-            "nostamp     INTEGER, "
-            "UNIQUE (recipe, name) ON CONFLICT IGNORE ) ")
+            "nostamp     INTEGER )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS provide ( "
             "package     INTEGER, "
-            "item        TEXT, "
-            "UNIQUE (package, item) ON CONFLICT IGNORE )")
+            "item        TEXT )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS package_depend ( "
             "package     INTEGER, "
             "deptype     TEXT, "
-            "item        TEXT, "
-            "UNIQUE (package, deptype, item) ON CONFLICT IGNORE )")
+            "item        TEXT )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS task_parent ( "
             "recipe      INTEGER, "
             "task        TEXT, "
-            "parent      TEXT, "
-            "UNIQUE (recipe, task, parent) ON CONFLICT IGNORE )")
+            "parent      TEXT )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS task_deptask ( "
             "task        INTEGER, "
             "deptype     TEXT,"
-            "deptask     TEXT, "
-            "UNIQUE (task, deptype, deptask) ON CONFLICT IGNORE )")
+            "deptask     TEXT )")
 
         self.dbc.execute(
             "CREATE TABLE IF NOT EXISTS task_recdeptask ( "
             "task        INTEGER, "
             "deptype     TEXT,"
-            "recdeptask  TEXT, "
-            "UNIQUE (task, deptype, recdeptask) ON CONFLICT IGNORE )")
+            "recdeptask  TEXT )")
+
+        self.db_rows = {}
+        for table in self.DB_INSERT:
+            self.db_rows[table] = []
+        self.db_last_id = {
+            "recipe": 0,
+            "package": 0,
+            "task": 0,
+            }
+        self._signature = None
+
+        # In-memory indexes of the table rows, used for the lookups
+        # done (over and over again) by the runqueue and the baker.
+        self.index = {
+            # recipe name -> [ recipe id ]
+            "recipe_name": {},
+            # package id -> (name, type, arch, recipe id, priority)
+            "package": {},
+            # recipe id -> [ package id ]
+            "recipe_packages": {},
+            # package name -> [ package id ]
+            "package_name": {},
+            # task id -> (recipe id, name, nostamp)
+            "task": {},
+            # (recipe id, task name) -> task id
+            "recipe_task": {},
+            # item -> [ package id ]
+            "provide": {},
+            # (package id, deptype) -> [ item ]
+            "package_depend": {},
+            # (recipe id, task name) -> [ parent task name ]
+            "task_parent": {},
+            # (task id, deptype) -> [ deptask ]
+            "task_deptask": {},
+            # (task id, deptype) -> [ recdeptask ]
+            "task_recdeptask": {},
+            }
+
+        return
+
+
+    DB_INSERT = {
+        "recipe":
+            "INSERT INTO recipe (id, file, type, name, version, priority) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+        "package":
+            "INSERT INTO package (id, recipe, name, type, arch, priority) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+        "task":
+            "INSERT INTO task (id, recipe, name, nostamp) "
+            "VALUES (?, ?, ?, ?)",
+        "provide":
+            "INSERT INTO provide (package, item) VALUES (?, ?)",
+        "package_depend":
+            "INSERT INTO package_depend (package, deptype, item) "
+            "VALUES (?, ?, ?)",
+        "task_parent":
+            "INSERT INTO task_parent (recipe, task, parent) "
+            "VALUES (?, ?, ?)",
+        "task_deptask":
+            "INSERT INTO task_deptask (task, deptype, deptask) "
+            "VALUES (?, ?, ?)",
+        "task_recdeptask":
+            "INSERT INTO task_recdeptask (task, deptype, recdeptask) "
+            "VALUES (?, ?, ?)",
+        }
+
+    DB_INDEXES = [
+        "UNIQUE INDEX recipe_file_type ON recipe (file, type)",
+        "INDEX recipe_name ON recipe (name)",
+        "UNIQUE INDEX package_recipe_name ON package (recipe, name)",
+        "UNIQUE INDEX task_recipe_name ON task (recipe, name)",
+        "UNIQUE INDEX provide_package_item ON provide (package, item)",
+        "INDEX provide_item ON provide (item)",
+        "UNIQUE INDEX package_depend_package "
+        "ON package_depend (package, deptype, item)",
+        "UNIQUE INDEX task_parent_recipe_task "
+        "ON task_parent (recipe, task, parent)",
+        "UNIQUE INDEX task_deptask_task "
+        "ON task_deptask (task, deptype, deptask)",
+        "UNIQUE INDEX task_recdeptask_task "
+        "ON task_recdeptask (task, deptype, recdeptask)",
+        ]
+
+
+    def create_db_indexes(self):
+        for index in self.DB_INDEXES:
+            try:
+                self.dbc.execute("CREATE %s"%(index))
+            except sqlite.IntegrityError:
+                self.report_duplicates(index)
+        return
+
 
+    def report_duplicates(self, index):
+        """Report the rows conflicting with the unique index, and die."""
+        (name, table, columns) = re.match(
+            r"UNIQUE INDEX (\w+) ON (\w+) \((.*)\)$", index).groups()
+        columns = [column.strip() for column in columns.split(",")]
+        def describe(column, value):
+            if column == "recipe" and value in self.recipes:
+                return str(self.recipes[value])
+            if column == "package" and value in self.index["package"]:
+                package = self.index["package"][value]
+                return "%s:%s"%(self.recipes[package[3]], package[0])
+            if (column == "task" and table != "task_parent"
+                and value in self.index["task"]):
+                task = self.index["task"][value]
+                return "%s:%s"%(self.recipes[task[0]], task[1])
+            return str(value)
+        for row in self.dbc.execute(
+            "SELECT %s, count(*) FROM %s GROUP BY %s HAVING count(*) > 1"%(
+                ", ".join(columns), table, ", ".join(columns))):
+            err("duplicate %s (%s) %d times: %s"%(
+                    table, ", ".join(columns), row[-1],
+                    ", ".join([describe(column, value) for (column, value)
+                               in zip(columns, row[:-1])])))
+        die("Cookbook index %s failed, duplicate %s rows"%(name, table))
+
+
+    def new_db_id(self, table):
+        self.db_last_id[table] += 1
+        return self.db_last_id[table]
+
+
+    def flush_db(self):
+        """Insert all queued rows, in a single transaction."""
+        self.dbc.execute("BEGIN")
+        try:
+            for table in self.db_rows:
+                rows = self.db_rows[table]
+                if rows:
+                    self.dbc.executemany(self.DB_INSERT[table], rows)
+                    self.index_rows(table, rows)
+                    self.db_rows[table] = []
+                    if table in ("recipe", "package", "provide"):
+                        self._signature = None
+        except:
+            self.dbc.execute("ROLLBACK")
+            raise
+        self.dbc.execute("COMMIT")
+        return
+
+
+    def signature(self):
+        """Return hash of the recipes, packages and provides in the
+        cookbook, ie. of all input to provider resolution."""
+        if self._signature is not None:
+            return self._signature
+        m = hashlib.md5()
+        for recipe_id in sorted(self.recipes):
+            recipe = self.recipes[recipe_id]
+            m.update(repr((recipe_id, recipe.filename, recipe.type,
+                           recipe.name, recipe.version, recipe.priority)))
+        package_index = self.index["package"]
+        for package_id in sorted(package_index):
+            m.update(repr((package_id, package_index[package_id])))
+        provide_index = self.index["provide"]
+        for item in sorted(provide_index):
+            m.update(repr((item, sorted(provide_index[item]))))
+        self._signature = m.hexdigest()
+        return self._signature
+
+
+    def index_rows(self, table, rows):
+        def add(index, key, value):
+            try:
+                self.index[index][key].append(value)
+            except KeyError:
+                self.index[index][key] = [value]
+        if table == "recipe":
+            for (id, file, type, name, version, priority) in rows:
+                add("recipe_name", name, id)
+        elif table == "package":
+            for (id, recipe, name, type, arch, priority) in rows:
+                self.index["package"][id] = (name, type, arch, recipe,
+                                             priority)
+                add("recipe_packages", recipe, id)
+                add("package_name", name, id)
+        elif table == "task":
+            for (id, recipe, name, nostamp) in rows:
+                self.index["task"][id] = (recipe, name, nostamp)
+                self.index["recipe_task"][(recipe, name)] = id
+        elif table == "provide":
+            for (package, item) in rows:
+                add("provide", item, package)
+        elif table == "package_depend":
+            for (package, deptype, item) in rows:
+                add("package_depend", (package, deptype), item)
+        elif table == "task_parent":
+            for (recipe, task, parent) in rows:
+                add("task_parent", (recipe, task), parent)
+        else:
+            for (task, deptype, deptask) in rows:
+                add(table, (task, deptype), deptask)
         return
 
 
@@ -294,54 +507,56 @@ class CookBook(Mapping):
 
         if id is not None:
             if isinstance(id, int):
-                recipe_ids = [ (id,) ]
+                recipe_ids = [ id ]
             else:
-                recipe_ids = []
-                for recipe_id in id:
-                    recipe_ids.append((recipe_id,))
+                recipe_ids = id
 
         elif task:
             assert isinstance(task, oelite.task.OEliteTask)
-            recipe_ids = self.dbc.execute(
-                "SELECT recipe FROM task WHERE id=?", (task.id,))
+            index_lookup("recipe by task")
+            recipe_ids = [ self.index["task"][task.id][0] ]
 
         elif package:
             if isinstance(package, oelite.package.OElitePackage):
                 package = package.id
             assert isinstance(package, int)
-            recipe_ids = self.dbc.execute(
-                "SELECT recipe FROM package WHERE id=?", (package,))
+            index_lookup("recipe by package")
+            recipe_ids = [ self.index["package"][package][3] ]
 
         else:
-            expr = []
-            args = []
             if isinstance(name, oelite.item.OEliteItem):
                 type = name.type
                 version = name.version
                 name = name.name
-            if isinstance(filename, basestring):
-                expr.append("file=?")
-                args.append(filename)
-            if isinstance(type, basestring):
-                expr.append("type=?")
-                args.append(type)
             if isinstance(name, OEliteItem):
                 name = str(name)
-            if isinstance(name, basestring):
-                expr.append("name=?")
-                args.append(name)
-            if isinstance(version, basestring):
-                expr.append("version=?")
-                args.append(version)
-            if not expr:
+            if not (isinstance(filename, basestring) or
+                    isinstance(type, basestring) or
+                    isinstance(name, basestring) or
+                    isinstance(version, basestring)):
                 raise ValueError("no arguments to runq.get_recipe_id ?")
-            #print "expr = ",repr(expr)
-            #print "args = ",repr(args)
-            recipe_ids = self.dbc.execute(
-                "SELECT id FROM recipe WHERE " + " AND ".join(expr), args)
+            if isinstance(name, basestring):
+                index_lookup("recipe by name")
+                recipe_ids = self.index["recipe_name"].get(name, [])
+            else:
+                index_lookup("recipe scan")
+                recipe_ids = sorted(self.recipes)
+            recipes = []
+            for recipe_id in recipe_ids:
+                recipe = self.recipes[recipe_id]
+                if isinstance(filename, basestring) and \
+                        recipe.filename != filename:
+                    continue
+                if isinstance(type, basestring) and recipe.type != type:
+                    continue
+                if isinstance(version, basestring) and \
+                        recipe.version != version:
+                    continue
+                recipes.append(recipe)
+            return recipes
 
         recipes = []
-        for (recipe_id,) in recipe_ids:
+        for recipe_id in recipe_ids:
             recipes.append(self.recipes[recipe_id])
         return recipes
 
@@ -376,50 +591,49 @@ class CookBook(Mapping):
         return package
 
     def get_packages(self, id=None, recipe=None, name=None, type=None, arch=None):
-        query = "SELECT id, name, type, arch, recipe FROM package WHERE "
+        package_index = self.index["package"]
         if id is not None:
             if isinstance(id, int):
-                where = "id=%d"%(id)
-            elif len(id) == 1:
-                where = "id=%d"%(id[0])
+                package_ids = [ id ]
             else:
-                package_ids = []
-                for package_id in id:
-                    package_ids.append(str(package_id))
-                where = "id IN %s"%(repr(tuple(package_ids)))
-            _packages = self.dbc.execute(query + where)
+                package_ids = id
+            index_lookup("package by id")
         else:
-            expr = []
-            args = []
             if isinstance(name, oelite.item.OEliteItem):
                 type = name.type
                 version = name.version
                 name = name.name
-            if recipe:
-                expr.append("recipe=?")
-                if isinstance(recipe, oelite.recipe.OEliteRecipe):
-                    recipe = recipe.id
-                args.append(recipe)
-            if name:
-                expr.append("name=?")
-                args.append(name)
-            if type:
-                expr.append("type=?")
-                args.append(type)
-            if arch:
-                expr.append("arch=?")
-                args.append(arch)
-            if not expr:
+            if isinstance(recipe, oelite.recipe.OEliteRecipe):
+                recipe = recipe.id
+            if not (recipe or name or type or arch):
                 raise ValueError("no arguments to cookbook.get_package_id")
-            _packages = self.dbc.execute(query + " AND ".join(expr), args)
+            if recipe:
+                index_lookup("package by recipe")
+                package_ids = self.index["recipe_packages"].get(recipe, [])
+            elif name:
+                index_lookup("package by name")
+                package_ids = self.index["package_name"].get(name, [])
+            else:
+                index_lookup("package scan")
+                package_ids = sorted(package_index)
+            package_ids = [ package_id for package_id in package_ids
+                            if ((not recipe or
+                                 package_index[package_id][3] == recipe) and
+                                (not name or
+                                 package_index[package_id][0] == name) and
+                                (not type or
+                                 package_index[package_id][1] == type) and
+                                (not arch or
+                                 package_index[package_id][2] == arch)) ]
 
         packages = []
-        for (id, name, type, arch, recipe) in _packages:
+        for id in package_ids:
             try:
                 packages.append(self.packages[id])
             except KeyError:
+                (name, type, arch, recipe, priority) = package_index[id]
                 self.packages[id] = oelite.package.OElitePackage(
-                    id, name, type, arch, self.get_recipe(id=recipe))
+                    id, name, type, arch, self.recipes[recipe], priority)
                 packages.append(self.packages[id])
         return packages
 
@@ -433,10 +647,8 @@ class CookBook(Mapping):
         print "get_task_id task=%s"%(repr(task))
         assert isinstance(recipe_id, int)
         assert isinstance(task, str)
-        task_id = flatten_single_value(self.dbc.execute(
-                "SELECT id FROM task "
-                "WHERE recipe=:recipe_id AND name=:task",
-                locals()))
+        index_lookup("task by recipe and name")
+        task_id = self.index["recipe_task"].get((recipe_id, task))
         if task_id is None and strict:
             raise NoSuchTask(task)
         return task_id
@@ -458,45 +670,52 @@ class CookBook(Mapping):
     def get_tasks(self, id=None, recipe=None, name=None, cookbook=None):
         if id is not None:
             if isinstance(id, int):
-                where = "id=%d"%(id)
-            elif len(id) == 1:
-                where = "id=%d"%(id[0])
+                task_ids = [ id ]
             else:
-                task_ids = []
-                for task_id in id:
-                    task_ids.append(str(task_id))
-                task_ids = tuple(task_ids)
-                where = "id IN %s"%(repr(tuple(task_ids)))
-            _tasks = self.dbc.execute(
-                "SELECT id, recipe, name, nostamp FROM task WHERE " + where)
+                task_ids = id
+            index_lookup("task by id")
         elif recipe and name:
-            if isinstance(recipe, oelite.recipe.OEliteRecipe):
-                recipe = recipe.id
-            assert isinstance(recipe, int)
+            if not isinstance(recipe, oelite.recipe.OEliteRecipe):
+                recipe = self.recipes[recipe]
+            self.materialize_recipe(recipe)
+            recipe = recipe.id
             if isinstance(name, str):
-                _tasks = self.dbc.execute(
-                    "SELECT id, recipe, name, nostamp FROM task "
-                    "WHERE recipe=? AND name=?", (recipe, name))
+                name = [ name ]
             else:
                 assert type(name) in (list, tuple)
-                name = "('" + "','".join(name) + "')"
-                _tasks = self.dbc.execute(
-                    "SELECT id, recipe, name, nostamp FROM task "
-                    "WHERE recipe=%s AND name IN %s"%(recipe, name))
+            index_lookup("task by recipe and name")
+            recipe_task = self.index["recipe_task"]
+            task_ids = [ recipe_task[(recipe, task_name)] for task_name in name
+                         if (recipe, task_name) in recipe_task ]
         else:
             raise Exception("Invalid arguments to cookbook.get_tasks: recipe=%s name=%s"%(repr(recipe), repr(name)))
 
         tasks = []
-        for (id, recipe, name, nostamp) in _tasks:
+        for id in task_ids:
             try:
                 tasks.append(self.tasks[id])
             except KeyError:
+                (recipe, name, nostamp) = self.index["task"][id]
                 self.tasks[id] = oelite.task.OEliteTask(
                     id, recipe, name, nostamp, self)
                 tasks.append(self.tasks[id])
         return tasks
 
 
+    def get_task_parents(self, task):
+        index_lookup("task parents")
+        return self.index["task_parent"].get(
+            (task.recipe.id, task.name), [])
+
+    def get_task_deptasks(self, task, deptype):
+        index_lookup("task deptasks")
+        return self.index["task_deptask"].get((task.id, deptype), [])
+
+    def get_task_recdeptasks(self, task, deptype):
+        index_lookup("task recdeptasks")
+        return self.index["task_recdeptask"].get((task.id, deptype), [])
+
+
 
 
 
@@ -538,17 +757,44 @@ class CookBook(Mapping):
         return os.path.join(self.cachedir, recipefile + ".p")
 
 
-    def add_recipefile(self, filename):
+    def get_meta_cache(self, filename):
+        if self.meta_cache_archive is not None:
+            return self.meta_cache_archive.get(self.shortfilename(filename))
         cachefile = self.cachefilename(filename)
+        if os.path.exists(cachefile):
+            return oelite.meta.MetaCache(cachefile)
+        return None
 
-        recipes = None
+
+    def save_meta_cache(self, filename, recipes):
+        if self.meta_cache_archive is not None:
+            self.meta_cache_archive.add(self.shortfilename(filename), recipes)
+            return
+        oelite.meta.MetaCache(self.cachefilename(filename), recipes,
+                              self.baker)
+        return
+
+
+    def remove_meta_cache(self, filename):
+        if self.meta_cache_archive is not None:
+            self.meta_cache_archive.remove(self.shortfilename(filename))
+            return
+        cachefile = self.cachefilename(filename)
         if os.path.exists(cachefile):
-            try:
-                meta_cache = oelite.meta.MetaCache(cachefile)
-                if meta_cache.is_current(self.baker):
-                    recipes = meta_cache.load(filename, self)
-            except:
-                print "Ignoring bad metadata cache:", cachefile
+            os.remove(cachefile)
+        return
+
+
+    def add_recipefile(self, filename):
+        recipes = None
+        try:
+            meta_cache = self.get_meta_cache(filename)
+            if meta_cache and meta_cache.is_current(self.baker):
+                if self.lazy and meta_cache.summary is not None:
+                    return self.add_lazy_recipes(filename, meta_cache.summary)
+                recipes = meta_cache.load(filename, self)
+        except:
+            print "Ignoring bad metadata cache:", self.shortfilename(filename)
 
         if recipes is None:
             recipe_meta = self.parse_recipe(filename)
@@ -567,21 +813,52 @@ class CookBook(Mapping):
                 recipes[recipe_type] = recipe
                 is_cacheable = is_cacheable and recipe.is_cacheable()
             if is_cacheable:
-                meta_cache = oelite.meta.MetaCache(cachefile, recipes,
-                                                   self.baker)
-            elif os.path.exists(cachefile):
-                os.remove(cachefile)
+                self.save_meta_cache(filename, recipes)
+            else:
+                self.remove_meta_cache(filename)
 
+        summary = {}
         for recipe_type in recipes:
-            meta = recipes[recipe_type].meta
-            oelite.pyexec.exechooks(meta, "pre_cookbook")
-            meta.trim_unused_overrides()
-            meta.del_var("__mtimes")
-            self.add_recipe(recipes[recipe_type])
+            self.prepare_recipe_meta(recipes[recipe_type].meta)
+            summary[recipe_type] = recipes[recipe_type].summary()
+            self.add_recipe(recipes[recipe_type], summary[recipe_type])
+        if self.meta_cache_archive is not None:
+            self.meta_cache_archive.set_summary(
+                self.shortfilename(filename), summary)
 
         return True
 
 
+    def add_lazy_recipes(self, filename, summary):
+        for recipe_type in summary:
+            recipe = OEliteRecipe(filename, recipe_type, None, self,
+                                  summary=summary[recipe_type])
+            self.add_recipe(recipe, summary[recipe_type])
+        return True
+
+
+    def prepare_recipe_meta(self, meta):
+        oelite.pyexec.exechooks(meta, "pre_cookbook")
+        meta.trim_unused_overrides()
+        meta.del_var("__mtimes")
+        return
+
+
+    def materialize_recipe(self, recipe):
+        """Load metadata of a lazy recipe, and add its tasks."""
+        if recipe.is_materialized():
+            return
+        debug("Materializing %s"%(recipe))
+        entry = self.meta_cache_archive.get(
+            self.shortfilename(recipe.filename))
+        meta = entry.load(recipe.filename, self)[recipe.type].meta
+        self.prepare_recipe_meta(meta)
+        recipe.meta = meta
+        self.add_recipe_tasks(recipe)
+        self.flush_db()
+        return
+
+
     def parse_recipe(self, recipe):
         #print "parsing recipe", recipe
         base_meta = self.new_recipe_meta(recipe)
@@ -694,119 +971,101 @@ class CookBook(Mapping):
         return meta
 
 
-    def add_recipe(self, recipe):
-        self.dbc.execute(
-            "INSERT INTO recipe "
-            "(file, type, name, version, priority) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (recipe.filename, recipe.type, recipe.name,
+    def add_recipe(self, recipe, summary=None):
+        if summary is None:
+            summary = recipe.summary()
+        recipe_id = self.new_db_id("recipe")
+        self.db_rows["recipe"].append(
+            (recipe_id, recipe.filename, recipe.type, recipe.name,
              recipe.version, recipe.priority))
-        recipe_id = self.dbc.lastrowid
         recipe.set_id(recipe_id)
         self.recipes[recipe_id] = recipe
 
-        task_names = recipe.get_task_names()
-        taskseq = []
-        for task_name in task_names:
-            task_nostamp = recipe.meta.get_boolean_flag(task_name, "nostamp")
-            taskseq.append((recipe_id, task_name, task_nostamp))
-        if taskseq:
-            self.dbc.executemany(
-                "INSERT INTO task (recipe, name, nostamp) VALUES (?, ?, ?)",
-                taskseq)
+        # Tasks of lazy recipes are added when materialized
+        if recipe.is_materialized():
+            self.add_recipe_tasks(recipe)
 
         for deptype in ("DEPENDS", "RDEPENDS", "FDEPENDS"):
-            for item in (recipe.meta.get(deptype) or "").split():
-                item = oelite.item.OEliteItem(item, (deptype, recipe.type))
-                recipe.item_deps[deptype].add(item)
-            for item in (recipe.meta.get("CLASS_"+deptype) or "").split():
+            for item in summary["depends"][deptype]:
                 item = oelite.item.OEliteItem(item, (deptype, recipe.type))
                 recipe.item_deps[deptype].add(item)
 
-        for task_name in task_names:
-            task_id = flatten_single_value(self.dbc.execute(
-                    "SELECT id FROM task WHERE recipe=? AND name=?",
-                    (recipe_id, task_name)))
+        if not summary["packages"]:
+            warn("no packages defined for recipe %s"%(recipe))
+        package_names = set()
+        for (package, type, arch, priority, provides, depends) in \
+                summary["packages"]:
+            if package in package_names:
+                raise Exception("duplicate package %s in %s"%(
+                        package, recipe))
+            package_names.add(package)
+            package_id = self.add_package(recipe, package, type, arch,
+                                          priority)
+
+            for item in set(provides):
+                self.db_rows["provide"].append((package_id, item))
+
+            for deptype in ("DEPENDS", "RDEPENDS"):
+                for item in set(depends[deptype]):
+                    self.db_rows["package_depend"].append(
+                        (package_id, deptype, item))
+
+        return
+
 
-            for parent in recipe.meta.get_list_flag(task_name, "deps"):
-                self.dbc.execute(
-                    "INSERT INTO task_parent (recipe, task, parent) "
-                    "VALUES (:recipe_id, :task_name, :parent)",
-                    locals())
+    def add_recipe_tasks(self, recipe):
+        recipe_id = recipe.id
+        for task_name in recipe.get_task_names():
+            task_id = self.new_db_id("task")
+            task_nostamp = recipe.meta.get_boolean_flag(task_name, "nostamp")
+            self.db_rows["task"].append(
+                (task_id, recipe_id, task_name, task_nostamp))
+
+            for parent in set(recipe.meta.get_list_flag(task_name, "deps")):
+                self.db_rows["task_parent"].append(
+                    (recipe_id, task_name, parent))
 
+            deptasks = set()
             for _deptask in recipe.meta.get_list_flag(task_name, "deptask"):
                 deptask = _deptask.split(":", 1)
                 if len(deptask) != 2:
                     bb.fatal("invalid deptask:", _deptask)
                 assert deptask[0] in ("DEPENDS", "RDEPENDS", "FDEPENDS")
-                self.dbc.execute(
-                    "INSERT INTO task_deptask (task, deptype, deptask) "
-                    "VALUES (?, ?, ?)", ([task_id] + deptask))
+                deptasks.add((task_id, deptask[0], deptask[1]))
+            self.db_rows["task_deptask"].extend(deptasks)
 
+            recdeptasks = set()
             for _recdeptask in recipe.meta.get_list_flag(task_name,
                                                         "recdeptask"):
                 recdeptask = _recdeptask.split(":", 1)
                 if len(recdeptask) != 2:
                     bb.fatal("invalid deptask:", _recdeptask)
                 assert recdeptask[0] in ("DEPENDS", "RDEPENDS", "FDEPENDS")
-                self.dbc.execute(
-                    "INSERT INTO task_recdeptask (task, deptype, recdeptask) "
-                    "VALUES (?, ?, ?)", ([task_id] + recdeptask))
-
-        packages = recipe.meta.get_list("PACKAGES")
-        if not packages:
-            warn("no packages defined for recipe %s"%(recipe))
-        else:
-            for package in packages:
-                arch = (recipe.meta.get("PACKAGE_ARCH_" + package) or
-                        recipe.meta.get("RECIPE_ARCH"))
-                type = (recipe.meta.get("PACKAGE_TYPE_" + package) or
-                        recipe.meta.get("RECIPE_TYPE"))
-                package_id = self.add_package(recipe, package, type, arch)
-
-                provides = recipe.meta.get("PROVIDES_" + package) or ""
-                provides = provides.split()
-                if not package in provides:
-                    provides.append(package)
-                for item in provides:
-                    self.dbc.execute(
-                        "INSERT INTO provide (package, item) "
-                        "VALUES (?, ?)", (package_id, item))
-
-                for deptype in ("DEPENDS", "RDEPENDS"):
-                    depends = recipe.meta.get("%s_%s"%(deptype , package)) or ""
-                    for item in depends.split():
-                        self.dbc.execute(
-                            "INSERT INTO package_depend "
-                            "(package, deptype, item) "
-                            "VALUES (?, ?, ?)", (package_id, deptype, item))
+                recdeptasks.add((task_id, recdeptask[0], recdeptask[1]))
+            self.db_rows["task_recdeptask"].extend(recdeptasks)
 
         return
 
 
-    def add_package(self, recipe, name, type, arch):
+    def add_package(self, recipe, name, type, arch, priority):
         #print "add_package %s %s %s %s"%(recipe,name,type,arch)
-        self.dbc.execute(
-            "INSERT INTO package (recipe, name, type, arch) "
-            "VALUES (?, ?, ?, ?)",
-            (recipe.id, name, type, arch))
-        return self.dbc.lastrowid
+        package_id = self.new_db_id("package")
+        self.db_rows["package"].append(
+            (package_id, recipe.id, name, type, arch, priority))
+        return package_id
 
 
     def get_providers(self, type, item, version):
-        select_from = "SELECT package.id FROM package,provide,recipe"
-        select_where = "WHERE" + \
-            " provide.package=package.id AND provide.item=:item" + \
-            " AND package.recipe=recipe.id"
-        if type:
-            select_where += " AND package.type=:type"
-        if version is not None:
-            select_where += " AND recipe.version=:version"
-        query = select_from + " " + select_where
-        # Grrr... SQLite insists on sorting INTEGER colums as strings :-(
-        #query += " ORDER BY recipe.name DESC"
-        providers = self.dbc.execute(query, locals())
-        providers = flatten_single_column_rows(providers)
+        index_lookup("providers")
+        package_index = self.index["package"]
+        providers = []
+        for package_id in self.index["provide"].get(item, []):
+            if type and package_index[package_id][1] != type:
+                continue
+            if version is not None and self.recipes[
+                package_index[package_id][3]].version != version:
+                continue
+            providers.append(package_id)
         packages = self.get_packages(id=providers)
         def get_priority(p):
             return int(p.priority)
@@ -816,10 +1075,9 @@ class CookBook(Mapping):
 
     def get_package_depends(self, package, deptype):
         assert isinstance(package, oelite.package.OElitePackage)
-        return flatten_single_column_rows(self.dbc.execute(
-            "SELECT item FROM package_depend "
-            "WHERE deptype=? "
-            "AND package=?", (deptype, package.id)))
+        index_lookup("package depends")
+        return list(self.index["package_depend"].get(
+                (package.id, deptype), []))
 
     def compute_recipe_build_priorities(self):
         recipes = self.recipes.values()
@@ -849,6 +1107,9 @@ class CookBook(Mapping):
         assert(len(descendants) == 0)
 
     def create_world_recipes(self):
+        if self.world_recipes:
+            return
+        self.world_recipes = True
         tmpdir = self.config.get("TMPDIR") or "tmp"
         recipe_file = os.path.join(tmpdir, "recipes", "world.oe")
         recipe_types = ("machine", "native", "sdk",
@@ -892,3 +1153,4 @@ CLASS_DEPENDS = ""
                 f.write('%s[prefuncs] = ""\n' % t)
                 f.write('%s[postfuncs] = ""\n' % t)
         self.add_recipefile(recipe_file)
+        self.flush_db()
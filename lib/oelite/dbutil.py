@@ -7,10 +7,20 @@ import atexit
 
 query_stats = {}
 query_sample = {}
+# Lookups answered from in-memory indexes instead of by a query
+index_stats = {}
+def index_lookup(name):
+    try:
+        index_stats[name] += 1
+    except KeyError:
+        index_stats[name] = 1
+
 def write_query_stats():
-    if not query_stats:
+    if not query_stats and not index_stats:
         return
     with oelite.profiling.profile_output("query_stats.txt") as f:
+        for name, count in sorted(index_stats.items()):
+            f.write("index:%s\t%d\n" % (name, count))
         for t, l in sorted(query_stats.items()):
             f.write("%s:%d\t%d" % (os.path.basename(t[0]), t[1], len(l)))
 
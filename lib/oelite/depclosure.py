@@ -0,0 +1,162 @@
+from oebakery import die, err, warn, info, debug
+from oelite import *
+import oelite.item
+
+
+class DependencyClosure:
+    """Transitive package dependency closures, one set per deptype.
+
+    Each package is assigned a dense index, and the closure of a
+    package is a bitset (Python long) of the indexes of the packages
+    it recursively depends on, including itself.  Closures are
+    computed for the strongly connected components of the dependency
+    graph in topological order, so that shared subgraphs are only
+    walked once, and all packages in a dependency cycle get the same
+    closure.
+
+    Arguments:
+    resolve -- function returning the package providing an item, or
+        None if the item is assumed provided.  Raises NoProvider.
+    get_depends -- function returning the dependency items of a
+        package for a deptype.
+    """
+
+    def __init__(self, resolve, get_depends):
+        self.resolve = resolve
+        self.get_depends = get_depends
+        self.index = {}
+        self.packages = []
+        self.edges = {}
+        self.direct_missing = {}
+        self.closure = {}
+        self.missing = {}
+        self.decoded = {}
+        for deptype in ("DEPENDS", "RDEPENDS", "FDEPENDS"):
+            self.edges[deptype] = {}
+            self.direct_missing[deptype] = {}
+            self.closure[deptype] = {}
+            self.missing[deptype] = {}
+        return
+
+
+    def get(self, package, deptype, ignore_missing=False):
+        """Return set of packages recursively needed by package
+        (including package itself)."""
+        i = self.package_index(package)
+        closure = self.closure[deptype]
+        if not i in closure:
+            self.compute(deptype, i)
+        missing = self.missing[deptype][i]
+        if missing and not ignore_missing:
+            raise NoProvider(*missing[0])
+        try:
+            return self.decoded[(deptype, i)]
+        except KeyError:
+            pass
+        packages = []
+        bits = closure[i]
+        while bits:
+            lowest = bits & -bits
+            packages.append(self.packages[lowest.bit_length() - 1])
+            bits ^= lowest
+        packages = self.decoded[(deptype, i)] = frozenset(packages)
+        return packages
+
+
+    def package_index(self, package):
+        try:
+            return self.index[package]
+        except KeyError:
+            i = self.index[package] = len(self.packages)
+            self.packages.append(package)
+            return i
+
+
+    def successors(self, deptype, i):
+        try:
+            return self.edges[deptype][i]
+        except KeyError:
+            pass
+        package = self.packages[i]
+        edges = []
+        missing = []
+        for depend in self.get_depends(package, deptype):
+            item = oelite.item.OEliteItem(depend, (deptype, package.type))
+            try:
+                provider = self.resolve(item)
+            except NoProvider, e:
+                missing.append((e.args[0], str(package)))
+                continue
+            if provider is not None:
+                edges.append(self.package_index(provider))
+        self.direct_missing[deptype][i] = missing
+        self.edges[deptype][i] = edges
+        return edges
+
+
+    def compute(self, deptype, root):
+        # Iterative Tarjan SCC algorithm.  Components are completed
+        # in reverse topological order, so the closures of all
+        # components a component depends on are available when it is
+        # completed.
+        closure = self.closure[deptype]
+        index = {root: 0}
+        lowlink = {root: 0}
+        stack = [root]
+        onstack = set([root])
+        work = [(root, iter(self.successors(deptype, root)))]
+        while work:
+            (v, successors) = work[-1]
+            for w in successors:
+                if w in closure:
+                    continue
+                if not w in index:
+                    index[w] = lowlink[w] = len(index)
+                    stack.append(w)
+                    onstack.add(w)
+                    work.append((w, iter(self.successors(deptype, w))))
+                    break
+                elif w in onstack:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u], lowlink[v])
+                if lowlink[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        onstack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    self.close_component(deptype, component)
+        return
+
+
+    def close_component(self, deptype, component):
+        closure = self.closure[deptype]
+        bits = 0
+        missing = set()
+        for v in component:
+            bits |= 1 << v
+            missing.update(self.direct_missing[deptype][v])
+        for v in component:
+            for w in self.edges[deptype][v]:
+                if w in closure:
+                    bits |= closure[w]
+                    missing.update(self.missing[deptype][w])
+        if len(component) > 1:
+            # Packages depending on each other is not necessarily a
+            # problem, anyone depending on one of them will just get
+            # all of them.  Bad circular dependencies are detected at
+            # runq task level.
+            err("circular %s dependency between packages: %s"%(
+                    deptype, " ".join(sorted([str(self.packages[v])
+                                              for v in component]))))
+        missing = sorted(missing)
+        for v in component:
+            closure[v] = bits
+            self.missing[deptype][v] = missing
+        return
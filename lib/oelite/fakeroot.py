@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+
+from oebakery import die, err, warn, info, debug
+import oelite.util
+
+import os
+import errno
+import signal
+import subprocess
+import time
+
+# Running faked sessions
+sessions = set()
+
+
+class FakedSession:
+    """A faked daemon shared by all fakeroot tasks of a recipe.
+
+    The daemon is started (like the fakeroot script does) when first
+    needed, and keeps the faked file ownership and modes in memory
+    until it is stopped.  It then saves them to statefile, from which
+    they are loaded by the next session of the recipe, fx. when a
+    later build resumes it.
+
+    Arguments:
+    faked -- faked program
+    library -- libfakeroot preload library (absolute path)
+    statefile -- file to load and save the faked state
+    """
+
+    def __init__(self, faked, library, statefile):
+        self.faked = faked
+        self.library = library
+        self.statefile = statefile
+        self.key = None
+        self.pid = None
+        return
+
+    def start(self):
+        cmd = [self.faked, "--save-file", self.statefile]
+        if os.path.exists(self.statefile):
+            cmd.insert(1, "--load")
+            stdin = open(self.statefile)
+        else:
+            oelite.util.makedirs(os.path.dirname(self.statefile))
+            stdin = open("/dev/null")
+        try:
+            output = subprocess.check_output(cmd, stdin=stdin, close_fds=True)
+        except (OSError, subprocess.CalledProcessError), e:
+            die("starting %s failed: %s"%(self.faked, e))
+        finally:
+            stdin.close()
+        try:
+            (key, pid) = output.strip().split(":")
+            self.key = key
+            self.pid = int(pid)
+        except ValueError:
+            die("unexpected output from %s: %r"%(self.faked, output))
+        debug("started faked session %s (pid %d)"%(self.key, self.pid))
+        sessions.add(self)
+        return
+
+    def environ(self):
+        """Return dict of environment variables for running a
+        command in the session."""
+        return { "FAKEROOTKEY": self.key,
+                 "FAKED_MODE": "unknown-is-root",
+                 "LD_PRELOAD": self.library }
+
+    def command(self):
+        """Return command prefix for running a command in the
+        session, for use in place of FAKEROOT."""
+        environ = self.environ()
+        return "env " + " ".join(["%s=%s"%(var, environ[var])
+                                  for var in sorted(environ)])
+
+    def rmtree(self, path):
+        """Remove path in the session, so that faked forgets about
+        the removed files, and does not mistake new files reusing
+        their inodes for them."""
+        env = os.environ.copy()
+        env.update(self.environ())
+        returncode = subprocess.call(["rm", "-rf", path], env=env)
+        if returncode != 0:
+            raise Exception("rm -rf %s failed: %d"%(path, returncode))
+        return
+
+    def stop(self):
+        """Stop faked, and wait for it to save its state."""
+        if self.pid is None:
+            return
+        sessions.discard(self)
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+            # faked is not a child of this process, so poll for it
+            # to exit, as the fakeroot script does.
+            while True:
+                time.sleep(0.01)
+                os.kill(self.pid, 0)
+        except OSError, e:
+            if e.errno != errno.ESRCH:
+                raise
+        debug("stopped faked session %s (pid %d)"%(self.key, self.pid))
+        self.key = None
+        self.pid = None
+        return
+
+
+def stop_all():
+    for session in list(sessions):
+        session.stop()
+    return
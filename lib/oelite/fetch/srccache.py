@@ -0,0 +1,153 @@
+import oelite.util
+
+import os
+import shutil
+import hashlib
+import tempfile
+
+# Marker file written to SRCDIR when it is restored from the cache
+MARKER = ".srccache"
+
+
+def cache_key(d):
+    """Return the source cache key of the recipe, or None if the
+    unpacked and patched source cannot be cached.
+
+    The key is computed from the fetcher signatures of all SRC_URI
+    entries (which for local files, such as patches, is a hash of the
+    file content), their parameters and unpack commands, the location
+    of S in SRCDIR, and the data hashes (metadata signatures) of the
+    do_unpack and do_patch tasks.  Sources without a known signature
+    (fx. local directories) are not cached, and neither are recipes
+    changing the source with do_unpack or do_patch prefuncs or
+    do_unpack postfuncs, as they are not run again on cached source.
+    """
+    if not d.get("SRC_CACHE_DIR"):
+        return None
+    for flag in ("prefuncs", "postfuncs"):
+        if d.get_flag("do_unpack", flag):
+            return None
+    if d.get_flag("do_patch", "prefuncs"):
+        return None
+    datahash = d.get("__datahash") or {}
+    if not ("do_unpack" in datahash and "do_patch" in datahash):
+        return None
+    m = hashlib.sha1()
+    m.update("%s\n%s\n"%(datahash["do_unpack"], datahash["do_patch"]))
+    for uri in d.get("__fetch"):
+        signature = uri.signature()
+        if not signature:
+            return None
+        m.update("%s\n%r\n%r\n"%(uri.uri, signature,
+                                 sorted(uri.params.items())))
+        if "unpack" in uri.params:
+            m.update("%s\n"%(d.get("UNPACK_CMD_%s"%(uri.params["unpack"]))))
+    m.update("%s\n%s\n"%(os.path.relpath(d.get("S"), d.get("SRCDIR")),
+                         d.get("PATCHSUBDIR")))
+    return m.hexdigest()
+
+
+def copy_tree(src, dst, method="copy"):
+    """Copy the content of directory src to directory dst, with
+    hardlinks if method is "hardlink" (falling back to copying if
+    that fails), and otherwise with reflinks where supported by the
+    file system."""
+    oelite.util.makedirs(dst)
+    if method == "hardlink":
+        if oelite.util.shcmd(["cp", "-al", src + "/.", dst]):
+            return True
+        print "Hardlinking %s failed, copying it"%(src)
+    return oelite.util.shcmd(["cp", "-a", "--reflink=auto", src + "/.", dst])
+
+
+def restore(d):
+    """Restore SRCDIR from the source cache.  Returns True if found in
+    the cache."""
+    key = cache_key(d)
+    if key is None:
+        return False
+    entry = os.path.join(d.get("SRC_CACHE_DIR"), key)
+    if not os.path.isdir(entry):
+        return False
+    srcdir = d.get("SRCDIR")
+    print "Restoring patched source from", entry
+    if not copy_tree(entry, srcdir, d.get("SRC_CACHE_METHOD")):
+        return False
+    # Keep the entry from being removed as unused (see clean())
+    try:
+        os.utime(entry, None)
+    except OSError:
+        pass
+    # quilt has the (absolute) path of the patches in quiltrc and .pc
+    patchdir = d.get("PATCHDIR")
+    with open(d.get("QUILTRC"), "w") as quiltrc:
+        quiltrc.write("QUILT_PATCHES=%s\n"%(patchdir))
+    quilt_patches = os.path.join(d.get("S"), ".pc", ".quilt_patches")
+    if os.path.exists(quilt_patches):
+        with open(quilt_patches, "w") as f:
+            f.write("%s\n"%(patchdir))
+    with open(os.path.join(srcdir, MARKER), "w") as f:
+        f.write(key)
+    return True
+
+
+def restored(d):
+    """Return True if SRCDIR was restored from the source cache."""
+    try:
+        with open(os.path.join(d.get("SRCDIR"), MARKER)) as f:
+            return f.read() == cache_key(d)
+    except IOError:
+        return False
+
+
+def store(d):
+    """Store SRCDIR in the source cache."""
+    key = cache_key(d)
+    if key is None:
+        return
+    cachedir = d.get("SRC_CACHE_DIR")
+    entry = os.path.join(cachedir, key)
+    if os.path.exists(entry):
+        return
+    oelite.util.makedirs(cachedir)
+    tmpdir = tempfile.mkdtemp(prefix=key + ".", dir=cachedir)
+    # Always copy, as the source in SRCDIR may be changed in place by
+    # later tasks.
+    if copy_tree(d.get("SRCDIR"), tmpdir):
+        try:
+            os.rename(tmpdir, entry)
+            print "Stored patched source in", entry
+            return
+        except OSError:
+            # Stored by a concurrent build
+            pass
+    shutil.rmtree(tmpdir, True)
+    return
+
+
+def clean(cachedir, max_age):
+    """Remove the entries in the source cache not stored or restored
+    in the last max_age seconds (and any temporary directories left
+    by failed stores), and return the number of entries removed."""
+    if not os.path.isdir(cachedir):
+        return 0
+    expire = oelite.util.now() - max_age
+    removed = 0
+    for name in os.listdir(cachedir):
+        entry = os.path.join(cachedir, name)
+        try:
+            if os.path.getmtime(entry) >= expire:
+                continue
+        except OSError:
+            # Removed by a concurrent cleaning
+            continue
+        # Move the entry away first, so that it is not restored while
+        # being removed
+        trash = tempfile.mkdtemp(prefix=".clean.", dir=cachedir)
+        try:
+            os.rename(entry, os.path.join(trash, name))
+            removed += 1
+        except OSError:
+            pass
+        shutil.rmtree(trash, True)
+    return removed
@@ -87,25 +87,33 @@ class UrlFetcher():
         return m.hexdigest()
 
     def get_proxies(self, d):
-        proxies = {}
-        for v in ("http_proxy", "ftp_proxy", "https_proxy"):
-            proxy = d.get(v)
-            if proxy:
-                proxies[v] = proxy
-        return proxies
+        return get_proxies(d)
 
     def get_passive_ftp(self, d):
-        val = d.get("DISABLE_FTP_EXTENDED_PASSIVE_MODE")
-        if val == "1":
-            return False
-        return True
+        return get_passive_ftp(d)
 
 
 
 
-def grab(url, filename, timeout=120, retry=5, proxies=None, passive_ftp=True):
-    print "Grabbing", url
+def get_proxies(d):
+    proxies = {}
+    for v in ("http_proxy", "ftp_proxy", "https_proxy"):
+        proxy = d.get(v)
+        if proxy:
+            proxies[v] = proxy
+    return proxies
+
 
+def get_passive_ftp(d):
+    val = d.get("DISABLE_FTP_EXTENDED_PASSIVE_MODE")
+    if val == "1":
+        return False
+    return True
+
+
+def grab_command(url, timeout=120, retry=5, proxies=None, passive_ftp=True):
+    """Return tuple of the wget command downloading url to stdout, and
+    the environment to run it in."""
     if proxies:
         env = os.environ.copy()
         env.update(proxies)
@@ -117,6 +125,13 @@ def grab(url, filename, timeout=120, retry=5, proxies=None, passive_ftp=True):
     else:
         psvftp = '--no-passive-ftp'
 
+    cmd = ['wget', '-t', str(retry), '-T', str(timeout), psvftp, '--no-check-certificate', '--progress=dot:mega', '-v', url, '-O', '-']
+    return (cmd, env)
+
+
+def grab_tempfile(filename):
+    """Create and open a temporary file next to filename, for
+    downloading it.  Returns tuple of file descriptor and path."""
     d = os.path.dirname(filename)
     f = os.path.basename(filename)
     if not os.path.exists(d):
@@ -133,8 +148,14 @@ def grab(url, filename, timeout=120, retry=5, proxies=None, passive_ftp=True):
     mask = os.umask(0o022)
     os.fchmod(fd, 0o644 & ~mask)
     os.umask(mask)
+    return (fd, dl_tgt)
 
-    cmd = ['wget', '-t', str(retry), '-T', str(timeout), psvftp, '--no-check-certificate', '--progress=dot:mega', '-v', url, '-O', '-']
+
+def grab(url, filename, timeout=120, retry=5, proxies=None, passive_ftp=True):
+    print "Grabbing", url
+
+    (cmd, env) = grab_command(url, timeout, retry, proxies, passive_ftp)
+    (fd, dl_tgt) = grab_tempfile(filename)
 
     try:
         returncode = subprocess.call(cmd, env=env, stdout=fd)
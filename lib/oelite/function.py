@@ -6,9 +6,88 @@ import sys
 import os
 import shutil
 import warnings
-import re
+import errno
 import subprocess
+import hashlib
+import zlib
 import oelite.signal
+import oelite.util
+import oelite.profiling
+
+# Average number of variables (or shell functions) per run file
+# preamble fragment.  Fragment boundaries are chosen by the variable
+# names, so that a variable with a task specific value only affects
+# the fragment it is in.
+PREAMBLE_FRAGMENT_SIZE = 32
+
+# Preamble fragments known to be written (by this process)
+preamble_written = set()
+
+
+def preamble_fragments(lines):
+    """Split list of (name, line) into list of fragments (strings)."""
+    fragments = []
+    fragment = []
+    for (name, line) in lines:
+        fragment.append(line)
+        if zlib.crc32(name) % PREAMBLE_FRAGMENT_SIZE == 0:
+            fragments.append("".join(fragment))
+            fragment = []
+    if fragment:
+        fragments.append("".join(fragment))
+    return fragments
+
+
+def write_preamble(preamble_dir, fragment):
+    """Write preamble fragment to preamble_dir (if not already there),
+    and return the filename.  The modification time of an existing
+    fragment is updated, so that fragments still in use are not
+    removed by clean_preamble_dir()."""
+    digest = hashlib.md5(fragment).hexdigest()
+    filename = os.path.join(preamble_dir, digest[:2], digest + ".sh")
+    if filename in preamble_written:
+        return filename
+    try:
+        os.utime(filename, None)
+    except OSError, e:
+        if e.errno != errno.ENOENT:
+            raise
+        oelite.util.makedirs(os.path.dirname(filename))
+        tmpfile = "%s.%d"%(filename, os.getpid())
+        with open(tmpfile, "w") as f:
+            f.write(fragment)
+        os.rename(tmpfile, filename)
+    preamble_written.add(filename)
+    return filename
+
+
+def clean_preamble_dir(preamble_dir, max_age):
+    """Remove the preamble fragments in preamble_dir not used by any
+    run file written in the last max_age seconds (fx. fragments with
+    the values of an earlier build), and return the number of
+    fragments removed.  Older run files are not looked at (rmwork
+    keeps them, so they would keep all fragments), and fail if run
+    again after their fragments are removed."""
+    if not os.path.isdir(preamble_dir):
+        return 0
+    expire = oelite.util.now() - max_age
+    removed = 0
+    for subdir in os.listdir(preamble_dir):
+        subdir = os.path.join(preamble_dir, subdir)
+        if not os.path.isdir(subdir):
+            continue
+        for name in os.listdir(subdir):
+            filename = os.path.join(subdir, name)
+            try:
+                if os.path.getmtime(filename) < expire:
+                    os.unlink(filename)
+                    removed += 1
+            except OSError, e:
+                # Removed by a concurrent cleaning
+                if e.errno != errno.ENOENT:
+                    raise
+    return removed
+
 
 class OEliteFunction(object):
 
@@ -25,6 +104,7 @@ class OEliteFunction(object):
             self.tmpdir = self.meta.get("T")
             if not self.tmpdir:
                 die("T variable not set, unable to build")
+        self.maxrss = None
         return
 
     def __str__(self):
@@ -106,20 +186,15 @@ class PythonFunction(OEliteFunction):
     def __call__(self):
 
         if self.set_os_environ:
-            for var in self.meta.get_vars(flag="export", values=True):
-                if self.meta.get_flag(var, "unexport"):
-                    continue
-                val = self.meta.get(var)
-                if val is None:
-                    val = ""
-                if var == "LD_LIBRARY_PATH":
-                    var = (self.meta.get("LD_LIBRARY_PATH_VAR")
-                           or "LD_LIBRARY_PATH")
-                os.environ[var] = val
+            saved_environ = os.environ.copy()
+            os.environ.clear()
+            os.environ.update(self.meta.get_environ())
         try:
             retval = self.function(self.meta)
         finally:
-            os.environ.clear()
+            if self.set_os_environ:
+                os.environ.clear()
+                os.environ.update(saved_environ)
         if isinstance(retval, basestring):
             return retval or True
         if retval is None:
@@ -137,10 +212,7 @@ class ShellFunction(OEliteFunction):
     def wait(self, poll):
         if self.result is not None:
             return self.result
-        if poll:
-            ret = self.subprocess.poll()
-        else:
-            ret = self.subprocess.wait()
+        ret = self.wait4(poll)
         if ret is None:
             return None
         if ret == 0:
@@ -151,6 +223,105 @@ class ShellFunction(OEliteFunction):
         return self.result
 
 
+    @oelite.profiling.profile_calls
+    def write_runfile(self, runfn, preamble_dir=None):
+        """Write run file for the function.  If preamble_dir is set,
+        the environment (variables and shell functions) is written to
+        shared preamble fragments in preamble_dir, which are sourced
+        by the run file."""
+        (varlines, funclines) = self.environment()
+        with open(runfn, "w") as runfile:
+            runfile.write("#!/bin/bash -e\n\n")
+            if preamble_dir:
+                for fragment in (preamble_fragments(varlines) +
+                                 preamble_fragments(funclines)):
+                    runfile.write(". %s\n"%(
+                            write_preamble(preamble_dir, fragment)))
+            else:
+                for (name, line) in varlines + funclines:
+                    runfile.write(line)
+            runfile.write("set -x\n")
+            runfile.write("cd %s\n"%(os.getcwd()))
+            runfile.write("%s\n"%(self.name))
+        os.chmod(runfn, 0755)
+        return
+
+    def environment(self):
+        """Return tuple of lists of (name, line) for the variables and
+        shell functions to emit to the run file, in the order they must
+        be emitted."""
+        environ = self.meta.get_environ()
+        vars = self.meta.keys()
+        vars.sort()
+        varlines = []
+        bashfuncs = []
+        for var in vars:
+            if self.meta.get_flag(var, "python"):
+                continue
+            if "-" in var:
+                bb.warn("cannot emit var with '-' to bash:", var)
+                continue
+            if self.meta.get_flag(var, "unexport"):
+                continue
+            name = var
+            if var == "LD_LIBRARY_PATH":
+                name = (self.meta.get("LD_LIBRARY_PATH_VAR")
+                        or "LD_LIBRARY_PATH")
+            if self.meta.get_flag(var, "bash"):
+                bashfuncs.append((var, self.meta.get(var)))
+                continue
+            if self.meta.get_flag(var, "export"):
+                export = "export "
+            else:
+                export = ""
+            if export and name in environ:
+                val = environ[name]
+            else:
+                val = self.meta.get(var)
+            if val is None:
+                val = ""
+            if not isinstance(val, basestring):
+                #print "ignoring var %s type=%s"%(var, type(val))
+                continue
+            quotedval = val.replace('"', '\\"')
+            varlines.append((var, '%s%s="%s"\n'%(export, name, quotedval)))
+        funclines = []
+        for (var, val) in bashfuncs:
+            funclines.append((var, "\n%s() {\n%s\n}\n"%(
+                        var, (val or "\t:").rstrip())))
+        return (varlines, funclines)
+
+
+    def wait4(self, poll):
+        # Like Popen.poll()/Popen.wait(), but using wait4() to get the
+        # peak memory usage (maxrss) of the process.  For a process
+        # tree, this is the peak of the largest single process in it,
+        # not of the tree in total (which is sampled by the oven).
+        if self.subprocess.returncode is not None:
+            return self.subprocess.returncode
+        while True:
+            try:
+                (pid, status, rusage) = os.wait4(
+                    self.subprocess.pid, poll and os.WNOHANG or 0)
+                break
+            except OSError, e:
+                if e.errno != errno.EINTR:
+                    raise
+        if pid == 0:
+            return None
+        # ru_maxrss is in bytes on Darwin, and kilobytes elsewhere
+        if sys.platform == "darwin":
+            self.maxrss = rusage.ru_maxrss
+        else:
+            self.maxrss = rusage.ru_maxrss * 1024
+        if os.WIFSIGNALED(status):
+            ret = -os.WTERMSIG(status)
+        else:
+            ret = os.WEXITSTATUS(status)
+        self.subprocess.returncode = ret
+        return ret
+
+
     def startscript(self, cmd):
         self.cmdstr = cmd
         cmdname = cmd.split(None, 1)[0]
@@ -175,48 +346,11 @@ class ShellFunction(OEliteFunction):
         if not body:
             return True
 
-        runfile = open(runfn, "w")
-        runfile.write("#!/bin/bash -e\n\n")
+        self.write_runfile(runfn, self.meta.get("RUNFILE_PREAMBLE_DIR"))
         if os.path.exists(runsymlink) or os.path.islink(runsymlink):
             os.remove(runsymlink)
         os.symlink(os.path.basename(runfn), runsymlink)
 
-        vars = self.meta.keys()
-        vars.sort()
-        bashfuncs = []
-        for var in vars:
-            if self.meta.get_flag(var, "python"):
-                continue
-            if "-" in var:
-                bb.warn("cannot emit var with '-' to bash:", var)
-                continue
-            if self.meta.get_flag(var, "unexport"):
-                continue
-            val = self.meta.get(var)
-            if self.meta.get_flag(var, "bash"):
-                bashfuncs.append((var, val))
-                continue
-            if self.meta.get_flag(var, "export"):
-                runfile.write("export ")
-            if val is None:
-                val = ""
-            if not isinstance(val, basestring):
-                #print "ignoring var %s type=%s"%(var, type(val))
-                continue
-            quotedval = re.sub('"', '\\"', val or "")
-            if var == "LD_LIBRARY_PATH":
-                var = (self.meta.get("LD_LIBRARY_PATH_VAR")
-                       or "LD_LIBRARY_PATH")
-            runfile.write('%s="%s"\n'%(var, quotedval))
-        for (var, val) in bashfuncs:
-            runfile.write("\n%s() {\n%s\n}\n"%(
-                    var, (val or "\t:").rstrip()))
-
-        runfile.write("set -x\n")
-        runfile.write("cd %s\n"%(os.getcwd()))
-        runfile.write("%s\n"%(self.name))
-        runfile.close()
-        os.chmod(runfn, 0755)
         cmd = "%s"%(runfn)
         if self.meta.get_flag(self.name, "fakeroot"):
             cmd = "%s "%(self.meta.get("FAKEROOT") or "fakeroot") + cmd
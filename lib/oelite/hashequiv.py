@@ -0,0 +1,234 @@
+from oebakery import die, err, warn, info, debug
+import oelite.util
+import oelite.dbutil
+
+from pysqlite2 import dbapi2 as sqlite
+
+import os
+import stat
+import hashlib
+
+
+class HashEquivalence:
+    """Store of output hash equivalent task metadata hashes.
+
+    For each task metahash built, the hash of the output of the task
+    is recorded.  The first metahash recorded for an output hash is
+    the unified hash of all metahashes giving the same output, which
+    is used in place of the metahash when computing the metahashes of
+    the tasks depending on it.  In this way, a change giving the same
+    output as before (fx. a comment changed by a patch) does not
+    cause the tasks depending on it to be rebuilt.
+
+    The store is a sqlite database file, which may be shared by
+    several builds.
+    """
+
+    def __init__(self, filename):
+        oelite.util.makedirs(os.path.dirname(filename))
+        self.db = sqlite.connect(filename, timeout=60,
+                                 isolation_level=None)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outhash ("
+            "metahash TEXT PRIMARY KEY, "
+            "outhash TEXT NOT NULL)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS unihash ("
+            "outhash TEXT PRIMARY KEY, "
+            "unihash TEXT NOT NULL)")
+        self.cache = {}
+        self.stats = { "lookup": 0, "equivalent": 0, "report": 0 }
+        return
+
+    def unihash(self, metahash):
+        """Return the unified hash of metahash, which is metahash
+        itself if no equivalent metahash is known."""
+        try:
+            return self.cache[metahash]
+        except KeyError:
+            pass
+        self.stats["lookup"] += 1
+        unihash = oelite.dbutil.flatten_single_value(self.db.execute(
+                "SELECT unihash FROM outhash, unihash "
+                "WHERE outhash.metahash=? "
+                "AND unihash.outhash=outhash.outhash", (metahash,)))
+        if unihash is None:
+            unihash = metahash
+        elif unihash != metahash:
+            debug("metahash %s equivalent to %s"%(metahash, unihash))
+            self.stats["equivalent"] += 1
+        self.cache[metahash] = unihash
+        return unihash
+
+    def report(self, metahash, outhash):
+        """Record outhash as the output hash of metahash (unless an
+        output hash is already recorded for it), and return the
+        unified hash of metahash."""
+        self.stats["report"] += 1
+        self.db.execute(
+            "INSERT OR IGNORE INTO outhash (metahash, outhash) "
+            "VALUES (?, ?)", (metahash, outhash))
+        self.db.execute(
+            "INSERT OR IGNORE INTO unihash (outhash, unihash) "
+            "VALUES (?, ?)", (outhash, metahash))
+        self.cache.pop(metahash, None)
+        return self.unihash(metahash)
+
+    def close(self):
+        self.db.close()
+        return
+
+    def write_stats(self, f):
+        for (name, count) in sorted(self.stats.iteritems()):
+            f.write("%s\t%d\n"%(name, count))
+        return
+
+
+class TaskHashes:
+    """Metahashes of the tasks of a bake.
+
+    The metahash of a task is computed from its data hash (the
+    signature of its metadata) and the metahashes of the tasks it
+    depends on.  With an equivalence store, the unified hash is used
+    in place of the metahash of do_package tasks.
+
+    When a do_package task is to be built, the tasks depending on it
+    are also planned to be built, as its output is not known until it
+    is built.  Their metahashes are recomputed with rehash() when they
+    are ready to build (ie. when the output hash of the do_package
+    task is reported with task_built()), and a task already built with
+    the recomputed metahash is skipped (see skippable()).  Tasks built
+    are then stamped with metahashes computed from the unified hashes,
+    which are also used in the next bake.
+
+    Arguments:
+    store -- HashEquivalence store, or None
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.metahashes = {}
+        # task -> (datahash, depends), for recomputing the metahash
+        self.inputs = {}
+        # Tasks to be built regardless of their metahash
+        self.forced = set()
+        # Tasks built in this bake
+        self.built = set()
+        return
+
+    def add(self, task, datahash, depends):
+        """Compute, record and return the metahash of task, from
+        datahash and the tasks in depends, which must be added
+        before it."""
+        metahash = self.compute(datahash, depends)
+        self.metahashes[task] = metahash
+        if self.store:
+            self.inputs[task] = (datahash, tuple(depends))
+        return metahash
+
+    def set_metahash(self, task, metahash):
+        self.metahashes[task] = metahash
+        return
+
+    def dephash(self, task):
+        """Return the hash of task used in the metahash of the tasks
+        depending on it."""
+        metahash = self.metahashes[task]
+        if self.store and task.name == "do_package":
+            return self.store.unihash(metahash)
+        return metahash
+
+    def compute(self, datahash, depends):
+        hasher = hashlib.md5()
+        hasher.update(str(sorted([self.dephash(depend)
+                                  for depend in depends])))
+        dephash = hasher.hexdigest()
+
+        hasher = hashlib.md5()
+        hasher.update(datahash)
+        hasher.update(dephash)
+        return hasher.hexdigest()
+
+    def set_forced(self, tasks):
+        """Set the tasks to be built regardless of their metahash (fx.
+        without a stamp, or rebuilt by request)."""
+        self.forced = set(tasks)
+        return
+
+    def task_built(self, task, outhash=None):
+        """Record that task is built, and report outhash (the output
+        hash of a do_package task) to the store."""
+        self.built.add(task)
+        if outhash is not None and self.store:
+            self.store.report(self.metahashes[task], outhash)
+        return
+
+    def rehash(self, task):
+        """Recompute and return the metahash of task, with the unified
+        hashes of the do_package tasks built so far."""
+        if not task in self.inputs:
+            return self.metahashes[task]
+        (datahash, depends) = self.inputs[task]
+        metahash = self.compute(datahash, depends)
+        self.metahashes[task] = metahash
+        return metahash
+
+    def skippable(self, task, stamphash):
+        """Return True if task need not be built, as it is already
+        built with its (recomputed) metahash, as given by stamphash.
+        This requires that all tasks it depends on built in this bake
+        are do_package tasks, whose output hash is then included in
+        the metahash (through the unified hash)."""
+        if not task in self.inputs or task in self.forced:
+            return False
+        if stamphash != self.metahashes[task]:
+            return False
+        for depend in self.inputs[task][1]:
+            if depend in self.built and depend.name != "do_package":
+                return False
+        return True
+
+
+def tree_hash(hasher, path):
+    """Update hasher with the content of the directory tree at path:
+    the names, types and permissions of all files, the content of
+    regular files, and the targets of symlinks.  Timestamps and
+    ownership are not included."""
+    for (dirpath, dirnames, filenames) in os.walk(path):
+        dirnames.sort()
+        for name in sorted(dirnames + filenames):
+            filename = os.path.join(dirpath, name)
+            st = os.lstat(filename)
+            hasher.update("%s\0%o\0"%(
+                    os.path.relpath(filename, path), st.st_mode))
+            if stat.S_ISLNK(st.st_mode):
+                hasher.update(os.readlink(filename))
+            elif stat.S_ISREG(st.st_mode):
+                with open(filename, "rb") as f:
+                    while True:
+                        buf = f.read(1 << 20)
+                        if not buf:
+                            break
+                        hasher.update(buf)
+            elif stat.S_ISCHR(st.st_mode) or stat.S_ISBLK(st.st_mode):
+                hasher.update("%d"%(st.st_rdev))
+            hasher.update("\0")
+    return
+
+
+def package_output_hash(meta):
+    """Return the output hash of do_package, computed from the
+    content of each package in PKGD, and its type and arch."""
+    hasher = hashlib.sha1()
+    pkgd = meta.get("PKGD")
+    recipe_type = meta.get("RECIPE_TYPE")
+    recipe_arch = meta.get("RECIPE_ARCH")
+    extra_arch = meta.get("EXTRA_ARCH") or ""
+    for package in sorted((meta.get("PACKAGES") or "").split()):
+        hasher.update("%s\0%s\0%s%s\0"%(
+                package,
+                meta.get("PACKAGE_TYPE_" + package) or recipe_type,
+                meta.get("PACKAGE_ARCH_" + package) or recipe_arch,
+                extra_arch))
+        tree_hash(hasher, os.path.join(pkgd, package))
+    return hasher.hexdigest()
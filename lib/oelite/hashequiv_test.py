@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+import oelite.meta
+import oelite.baker
+import oelite.cookbook
+import oelite.hashequiv
+import oelite.parse.oeparse
+import oelite.profiling
+import oelite.recipe
+import oelite.stamp
+from oelite.dbutil import CursorWrapper
+from pysqlite2 import dbapi2 as sqlite
+
+import os
+import shutil
+import tempfile
+import unittest
+
+# Recipe P, with do_package writing P_OUTPUT to the p package
+P_RECIPE = """
+addtask patch
+addtask compile after patch
+addtask install after compile
+addtask package after install
+addtask build after package
+
+def do_patch(d):
+    # %(comment)s
+    return True
+
+def do_compile(d):
+    return True
+
+def do_install(d):
+    return True
+
+do_package[dirs] = "${PKGD}/p/usr/bin"
+def do_package(d):
+    with open("p", "w") as f:
+        f.write(d.get("P_OUTPUT"))
+    return True
+
+P_OUTPUT = "%(output)s"
+"""
+
+# Recipe D, depending on the do_package task of P
+D_RECIPE = """
+DEPENDS = "p"
+addtask configure
+do_configure[deptask] = "DEPENDS:do_package"
+addtask compile after configure
+addtask package after compile
+
+def do_configure(d):
+    # %(comment)s
+    return True
+
+def do_compile(d):
+    return True
+
+do_package[dirs] = "${PKGD}/d"
+def do_package(d):
+    return True
+"""
+
+# Recipe E, depending on the do_package task of D
+E_RECIPE = """
+DEPENDS = "d"
+addtask configure
+do_configure[deptask] = "DEPENDS:do_package"
+addtask build after configure
+
+def do_configure(d):
+    return True
+"""
+
+
+class Options:
+    task = None
+    rebuild = None
+    relax = None
+    prebake = False
+    dump_signature_metadata = None
+    dryrun = False
+    rmwork = None
+    yes = True
+    debug = False
+
+
+class TestCookBook(oelite.cookbook.CookBook):
+    """Cookbook with the recipes parsed from recipefiles, without any
+    layers or classes."""
+
+    def __init__(self, baker, recipefiles):
+        self.baker = baker
+        self.config = baker.config
+        self.db = sqlite.connect(":memory:", isolation_level=None)
+        self.db.text_factory = str
+        self.dbc = CursorWrapper(self.db.cursor(), profile=False)
+        self.init_db()
+        self.recipes = {}
+        self.packages = {}
+        self.tasks = {}
+        self.meta_cache_archive = None
+        self.lazy = False
+        self.debug = baker.debug
+        for filename in recipefiles:
+            parser = oelite.parse.oeparse.OEParser(self.config.copy())
+            meta = parser.parse(filename)
+            self.add_recipe(oelite.recipe.OEliteRecipe(
+                    filename, "machine", meta, self))
+        self.flush_db()
+        self.create_db_indexes()
+        return
+
+
+class TestBaker(oelite.baker.OEliteBaker):
+    """Baker of the E recipe, with the configuration needed for
+    building the recipes in tmpdir."""
+
+    def __init__(self, tmpdir, recipefiles):
+        self.options = Options()
+        self.debug = False
+        self.debug_loglines = None
+        self.config = oelite.meta.DictMeta()
+        for (var, val) in (
+            ("TMPDIR", os.path.join(tmpdir, "tmp")),
+            ("DATETIME", "0"),
+            ("DEFAULT_UMASK", "022"),
+            ("OE_IMPORTS", oelite.baker.INITIAL_OE_IMPORTS),
+            ("LAYER_PRIORITY", "0"),
+            ("PRIORITY_BASELINE", "0"),
+            ("PRIORITY", "0"),
+            ("RECIPE_TYPE", "machine"),
+            ("RECIPE_ARCH", "arm"),
+            ("PACKAGES", "${PN}"),
+            ("WORKDIR", "${TMPDIR}/work/${PN}"),
+            ("T", "${WORKDIR}/tmp"),
+            ("B", "${WORKDIR}"),
+            ("PKGD", "${WORKDIR}/packages"),
+            ("HOOKTMPDIR", "${TMPDIR}/hooks"),
+            ("STAMPDIR", "${TMPDIR}/stamp/${PN}"),
+            ("PACKAGE_DEPLOY_DIR", "${TMPDIR}/packages"),
+            ("HASHEQUIV_DB", os.path.join(tmpdir, "hashequiv.db"))):
+            self.config.set(var, val)
+        self.config.pythonfunc_init()
+        self.stamps = oelite.stamp.StampIndex(None)
+        self.reclaimer = None
+        self.hashequiv = oelite.hashequiv.HashEquivalence(
+            self.config.get("HASHEQUIV_DB"))
+        self.cookbook = TestCookBook(self, recipefiles)
+        self.things_todo = ["e"]
+        self.recipes_todo = set()
+        return
+
+
+class TestBake(unittest.TestCase):
+    """Bake recipe E, depending on the do_package task of recipe D,
+    which depends on the do_package task of recipe P, with the baker,
+    run queue and oven, keeping the stamps and the hash equivalence
+    store between the bakes."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="hashequiv-test.")
+        self.recipefiles = [os.path.join(self.tmpdir, "p_1.0.oe"),
+                            os.path.join(self.tmpdir, "d_1.0.oe"),
+                            os.path.join(self.tmpdir, "e_1.0.oe")]
+        self.tasks = ["p:do_patch", "p:do_compile", "p:do_install",
+                      "p:do_package", "d:do_configure", "d:do_compile",
+                      "d:do_package", "e:do_configure", "e:do_build"]
+        self.write_recipes()
+        return
+
+    def tearDown(self):
+        oelite.profiling.profiledir = None
+        shutil.rmtree(self.tmpdir)
+        return
+
+    def write_recipes(self, p_comment="first", d_comment="first",
+                      output="0"):
+        for (filename, recipe, comment) in (
+            (self.recipefiles[0], P_RECIPE, p_comment),
+            (self.recipefiles[1], D_RECIPE, d_comment),
+            (self.recipefiles[2], E_RECIPE, None)):
+            with open(filename, "w") as f:
+                f.write(recipe%{"comment": comment, "output": output})
+        return
+
+    def stamps(self):
+        """Return the stamps of the tasks, ie. their build hashes."""
+        stamps = {}
+        for task in self.tasks:
+            (recipe, name) = task.split(":")
+            with open(os.path.join(self.tmpdir, "tmp", "stamp",
+                                   recipe, name)) as f:
+                stamps[task] = f.read()
+        return stamps
+
+    def bake(self):
+        """Return lists of the tasks built and the tasks skipped."""
+        self.baker = TestBaker(self.tmpdir, self.recipefiles)
+        self.assertEqual(self.baker.bake(), 0)
+        oven = getattr(self.baker, "oven", None)
+        if oven is None:
+            return ([], [])
+        def names(tasks):
+            return ["%s:%s"%(task.recipe.name, task.name) for task in tasks]
+        return (names(oven.completed_tasks), names(oven.skipped_tasks))
+
+    def package_filename(self, package):
+        package = self.baker.cookbook.get_package(name=package)
+        return self.baker.runq.get_package_filename(package)
+
+    def test_equivalent_output(self):
+        self.assertEqual(self.bake(), (self.tasks, []))
+        first = self.stamps()
+        d_package = self.package_filename("d")
+        # Comment changed by a patch, giving the same output
+        self.write_recipes(p_comment="second")
+        self.assertEqual(self.bake(), (self.tasks[:4], self.tasks[4:]))
+        # E is staged with the package of D built by the first bake
+        self.assertEqual(self.package_filename("d"), d_package)
+        stamps = self.stamps()
+        for task in self.tasks:
+            if task.startswith("p:"):
+                self.assertNotEqual(stamps[task], first[task])
+            else:
+                self.assertEqual(stamps[task], first[task])
+        self.assertEqual(self.bake(), ([], []))
+
+    def test_changed_output(self):
+        self.assertEqual(self.bake(), (self.tasks, []))
+        first = self.stamps()
+        self.write_recipes(p_comment="second", output="1")
+        # The output of d:do_package is not changed, so the tasks
+        # after it are skipped
+        self.assertEqual(self.bake(), (self.tasks[:7], self.tasks[7:]))
+        self.assertEqual(self.bake(), ([], []))
+        # Back to the first output, so D is built with the metahashes
+        # of the first bake
+        self.write_recipes(p_comment="third", output="0")
+        self.assertEqual(self.bake(), (self.tasks[:7], self.tasks[7:]))
+        stamps = self.stamps()
+        for task in self.tasks[4:]:
+            self.assertEqual(stamps[task], first[task])
+        self.assertEqual(self.bake(), ([], []))
+
+    def test_changed_dependent(self):
+        self.assertEqual(self.bake(), (self.tasks, []))
+        self.write_recipes(p_comment="second", d_comment="second")
+        self.assertEqual(self.bake(), (self.tasks[:7], self.tasks[7:]))
+        self.assertEqual(self.bake(), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+from oebakery import die, err, warn, info, debug
+
+import os
+import fcntl
+import struct
+import termios
+
+
+class Jobserver:
+    """GNU make compatible jobserver, shared by all tasks in the oven.
+
+    The jobserver is a pipe holding a token (a byte) for each job
+    slot, except for the implicit slot of each make (or other
+    jobserver client) started.  Clients take a token from the pipe
+    before starting an extra job, and put it back when the job is
+    done.  The pipe is inherited by shell tasks, which are pointed to
+    it with MAKEFLAGS.
+
+    Tokens not put back (fx. by a make killed when a task fails) are
+    recovered by recover(), either when no tasks using the jobserver
+    are running, or when they are found to be missing from the pipe
+    without being held by the running tasks (see tokens_held()).
+
+    Arguments:
+    jobs -- total number of job slots
+    """
+
+    TOKEN = "+"
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.tokens = max(jobs - 1, 0)
+        (self.rfd, self.wfd) = os.pipe()
+        self.put(self.tokens)
+        self.recovered = 0
+        return
+
+    def makeflags(self):
+        """Return MAKEFLAGS for jobserver clients.  Both the
+        --jobserver-auth option of make 4.2 and newer, and the
+        --jobserver-fds option of older versions are given."""
+        return "-j --jobserver-fds=%d,%d --jobserver-auth=%d,%d"%(
+            self.rfd, self.wfd, self.rfd, self.wfd)
+
+    def available(self):
+        """Return number of tokens in the pipe."""
+        buf = fcntl.ioctl(self.rfd, termios.FIONREAD, struct.pack("i", 0))
+        return struct.unpack("i", buf)[0]
+
+    def missing(self):
+        """Return number of tokens not in the pipe, which is negative
+        if clients outliving their task put back more tokens than
+        taken since the last recover()."""
+        return self.tokens - self.available()
+
+    def in_use(self):
+        """Return number of tokens currently taken by clients."""
+        return max(self.missing(), 0)
+
+    def put(self, count):
+        while count > 0:
+            count -= os.write(self.wfd, self.TOKEN * count)
+        return
+
+    def recover(self, count=None):
+        """Put count leaked tokens back in the pipe.  Without count,
+        the number of tokens in the pipe is restored, which must only
+        be done when no jobserver clients are running.  Returns the
+        number of tokens recovered."""
+        if count is not None:
+            if count > 0:
+                warn("recovering %d leaked jobserver tokens"%(count))
+                self.put(count)
+                self.recovered += count
+            return max(count, 0)
+        missing = self.missing()
+        if missing > 0:
+            warn("recovering %d leaked jobserver tokens"%(missing))
+            self.put(missing)
+            self.recovered += missing
+        elif missing < 0:
+            # Tokens put back by clients outliving their task
+            os.read(self.rfd, -missing)
+        return max(missing, 0)
+
+    def close(self):
+        os.close(self.rfd)
+        os.close(self.wfd)
+        return
+
+
+# Jobserver clients, which hold a token for each job they run, except
+# for the job of their implicit slot
+CLIENTS = ("make", "gmake", "ninja")
+
+
+def tokens_held(tree, pid):
+    """Return the number of tokens held by the jobserver clients in
+    the process tree (as returned by oelite.sysload.process_tree())
+    rooted at pid, ie. the number of running child processes of each
+    client, except for the child of its implicit slot.  Tokens taken
+    just before a job is started, or put back just after it is reaped,
+    are not counted."""
+    (comms, children, rss) = tree
+    held = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        pid_children = children.get(pid, [])
+        if pid_children and comms.get(pid) in CLIENTS:
+            held += len(pid_children) - 1
+        pending.extend(pid_children)
+    return held
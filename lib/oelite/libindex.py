@@ -0,0 +1,207 @@
+from oebakery import die, err, warn, info, debug
+
+import os
+import re
+import stat
+
+# Maximum number of symlinks followed when resolving a path
+MAXSYMLINKS = 40
+
+ORIGIN_RE = re.compile(r"\$(ORIGIN\b|\{ORIGIN\})")
+
+
+class RootfsIndex:
+    """Index of the files in a root filesystem, for resolving the
+    shared libraries needed by the ELF files in it.
+
+    The index is built with a single walk of the root filesystem, and
+    holds the type (and symlink target) of each directory entry, so
+    that library lookups are dictionary lookups instead of file system
+    searches.  Symlinks are resolved inside the root filesystem, with
+    absolute symlink targets relative to the sysroot of the lookup.
+
+    The SONAMEs of the libraries are added with add_soname(), fx. when
+    reading the dynamic section of the libraries, and are used to
+    suggest the library providing a SONAME not found.
+
+    Arguments:
+    root -- root filesystem directory
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.dirs = {}
+        self.sonames = {}
+        self.resolved_dirs = {}
+        self.build()
+        return
+
+    def build(self):
+        """Walk the root filesystem, indexing all directory entries by
+        the directory path relative to root ("" for root itself)."""
+        self.dirs.clear()
+        self.resolved_dirs.clear()
+        pending = [""]
+        while pending:
+            reldir = pending.pop()
+            entries = {}
+            self.dirs[reldir] = entries
+            try:
+                names = os.listdir(os.path.join(self.root, reldir))
+            except OSError, e:
+                warn("cannot list %s: %s"%(
+                        os.path.join(self.root, reldir), e))
+                continue
+            for name in names:
+                relpath = os.path.join(reldir, name)
+                mode = os.lstat(os.path.join(self.root, relpath)).st_mode
+                if stat.S_ISLNK(mode):
+                    entries[name] = os.readlink(
+                        os.path.join(self.root, relpath))
+                else:
+                    entries[name] = mode
+                    if stat.S_ISDIR(mode):
+                        pending.append(relpath)
+        debug("indexed %d directories in %s"%(len(self.dirs), self.root))
+        return
+
+    def relpath(self, path):
+        """Return path (absolute, or relative to the current
+        directory) relative to root, or None if it is not in root."""
+        path = os.path.abspath(path)
+        if path == self.root:
+            return ""
+        if not path.startswith(self.root + "/"):
+            return None
+        return path[len(self.root) + 1:]
+
+    def resolve(self, path, sysroot="", follow=True):
+        """Resolve path (relative to root) in the index, following
+        symlinks, and return the resolved path, or None if it does not
+        exist.  The last component is only followed if follow is
+        True."""
+        parts = []
+        pending = self._split(path)
+        symlinks = 0
+        while pending:
+            name = pending.pop(0)
+            if name == "..":
+                if parts:
+                    parts.pop()
+                continue
+            entries = self.dirs.get("/".join(parts))
+            if entries is None or not name in entries:
+                return None
+            entry = entries[name]
+            if (isinstance(entry, basestring) and (pending or follow)):
+                symlinks += 1
+                if symlinks > MAXSYMLINKS:
+                    return None
+                if entry.startswith("/"):
+                    parts = self._split(sysroot)
+                pending = self._split(entry) + pending
+                continue
+            parts.append(name)
+        return "/".join(parts)
+
+    @staticmethod
+    def _split(path):
+        return [part for part in path.split("/") if part and part != "."]
+
+    def exists(self, path, sysroot=""):
+        """Return True if path (relative to root) exists.  Like
+        os.path.lexists, a dangling symlink is found."""
+        return self.resolve(path, sysroot, follow=False) is not None
+
+    def isdir(self, path, sysroot=""):
+        return self.resolve_dir(path, sysroot) is not None
+
+    def resolve_dir(self, path, sysroot=""):
+        """Return the resolved path of the directory path (relative to
+        root), or None if it is not a directory.  Resolved directories
+        are cached, as the same library directories are resolved for
+        all lookups."""
+        try:
+            return self.resolved_dirs[(path, sysroot)]
+        except KeyError:
+            pass
+        reldir = self.resolve(path, sysroot)
+        if not reldir in self.dirs:
+            reldir = None
+        self.resolved_dirs[(path, sysroot)] = reldir
+        return reldir
+
+    def files(self, path, sysroot=""):
+        """Return list of the paths (relative to root) of the regular
+        files in the directory path, not including hidden files."""
+        reldir = self.resolve_dir(path, sysroot)
+        if reldir is None:
+            return []
+        entries = self.dirs[reldir]
+        return [os.path.join(path, name)
+                for (name, entry) in sorted(entries.iteritems())
+                if not name.startswith(".") and
+                not isinstance(entry, basestring) and stat.S_ISREG(entry)]
+
+    def add_soname(self, soname, path, sysroot=""):
+        self.sonames.setdefault((sysroot, soname), []).append(path)
+        return
+
+    def soname_providers(self, soname, sysroot=""):
+        """Return list of paths (relative to root) of the libraries
+        with soname added with add_soname()."""
+        return self.sonames.get((sysroot, soname), [])
+
+    def search_dirs(self, elffile, lib_dirs, rpath=None, runpath=None,
+                    sysroot=""):
+        """Return list of directories (relative to root) searched for
+        the libraries needed by elffile, in the order of the dynamic
+        linker: DT_RPATH (unless DT_RUNPATH is set), DT_RUNPATH, and
+        lib_dirs.  The RPATH and RUNPATH directories are relative to
+        sysroot, with $ORIGIN replaced by the directory of elffile.
+
+        Arguments:
+        elffile -- path of the ELF file relative to root
+        lib_dirs -- default library directories, absolute, or relative
+                    to the current directory
+        rpath -- DT_RPATH of elffile, or None
+        runpath -- DT_RUNPATH of elffile, or None
+        sysroot -- path of the sysroot of elffile, relative to root
+        """
+        dirs = []
+        origin = "/" + os.path.dirname(self.resolve(elffile, sysroot) or
+                                       elffile)
+        if sysroot:
+            origin = origin[len(sysroot.rstrip("/")) + 1:] or "/"
+        for path in (runpath is None and rpath or None, runpath):
+            if not path:
+                continue
+            for path_dir in path.split(":"):
+                path_dir = ORIGIN_RE.sub(origin, path_dir)
+                dirs.append(os.path.join(sysroot, path_dir.lstrip("/")))
+        for lib_dir in lib_dirs:
+            reldir = self.relpath(lib_dir)
+            if reldir is None:
+                # Not in root, so searched in the file system
+                reldir = os.path.abspath(lib_dir)
+            dirs.append(reldir)
+        return dirs
+
+    def lookup(self, lib, dirs, sysroot=""):
+        """Return path (relative to root) of the first lib found in
+        dirs (relative to root, or absolute paths outside root), or
+        None if not found."""
+        if "/" in lib:
+            path = os.path.join(sysroot, lib.lstrip("/"))
+            if self.exists(path, sysroot):
+                return path
+            return None
+        for libdir in dirs:
+            if os.path.isabs(libdir):
+                if os.path.lexists(os.path.join(libdir, lib)):
+                    return os.path.join(libdir, lib)
+                continue
+            reldir = self.resolve_dir(libdir, sysroot)
+            if reldir is not None and lib in self.dirs[reldir]:
+                return os.path.join(libdir, lib)
+        return None
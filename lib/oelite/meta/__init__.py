@@ -6,14 +6,14 @@ OVERRIDES_EXPANSION = 4
 
 from oelite.meta.meta import MetaData, ExpansionError
 from oelite.meta.dict import DictMeta
-from oelite.meta.cache import MetaCache
+from oelite.meta.cache import MetaCache, MetaCacheArchive
 
 __all__ = [
     "NO_EXPANSION", "FULL_EXPANSION", "PARTIAL_EXPANSION", "CLEAN_EXPANSION",
     "OVERRIDES_EXPANSION",
     "MetaData", "ExpansionError",
     "DictMeta",
-    "MetaCache", 
+    "MetaCache", "MetaCacheArchive",
     ]
 
 
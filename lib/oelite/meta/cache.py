@@ -8,6 +8,8 @@ import oelite.path
 
 import os
 import cPickle
+import mmap
+import struct
 
 class MetaCache:
 
@@ -56,27 +58,11 @@ class MetaCache:
         if not self.mtimes:
             warn("Cachefile (%s) with no file(s) reference(s) loaded, broken cache generation?"%(self.cachefile))
             return False
-        for (fn, oepath, old_mtime) in list(self.mtimes):
-            if oepath is not None:
-                filepath = oelite.path.which(oepath, fn)
-            else:
-                filepath = fn
-            if os.path.exists(filepath):
-                cur_mtime = os.path.getmtime(filepath)
-            else:
-                cur_mtime = None
-            if cur_mtime != old_mtime:
-                return False
-        return True
+        return mtimes_current(self.mtimes)
 
 
     def load(self, filename, cookbook):
-        recipes = {}
-        for i in xrange(cPickle.load(self.file)):
-            recipe = oelite.recipe.unpickle(
-                self.file, filename, cookbook)
-            recipes[recipe.type] = recipe
-        return recipes
+        return load_recipes(self.file, filename, cookbook)
 
 
     def __repr__(self):
@@ -87,6 +73,247 @@ class MetaCache:
         return self.meta.keys().__iter__()
 
 
+class MetaCacheArchive:
+
+    """Metadata cache for all recipe files, kept in a single file.
+
+    The archive file starts with a fixed size header, pointing to a
+    pickled index.  The index holds the pickle ABI and environment
+    signature the archive was created with, and maps each recipe
+    filename to the offset and length of its pickled recipes, the
+    input file mtimes used for checking that it is still current, and
+    the recipe summaries (see OEliteRecipe.summary) used by the lazy
+    cookbook mode.
+
+    The archive is mmap'ed when opened, so only the recipes actually
+    loaded are read and unpickled.  New entries are appended to the
+    file, and a new index is written by commit().  When stale entries
+    take up more than half of the file, it is compacted into a new
+    file instead.
+    """
+
+    MAGIC = "OELMCA01"
+    HEADER = struct.Struct("<8sQQ")
+
+    def __init__(self, filename, baker):
+        self.filename = filename
+        self.abi = pickle_abi()
+        self.env_signature = baker.config.env_signature()
+        self.map = None
+        self.file = None
+        self.entries = {}
+        # recipefile -> (offset, length, mtimes, summary) of the
+        # entries to write to the index on commit
+        self.index = {}
+        self.dirty = False
+        try:
+            self.open()
+        except Exception, e:
+            print "Ignoring bad metadata cache archive:", filename, e
+            self.entries = {}
+        return
+
+
+    def open(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.HEADER.size:
+                return
+            self.map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        (magic, index_offset, index_length) = self.HEADER.unpack(
+            self.map[:self.HEADER.size])
+        if magic != self.MAGIC:
+            raise Exception("bad magic")
+        if not index_offset:
+            return
+        index = cPickle.loads(
+            self.map[index_offset:index_offset + index_length])
+        if (index["abi"] != self.abi or
+            index["env_signature"] != self.env_signature):
+            return
+        for recipefile, (offset, length, mtimes, summary) in \
+                index["entries"].iteritems():
+            self.entries[recipefile] = MetaCacheArchiveEntry(
+                self, recipefile, offset, length, mtimes, summary)
+        return
+
+
+    def __repr__(self):
+        return '%s(%r)'%(self.__class__.__name__, self.filename)
+
+
+    def __contains__(self, recipefile):
+        return recipefile in self.entries
+
+
+    def get(self, recipefile):
+        """Return archive entry for recipefile, or None.
+
+        The entry is kept in the archive on commit, unless it is
+        replaced with add() or dropped with remove() first.
+        """
+        try:
+            entry = self.entries[recipefile]
+        except KeyError:
+            return None
+        self.index[recipefile] = (entry.offset, entry.length, entry.mtimes,
+                                  entry.summary)
+        return entry
+
+
+    def add(self, recipefile, recipes):
+        mtimes = set()
+        for type in recipes:
+            for mtime in recipes[type].meta.get_input_mtimes():
+                mtimes.add(mtime)
+        f = self.appendfile()
+        offset = f.tell()
+        cPickle.dump(len(recipes), f, 2)
+        for type in recipes:
+            recipes[type].pickle(f)
+        self.index[recipefile] = (offset, f.tell() - offset, mtimes, None)
+        self.dirty = True
+        return
+
+
+    def set_summary(self, recipefile, summary):
+        """Set recipe summaries of entry, as a dict of recipe type ->
+        summary."""
+        if not recipefile in self.index:
+            return
+        entry = self.index[recipefile]
+        if entry[3] == summary:
+            return
+        self.index[recipefile] = entry[:3] + (summary,)
+        self.dirty = True
+        return
+
+
+    def remove(self, recipefile):
+        if recipefile in self.index:
+            del self.index[recipefile]
+            self.dirty = True
+        return
+
+
+    def appendfile(self):
+        if self.file is not None:
+            return self.file
+        if self.map is not None and self.entries:
+            self.file = open(self.filename, "r+b")
+            self.file.seek(0, os.SEEK_END)
+            return self.file
+        # Start a new archive file.  The old file is unlinked rather
+        # than truncated, as it may still be mapped.
+        if os.path.exists(self.filename):
+            os.unlink(self.filename)
+        oelite.util.makedirs(os.path.dirname(self.filename))
+        self.file = open(self.filename, "w+b")
+        self.file.write(self.HEADER.pack(self.MAGIC, 0, 0))
+        return self.file
+
+
+    def commit(self):
+        if not self.dirty and set(self.index) == set(self.entries):
+            return
+        f = self.appendfile()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        live = sum([entry[1] for entry in self.index.itervalues()])
+        if live * 2 < size - self.HEADER.size:
+            f.close()
+            self.file = None
+            return self.compact()
+        self.write_index(f)
+        f.close()
+        self.file = None
+        return
+
+
+    def compact(self):
+        tmpfile = "%s.%d"%(self.filename, os.getpid())
+        index = {}
+        with open(self.filename, "rb") as src:
+            with open(tmpfile, "wb") as dst:
+                dst.write(self.HEADER.pack(self.MAGIC, 0, 0))
+                for recipefile, (offset, length, mtimes, summary) in \
+                        self.index.iteritems():
+                    src.seek(offset)
+                    index[recipefile] = (dst.tell(), length, mtimes, summary)
+                    dst.write(src.read(length))
+                self.index = index
+                self.write_index(dst)
+        os.rename(tmpfile, self.filename)
+        return
+
+
+    def write_index(self, f):
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        cPickle.dump({ "abi": self.abi,
+                       "env_signature": self.env_signature,
+                       "entries": self.index }, f, 2)
+        length = f.tell() - offset
+        f.flush()
+        f.seek(0)
+        f.write(self.HEADER.pack(self.MAGIC, offset, length))
+        return
+
+
+class MetaCacheArchiveEntry:
+
+    def __init__(self, archive, recipefile, offset, length, mtimes, summary):
+        self.archive = archive
+        self.recipefile = recipefile
+        self.offset = offset
+        self.length = length
+        self.mtimes = mtimes
+        self.summary = summary
+        return
+
+
+    def __repr__(self):
+        return '%s(%r)'%(self.__class__.__name__, self.recipefile)
+
+
+    def is_current(self, baker):
+        if not isinstance(self.mtimes, set) or not self.mtimes:
+            return False
+        return mtimes_current(self.mtimes)
+
+
+    def load(self, filename, cookbook):
+        self.archive.map.seek(self.offset)
+        return load_recipes(self.archive.map, filename, cookbook)
+
+
+def mtimes_current(mtimes):
+    for (fn, oepath, old_mtime) in list(mtimes):
+        if oepath is not None:
+            filepath = oelite.path.which(oepath, fn)
+        elif oelite.path.exists(fn):
+            filepath = fn
+        else:
+            filepath = None
+        if filepath:
+            cur_mtime = os.path.getmtime(filepath)
+        else:
+            cur_mtime = None
+        if cur_mtime != old_mtime:
+            return False
+    return True
+
+
+def load_recipes(file, filename, cookbook):
+    recipes = {}
+    for i in xrange(cPickle.load(file)):
+        recipe = oelite.recipe.unpickle(file, filename, cookbook)
+        recipes[recipe.type] = recipe
+    return recipes
+
+
 PICKLE_ABI = None
 
 PICKLE_ABI_MODULES = [
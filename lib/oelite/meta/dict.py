@@ -9,6 +9,7 @@ import cPickle
 import operator
 import types
 import os
+import mmap
 import oelite.profiling
 
 def deepcopy_str(x, memo):
@@ -48,7 +49,7 @@ class DictMeta(MetaData):
 
     @oelite.profiling.profile_calls
     def __init__(self, meta=None):
-        if isinstance(meta, file):
+        if isinstance(meta, (file, mmap.mmap)):
             self.smpl = copy.deepcopy(cPickle.load(meta))
             self.cplx = copy.deepcopy(cPickle.load(meta))
             self.expand_cache = copy.deepcopy(cPickle.load(meta))
@@ -73,6 +74,33 @@ class DictMeta(MetaData):
     def copy(self):
         return DictMeta(meta=self)
 
+    def project(self, vars):
+        """Return a copy of the metadata with only the given
+        variables."""
+        meta = DictMeta()
+        smpl = {}
+        cplx = {}
+        for var in vars:
+            if var in self.smpl:
+                smpl[var] = self.smpl[var]
+            elif var in self.cplx:
+                cplx[var] = self.cplx[var]
+            else:
+                continue
+            try:
+                meta.expand_cache[var] = self.expand_cache[var]
+            except KeyError:
+                pass
+        meta.smpl = copy.deepcopy(smpl)
+        meta.cplx = copy.deepcopy(cplx)
+        for i in range(len(self.__flag_index)):
+            flag_index = self.__flag_index[i]
+            if flag_index:
+                flag_index = flag_index.intersection(
+                    meta.smpl.viewkeys() | meta.cplx.viewkeys())
+                meta.__flag_index[i] = flag_index or None
+        return meta
+
     def trim(self):
         self.smpl = oelite.dicttrim.trim(self.smpl)
         self.cplx = oelite.dicttrim.trim(self.cplx)
@@ -102,12 +130,15 @@ class DictMeta(MetaData):
         if var in self.cplx:
             self.cplx[var][""] = val
         else:
+            if not var in self.smpl:
+                self.emit_index = None
             self.smpl[var] = val
         self.trim_expand_cache(var)
         return
 
 
     def trim_expand_cache(self, var):
+        self.environ = None
         for (cached_var, (cached_val, deps)) in self.expand_cache.items():
             if cached_var == var or (deps and var in deps):
                 # FIXME: is it safe to delete from the dict we are iterating ?
@@ -134,6 +165,16 @@ class DictMeta(MetaData):
                 # Carry over the simple value
                 self.cplx[var][""] = self.smpl[var]
                 del self.smpl[var]
+            else:
+                self.emit_index = None
+
+        if flag in ("export", "unexport"):
+            self.environ = None
+        elif flag == "defaultval":
+            # The value of var (and the environment) unless var is set
+            self.trim_expand_cache(var)
+        elif flag == "emit":
+            self.emit_index = None
 
         try:
             fidx = self.INDEXED_FLAGS[flag]
@@ -171,6 +212,8 @@ class DictMeta(MetaData):
         else:
             olist = [None, None, None]
             self.cplx[var] = {"__overrides": olist}
+            if not var in self.smpl:
+                self.emit_index = None
 
         if olist[otype] is None:
             olist[otype] = {}
@@ -373,6 +416,8 @@ class DictMeta(MetaData):
 
     def del_var(self, var):
         #print "del_var %s"%(var)
+        self.environ = None
+        self.emit_index = None
         for s in self.__flag_index:
             if s:
                 s.discard(var)
@@ -567,7 +612,7 @@ class DictMeta(MetaData):
                     mtime = os.path.getmtime(f)
                 else:
                     mtime = None
-            elif os.path.exists(fn):
+            elif oelite.path.exists(fn):
                 mtime = os.path.getmtime(fn)
             else:
                 mtime = None
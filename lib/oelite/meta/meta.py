@@ -60,6 +60,16 @@ class ExpansionStack:
 pythonfunc_code_cache = {}
 
 
+class Environ(dict):
+    """Read-only dict of exported environment variables."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("%s is read-only"%(self.__class__.__name__))
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
 OE_ENV_WHITELIST = [
     "PATH",
     "PWD",
@@ -84,6 +94,8 @@ class MetaData(MutableMapping):
         self.pythonfunc_init()
         self.expand_stack = ExpansionStack()
         self._signature = None
+        self.environ = None
+        self.emit_index = None
         return
 
     def import_dict(self, d):
@@ -472,6 +484,33 @@ class MetaData(MutableMapping):
             self.dump_var(key, o, pretty, dynvars, flags, ignore_flags_re)
 
 
+    def get_environ(self):
+        """Return the exported environment, as an Environ dict of
+        environment variable name -> value.
+
+        The environment is computed once, and shared by Python
+        functions (which apply it to os.environ) and shell functions
+        (which export it in the run file).  It is recomputed if
+        variables are changed.
+        """
+        if self.environ is not None:
+            return self.environ
+        environ = {}
+        for var in self.get_vars(flag="export"):
+            if self.get_flag(var, "unexport"):
+                continue
+            val = self.get(var)
+            if val is None:
+                val = ""
+            if not isinstance(val, basestring):
+                continue
+            if var == "LD_LIBRARY_PATH":
+                var = (self.get("LD_LIBRARY_PATH_VAR")
+                       or "LD_LIBRARY_PATH")
+            environ[var] = val
+        self.environ = Environ(environ)
+        return self.environ
+
     def get_function(self, name):
         if not name in self or not self.get(name):
             return oelite.function.NoopFunction(self, name)
@@ -481,7 +520,9 @@ class MetaData(MutableMapping):
             return oelite.function.ShellFunction(self, name)
 
     @oelite.profiling.profile_calls
-    def signature(self, ignore_flags_re=re.compile("|".join(("__", "emit$", "filename$", "lineno$"))),
+    def signature(self, ignore_flags_re=re.compile("|".join((
+                "__", "emit$", "filename$", "lineno$", "weight$", "memory$",
+                "nojobserver$"))),
                   force=False, dump=None):
         import hashlib
 
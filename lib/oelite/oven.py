@@ -9,6 +9,10 @@ import oelite.arch
 import oelite.parse
 import oelite.task
 import oelite.item
+import oelite.sysload
+import oelite.schedule
+import oelite.jobserver
+import oelite.hashequiv
 from oelite.parse import *
 from oelite.cookbook import CookBook
 
@@ -33,10 +37,60 @@ class OEliteOven:
             else:
                 capacity = int(pmake.replace("-j", "")) + 2
         self.capacity = capacity
+        self.max_capacity = capacity
         self.baker = baker
+        self.load_aware = baker.config.get("OVEN_LOAD_AWARE") == "1"
+        self.cpus = oelite.sysload.cpu_count()
+        memory_per_job = baker.config.get("OVEN_MEMORY_PER_JOB")
+        if memory_per_job:
+            self.memory_per_job = oelite.sysload.parse_size(memory_per_job)
+        else:
+            self.memory_per_job = None
+        self.load_samples = []
+        memory_limit = baker.config.get("OVEN_MEMORY_LIMIT")
+        if memory_limit:
+            self.memory_limit = oelite.sysload.parse_size(memory_limit)
+        else:
+            self.memory_limit = None
+        self.memory = 0
+        self.held = None
+        min_free_space = baker.config.get("OVEN_MIN_FREE_SPACE")
+        if min_free_space:
+            self.min_free_space = oelite.sysload.parse_size(min_free_space)
+        else:
+            self.min_free_space = None
+        self.tmpdir = baker.config.get("TMPDIR")
+        self.task_memory = oelite.schedule.TaskMemory(
+            baker.config.get("TASK_MEMORY"))
+        if baker.config.get("OVEN_JOBSERVER") == "1":
+            jobs = baker.config.get("OVEN_JOBSERVER_JOBS")
+            if jobs:
+                jobs = int(jobs)
+            else:
+                jobs = self.cpus
+            self.jobserver = oelite.jobserver.Jobserver(jobs)
+        else:
+            self.jobserver = None
+        # Samples of the tokens held by the baking tasks using the
+        # jobserver: task -> [samples, sum, max]
+        self.jobserver_usage = {}
+        # The process trees of the baking tasks are sampled while
+        # waiting for them, if /proc is available
+        self.sampling = os.path.isdir("/proc/self")
+        self.sampled = 0
+        # Tokens possibly leaked by failed jobserver tasks (ie. the
+        # tokens missing from the pipe when they failed), and the
+        # tokens found leaked by the previous sample (or None)
+        self.jobserver_suspect = 0
+        self.jobserver_leaked = None
+        self.jobserver_stats = []
+        # Timeline lane (trace event thread id) of each baking task
+        self.lanes = {}
+        self.max_lane = 0
         self.starttime = dict()
         self.completed_tasks = []
         self.failed_tasks = []
+        self.skipped_tasks = []
         self.total = baker.runq.number_of_tasks_to_build()
         self.count = 0
         self.task_stat = dict()
@@ -66,23 +120,274 @@ class OEliteOven:
             stat = self.task_stat[task.name] = oelite.profiling.SimpleStats()
         stat.append(delta)
 
+    def available(self):
+        """Return the capacity available for starting new tasks.
+
+        When OVEN_LOAD_AWARE is enabled, the capacity is further
+        limited by the system load not caused by tasks in the oven.
+        When the oven is empty, at least one task can always be
+        started.
+        """
+        if self.wait_reclaim():
+            return 0
+        if not self.load_aware:
+            return self.capacity
+        load = oelite.sysload.loadavg()
+        if load is None:
+            return self.capacity
+        # The load average includes the tasks in the oven (but lags
+        # behind), so only the load exceeding what is baking is
+        # attributed to others.
+        baking = self.max_capacity - self.capacity
+        external = max(0.0, load - baking)
+        available = min(self.capacity,
+                        int(self.cpus + 2 - external) - baking)
+        if available < 1 and not self.starttime:
+            return 1
+        return available
+
+    def wait_reclaim(self):
+        """Return True if no tasks should be started until rmwork has
+        reclaimed more disk space, ie. if the free space in TMPDIR is
+        below OVEN_MIN_FREE_SPACE, and the trash entries pending
+        (unless measured to be too small) can bring it above.  With
+        nothing baking, wait here for the space to be reclaimed."""
+        reclaimer = self.baker.reclaimer
+        if self.min_free_space is None or reclaimer is None:
+            return False
+        waiting = False
+        while True:
+            free = oelite.sysload.disk_free(self.tmpdir)
+            if free is None or free >= self.min_free_space:
+                break
+            reclaimer.poll()
+            (pending, unmeasured) = reclaimer.pending_bytes()
+            if not unmeasured and free + pending < self.min_free_space:
+                # Waiting for the reclaimer does not help
+                break
+            if self.starttime:
+                return True
+            if not waiting:
+                info("waiting for rmwork to free disk space (%d MiB free)"%(
+                        free >> 20))
+                waiting = True
+            time.sleep(1)
+        return False
+
+    def parallel_jobs(self, task):
+        """Return number of jobs to give a parallel task, based on the
+        currently available capacity and memory, and at most the
+        configured PARALLEL_MAKE."""
+        jobs = min(task.weight, max(1, self.available()))
+        if self.memory_per_job:
+            memavail = oelite.sysload.memavail()
+            if memavail is not None:
+                jobs = min(jobs, max(1, memavail // self.memory_per_job))
+        return jobs
+
+    def memory_estimate(self, task):
+        """Return expected memory usage of task, from the memory task
+        flag, or the peak memory usage of the task in previous
+        builds."""
+        try:
+            return task.memory
+        except AttributeError:
+            pass
+        memory = task.get_memory(task.meta())
+        if memory is None:
+            memory = int(self.task_memory.estimate(task))
+        task.memory = memory
+        return memory
+
+    def admits(self, task, reserved=0):
+        if self.memory_limit is None or not self.starttime:
+            return True
+        return (self.memory + reserved + self.memory_estimate(task)
+                <= self.memory_limit)
+
+    def next_task(self, pending):
+        """Pop and return the next task from pending that can be
+        started within OVEN_MEMORY_LIMIT, or None.
+
+        The first task that does not fit is held back, and its memory
+        is reserved, so that other tasks are only started if they fit
+        together with it.  As tasks in the oven finish, the held task
+        is then guaranteed to fit eventually, and is not starved by
+        smaller tasks.
+        """
+        if self.held is not None:
+            if self.admits(self.held):
+                task = self.held
+                self.held = None
+                return task
+            reserved = self.memory_estimate(self.held)
+        else:
+            reserved = 0
+        task = None
+        deferred = []
+        while pending:
+            candidate = pending.pop()
+            if self.admits(candidate, reserved):
+                task = candidate
+                break
+            if self.held is None:
+                debug("holding back %s: needs %d bytes"%(
+                        candidate, self.memory_estimate(candidate)))
+                self.held = candidate
+                reserved = self.memory_estimate(candidate)
+            else:
+                deferred.append(candidate)
+        for candidate in deferred:
+            pending.push(candidate)
+        return task
+
     def add(self, task):
         self.capacity -= task.weight
+        if self.memory_limit is not None:
+            self.memory += self.memory_estimate(task)
         self.starttime[task] = oelite.util.now()
+        lane = 1
+        used = set(self.lanes.values())
+        while lane in used:
+            lane += 1
+        if lane > self.max_lane:
+            oelite.profiling.trace_event_thread_name(lane, "oven %d"%(lane))
+            self.max_lane = lane
+        self.lanes[task] = lane
+        self.trace_capacity(self.starttime[task])
 
     def remove(self, task):
         now = oelite.util.now()
         delta = now - self.starttime[task]
+        self.trace_task(task, self.starttime[task], now)
         del self.starttime[task]
+        del self.lanes[task]
         self.capacity += task.weight
+        if self.memory_limit is not None:
+            self.memory -= self.memory_estimate(task)
+        if task in self.jobserver_usage:
+            self.remove_jobserver_task(task, delta)
         self.update_task_stat(task, delta)
+        self.trace_capacity(now)
         return delta
 
+    def sample(self, force=False):
+        """Sample the process trees of the baking tasks, at most once a
+        second (unless force is True), for the peak memory usage of
+        each task and the tokens held by each task using the
+        jobserver, and recover leaked tokens after a task failed."""
+        if self.jobserver_usage:
+            oelite.profiling.trace_event_counter(
+                "jobserver", { "tokens in use": self.jobserver.in_use() })
+        now = oelite.util.now()
+        if not force and now - self.sampled < 1.0:
+            return
+        self.sampled = now
+        tree = oelite.sysload.process_tree()
+        if tree is None:
+            return
+        held = 0
+        for task in self:
+            pid = task.pid()
+            if pid is None:
+                continue
+            task.peak_rss = max(task.peak_rss,
+                                oelite.sysload.tree_rss(tree, pid))
+            usage = self.jobserver_usage.get(task)
+            if usage is None:
+                continue
+            task_held = oelite.jobserver.tokens_held(tree, pid)
+            usage[0] += 1
+            usage[1] += task_held
+            usage[2] = max(usage[2], task_held)
+            held += task_held
+        if self.jobserver_suspect > 0:
+            # Tokens missing from the pipe and not held by the running
+            # tasks are leaked.  They are only recovered when found by
+            # two samples in a row, as a client takes a token just
+            # before starting a job, and puts it back just after it.
+            leaked = min(self.jobserver.missing() - held,
+                         self.jobserver_suspect)
+            if self.jobserver_leaked is not None:
+                recovered = self.jobserver.recover(
+                    min(leaked, self.jobserver_leaked))
+                self.jobserver_suspect -= recovered
+                leaked -= recovered
+            self.jobserver_leaked = leaked
+        return
+
+    def remove_jobserver_task(self, task, delta):
+        (samples, total, peak) = self.jobserver_usage.pop(task)
+        if not self.jobserver_usage:
+            # No jobserver clients running, so all tokens not in the
+            # pipe are leaked
+            self.jobserver.recover()
+            self.jobserver_suspect = 0
+            self.jobserver_leaked = None
+        elif not task.result:
+            # The clients of a failed task may have been killed while
+            # holding tokens, which must be among the tokens missing
+            # from the pipe now
+            self.jobserver_suspect = self.jobserver.in_use()
+            self.jobserver_leaked = None
+            self.sample(force=True)
+        if samples:
+            mean = float(total) / samples
+        else:
+            mean = 0.0
+        self.jobserver_stats.append((task, delta, samples, mean, peak))
+        return
+
+    def trace_capacity(self, now):
+        values = { "baking": self.max_capacity - self.capacity,
+                   "free": max(self.capacity, 0) }
+        if self.memory_limit is not None:
+            values["memory"] = self.memory
+        oelite.profiling.trace_event_counter("oven capacity", values, now)
+
+    def trace_task(self, task, start, end):
+        lane = self.lanes[task]
+        args = { "weight": task.weight }
+        if task.maxrss:
+            args["maxrss"] = task.maxrss
+        if task.peak_rss:
+            args["peak rss"] = task.peak_rss
+        oelite.profiling.trace_event_span(
+            str(task), start, end, lane, "task", args)
+        func_start = getattr(task, "func_start", None)
+        if func_start is None or func_start < start:
+            return
+        prefunc_time = getattr(task, "prefunc_time", 0.0)
+        if prefunc_time >= 0.001:
+            oelite.profiling.trace_event_span(
+                "prefuncs", func_start - prefunc_time, func_start, lane,
+                "func")
+        func_time = getattr(task, "func_time", None)
+        if func_time is None:
+            return
+        oelite.profiling.trace_event_span(
+            task.name, func_start, func_start + func_time, lane, "func")
+        postfunc_time = getattr(task, "postfunc_time", None)
+        if postfunc_time is None or postfunc_time < 0.001:
+            return
+        oelite.profiling.trace_event_span(
+            "postfuncs", func_start + func_time,
+            func_start + func_time + postfunc_time, lane, "func")
+
     def start(self, task):
         self.count += 1
         debug("")
         debug("Preparing %s"%(task))
         task.prepare()
+        if self.jobserver and task.uses_jobserver(task.meta()):
+            task.set_jobserver(self.jobserver.makeflags())
+            self.jobserver_usage[task] = [0, 0, 0]
+        elif self.load_aware and task.is_parallel(task.meta()):
+            task.set_parallel_jobs(self.parallel_jobs(task))
+        if self.load_aware:
+            self.load_samples.append(
+                (oelite.util.now(), task, oelite.sysload.loadavg(),
+                 oelite.sysload.memavail(), self.capacity, task.weight))
         info("%s started - %d / %d "%(task, self.count, self.total))
         task.build_started()
 
@@ -108,6 +413,16 @@ class OEliteOven:
             task.build_done(self.baker.runq.get_task_buildhash(task))
             self.baker.runq.mark_done(task)
             self.completed_tasks.append(task)
+            # maxrss is the peak of the largest single process of the
+            # task, so use the sampled peak of the whole process tree
+            # when larger (fx. for parallel make jobs)
+            memory = max(task.maxrss or 0, task.peak_rss)
+            if memory:
+                self.task_memory.add(task, memory)
+            outhash = None
+            if task.name == "do_package" and self.baker.hashequiv:
+                outhash = oelite.hashequiv.package_output_hash(task.meta())
+            self.baker.taskhashes.task_built(task, outhash)
         else:
             err("%s failed - %.3f s" % (task, delta))
             self.failed_tasks.append(task)
@@ -115,10 +430,36 @@ class OEliteOven:
             # If any task for a recipe fails, ensure that we don't do rmwork.
             task.recipe.rmwork = False
 
+        self.recipe_task_done(task)
+        return (task, result, delta)
+
+    def skip(self, task):
+        """Skip a task planned to be built, which is already built with
+        the metahash it got when it became ready to build (see
+        baker.rehash_task).  The stamp is written again, so that the
+        task is not retired by the do_package tasks built before it."""
+        self.count += 1
+        info("%s skipped, equivalent to earlier build - %d / %d"%(
+                task, self.count, self.total))
+        task.build_done(self.baker.runq.get_task_buildhash(task))
+        self.baker.runq.mark_done(task)
+        self.skipped_tasks.append(task)
+        task.recipe.remaining_tasks -= 1
+        self.recipe_task_done(task)
+        return
+
+    def recipe_task_done(self, task):
         if task.recipe.remaining_tasks == 0:
+            task.recipe.stop_faked_session()
             task.recipe.do_rmwork()
-
-        return (task, result, delta)
+        reclaimer = self.baker.reclaimer
+        if reclaimer:
+            reclaimer.poll()
+            (pending, unmeasured) = reclaimer.pending_bytes()
+            oelite.profiling.trace_event_counter(
+                "rmwork", { "pending bytes": pending,
+                            "unmeasured entries": unmeasured })
+        return
 
     def wait_any(self, poll):
         """Wait for any task currently in the oven to finish. Returns triple
@@ -127,8 +468,11 @@ class OEliteOven:
         """
         if not poll and len(self) == 0:
             raise Exception("nothing in the oven, so you'd wait forever...")
+        self.sample()
         tasks = self.currently_baking()
-        if not poll and len(tasks) == 1:
+        # The tasks are sampled while polling, so only block waiting
+        # for a single task when they cannot be sampled.
+        if not poll and len(tasks) == 1 and not self.sampling:
             t = tasks[0]
             if self.stdout_isatty:
                 now = oelite.util.now()
@@ -143,6 +487,7 @@ class OEliteOven:
                     return result
             if poll:
                 break
+            self.sample()
             i += 1
             if i == 4 and self.stdout_isatty:
                 info("waiting for any of these to finish:")
@@ -173,6 +518,25 @@ class OEliteOven:
 
         with oelite.profiling.profile_output("task_times.txt") as f:
             for task in self.completed_tasks:
-                f.write("%s\t%.3f\t%.3f\t%.3f\t%.3f\n" %
-                        (task, task.task_time, task.prefunc_time, task.func_time, task.postfunc_time))
+                f.write("%s\t%.3f\t%.3f\t%.3f\t%.3f\t%d\t%d\n" %
+                        (task, task.task_time, task.prefunc_time, task.func_time, task.postfunc_time,
+                         task.weight, task.maxrss or 0))
+
+        if self.load_samples:
+            with oelite.profiling.profile_output("oven_load.txt") as f:
+                for (timestamp, task, load, memavail, capacity, weight) in \
+                        self.load_samples:
+                    f.write("%.3f\t%s\t%s\t%s\t%d\t%d\n" %
+                            (timestamp, task, load, memavail, capacity, weight))
+
+        if self.jobserver:
+            with oelite.profiling.profile_output("jobserver.txt") as f:
+                f.write("# jobs: %d, tokens recovered: %d\n" %
+                        (self.jobserver.jobs, self.jobserver.recovered))
+                f.write("# task, time, samples, mean and max tokens "
+                        "held by the make jobs of the task\n")
+                for (task, delta, samples, mean, peak) in \
+                        self.jobserver_stats:
+                    f.write("%s\t%.3f\t%d\t%.2f\t%d\n" %
+                            (task, delta, samples, mean, peak))
 
@@ -3,28 +3,29 @@ from oebakery import die, err, warn, info, debug
 import oelite.meta
 
 
+def package_priority(recipe, name):
+    layer_priority = recipe.meta.get('LAYER_PRIORITY_%s'%(name))
+    if layer_priority is not None:
+        layer_priority = int(layer_priority)
+    else:
+        layer_priority = recipe.layer_priority
+    priority = recipe.meta.get('PRIORITY_%s'%(name))
+    if priority is None:
+        priority = recipe.meta.get('PRIORITY')
+    priority = int(priority)
+    return layer_priority + recipe.priority_baseline + priority
+
+
 class OElitePackage:
 
-    def __init__(self, id, name, type, arch, recipe):
+    def __init__(self, id, name, type, arch, recipe, priority):
         self.id = id
         self.name = name
         self.type = type
         self.arch = arch
         self.recipe = recipe
-        layer_priority = recipe.meta.get('LAYER_PRIORITY_%s'%(self.name))
-        if layer_priority is not None:
-            layer_priority = int(layer_priority)
-        else:
-            layer_priority = recipe.layer_priority
-        priority = recipe.meta.get('PRIORITY_%s'%(self.name))
-        if priority is None:
-            priority = recipe.meta.get('PRIORITY')
-        priority = int(priority)
-        self.priority = layer_priority + recipe.priority_baseline + priority
+        self.priority = priority
         self.version = recipe.version
-        self.recdepends = dict()
-        for t in ("DEPENDS", "RDEPENDS", "FDEPENDS"):
-            self.recdepends[t] = set([])
         return
 
     def __str__(self):
@@ -55,11 +56,3 @@ class OElitePackage:
         for package in packages:
             provides.update(package.get_provides())
         return map(str, provides)
-
-    def set_recdepends(self, deptype, packages):
-        assert(deptype in self.recdepends)
-        self.recdepends[deptype].update(packages)
-
-    def get_recdepends(self, deptype):
-        assert(deptype in self.recdepends)
-        return list(self.recdepends[deptype])
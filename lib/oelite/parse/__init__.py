@@ -43,7 +43,14 @@ class ParseError(Exception):
         else:
             self.filename = "<unknown file>",
 
-        if isinstance(self.details, ply.yacc.YaccProduction):
+        if isinstance(self.details, tuple):
+            # (filename, lineno) of a statement replayed from the
+            # statement cache
+            (self.filename, lineno) = self.details
+            self.errlineno = lineno - 1
+            self.symbol = None
+            self.msg += " in %s at line %d"%(self.filename, lineno)
+        elif isinstance(self.details, ply.yacc.YaccProduction):
             self.errlineno -= 1
             self.symbol = None
             self.msg += " in %s at line %d"%(
@@ -68,12 +75,19 @@ class ParseError(Exception):
             raise Exception("unsupported details type: %s", type(self.details))
 
         try:
-            self.lines = self.parser.text.splitlines()
+            if isinstance(self.details, tuple):
+                with open(self.filename) as f:
+                    self.lines = f.read().splitlines()
+            else:
+                self.lines = self.parser.text.splitlines()
         except:
             return
 
         self.firstline = max(self.errlineno - 5, 0)
         self.lastline = min(self.errlineno + 5, len(self.lines))
+        if isinstance(self.details, tuple):
+            self.lexpos = None
+            return
         errlinepos = 0
         for lineno in xrange(self.errlineno):
             errlinepos += len(self.lines[lineno]) + 1
@@ -19,6 +19,8 @@ if not __initialized__:
 
 class DocParser(oelite.parse.oeparse.OEParser):
 
+    cache_statements = False
+
     def __init__(self, meta=None, parent=None, **kwargs):
         self.body = ""
         self.vars = {}
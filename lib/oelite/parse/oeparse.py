@@ -5,9 +5,67 @@ import oelite.parse
 import oelite.meta
 import oelite.path
 import oelite.util
+import cPickle
+from oebakery import die, err, warn, info, debug
+
+
+# Parsed statements of class and include files, so that each file
+# only needs to be lexed and parsed once, and can then be replayed
+# against the metadata of each recipe inheriting/including it.
+#
+# (parser class name, realpath) -> (mtime, statements), with each
+# statement a (statement, args, (filename, lineno)) tuple.
+statement_cache = {}
+statement_cache_file = None
+statement_cache_dirty = False
+statement_cache_stats = {
+    "parsed": 0,
+    "replayed": 0,
+    }
+
+
+def load_statement_cache(filename):
+    """Load the statement cache from file, and have it saved back to
+    the same file by save_statement_cache()."""
+    global statement_cache_file
+    statement_cache_file = filename
+    if not filename or not os.path.exists(filename):
+        return
+    try:
+        with open(filename, "rb") as f:
+            abi = cPickle.load(f)
+            if abi != oelite.meta.cache.pickle_abi():
+                debug("Ignoring statement cache with changed ABI")
+                return
+            statement_cache.update(cPickle.load(f))
+    except Exception, e:
+        warn("Ignoring invalid statement cache %s: %s"%(filename, e))
+    return
+
+
+def save_statement_cache():
+    global statement_cache_dirty
+    if not statement_cache_file or not statement_cache_dirty:
+        return
+    oelite.util.makedirs(os.path.dirname(statement_cache_file))
+    tmpfile = "%s.%d"%(statement_cache_file, os.getpid())
+    with open(tmpfile, "wb") as f:
+        cPickle.dump(oelite.meta.cache.pickle_abi(), f, 2)
+        cPickle.dump(statement_cache, f, 2)
+    os.rename(tmpfile, statement_cache_file)
+    statement_cache_dirty = False
+    debug("Statement cache: parsed %d files, replayed %d files"%(
+            statement_cache_stats["parsed"], statement_cache_stats["replayed"]))
+    return
+
 
 class OEParser(object):
 
+    # Cache the statements of parsed class and include files.  Parsers
+    # with grammar actions that are not recorded as statements must
+    # disable this.
+    cache_statements = True
+
     def __init__(self, meta=None, parent=None, lexer=None):
         import oelite
         if lexer is None:
@@ -21,9 +79,8 @@ class OEParser(object):
         else:
             # ply <= 3.4
             self.tokens = lexer.lextokens.keys()
-        oelite.util.makedirs("tmp/ply")
-        picklefile = "tmp/ply/" + self.__class__.__module__ + ".p"
-        self.yacc = ply.yacc.yacc(module=self, debug=0, picklefile=picklefile)
+        self._yacc = None
+        self.statements = None
         if meta is not None:
             self.meta = meta
         else:
@@ -32,6 +89,17 @@ class OEParser(object):
         return
 
 
+    def get_yacc(self):
+        # Only build the parser tables when actually parsing, as
+        # cached class and include files are replayed without them.
+        if self._yacc is None:
+            oelite.util.makedirs("tmp/ply")
+            picklefile = "tmp/ply/" + self.__class__.__module__ + ".p"
+            self._yacc = ply.yacc.yacc(module=self, debug=0,
+                                       picklefile=picklefile)
+        return self._yacc
+
+
     def reset_lexstate(self):
         while self.lexer.lexstate != "INITIAL":
             self.lexer.pop_state()
@@ -103,8 +171,8 @@ class OEParser(object):
     
     def p_export_variable(self, p):
         '''export_variable : EXPORT VARNAME'''
-        p[0] = intern(self.meta.expand(p[2]))
-        self.meta.set_flag(p[0], "export", "1")
+        self.statement(p, "export", p[2])
+        p[0] = ("export", p[2])
         return
 
     def p_flag(self, p):
@@ -114,10 +182,7 @@ class OEParser(object):
     
     def p_override(self, p):
         '''varoverride : VARNAME OVERRIDE'''
-        try:
-            p[0] = (self.meta.expand(p[1]), p[2])
-        except oelite.meta.ExpansionError as e:
-            raise oelite.parse.ParseError(self, str(e), p)
+        p[0] = (p[1], p[2])
         return
 
     def p_string(self, p):
@@ -149,150 +214,127 @@ class OEParser(object):
 
     def p_simple_var_assignment(self, p):
         '''assignment : variable ASSIGN string'''
-        self.meta.set(p[1], p[3])
+        self.statement(p, "var", p[1], "ASSIGN", p[3])
         return
 
     def p_simple_flag_assignment(self, p):
         '''assignment : varflag ASSIGN string'''
-        self.meta.set_flag(p[1][0], p[1][1], p[3])
+        self.statement(p, "flag", p[1][0], p[1][1], "ASSIGN", p[3])
         return
 
     def p_simple_override_assignment(self, p):
         '''assignment : varoverride ASSIGN string'''
-        self.meta.set_override(p[1][0], p[1][1], p[3])
+        self.statement(p, "override", p[1][0], p[1][1], "ASSIGN", p[3])
         return
 
     def p_exp_var_assignment(self, p):
         '''assignment : variable EXPASSIGN string'''
-        self.meta.set(p[1], self.meta.expand(p[3]))
+        self.statement(p, "var", p[1], "EXPASSIGN", p[3])
         return
 
     def p_exp_flag_assignment(self, p):
         '''assignment : varflag EXPASSIGN string'''
-        self.meta.set_flag(p[1][0], p[1][1], self.meta.expand(p[3]))
+        self.statement(p, "flag", p[1][0], p[1][1], "EXPASSIGN", p[3])
         return
 
     def p_exp_override_assignment(self, p):
         '''assignment : varoverride EXPASSIGN string'''
-        self.meta.set_override(p[1][0], p[1][1], self.meta.expand(p[3]))
+        self.statement(p, "override", p[1][0], p[1][1], "EXPASSIGN", p[3])
         return
 
     def p_defaultval_assignment(self, p):
         '''assignment : variable LAZYASSIGN string'''
-        self.meta.set_flag(p[1], "defaultval", p[3])
+        self.statement(p, "var", p[1], "LAZYASSIGN", p[3])
         return
 
     def p_weak_var_assignment(self, p):
         '''assignment : variable WEAKASSIGN string'''
-        if not p[1] in self.meta:
-            self.meta.set(p[1], p[3])
+        self.statement(p, "var", p[1], "WEAKASSIGN", p[3])
         return
 
     def p_weak_flag_assignment(self, p):
         '''assignment : varflag WEAKASSIGN string'''
-        if self.meta.get_flag(p[1][0], p[1][1]) == None:
-            self.meta.set_flag(p[1][0], p[1][1], p[3])
+        self.statement(p, "flag", p[1][0], p[1][1], "WEAKASSIGN", p[3])
         return
 
     def p_weak_override_assignment(self, p):
         '''assignment : varoverride WEAKASSIGN string'''
-        if self.meta.get_override(p[1][0], p[1][1]) == None:
-            self.meta.set_override(p[1][0], p[1][1], p[3])
+        self.statement(p, "override", p[1][0], p[1][1], "WEAKASSIGN", p[3])
         return
 
     def p_append_var_assignment(self, p):
         '''assignment : variable APPEND string'''
-        self.meta.append(p[1], p[3], separator=" ")
+        self.statement(p, "var", p[1], "APPEND", p[3])
         return
 
     def p_append_flag_assignment(self, p):
         '''assignment : varflag APPEND string'''
-        self.meta.append_flag(p[1][0], p[1][1], p[3], separator=" ")
+        self.statement(p, "flag", p[1][0], p[1][1], "APPEND", p[3])
         return
 
     def p_append_override_assignment(self, p):
         '''assignment : varoverride APPEND string'''
-        self.meta.append_override(p[1][0], p[1][1], p[3], separator=" ")
+        self.statement(p, "override", p[1][0], p[1][1], "APPEND", p[3])
         return
 
     def p_prepend_var_assignment(self, p):
         '''assignment : variable PREPEND string'''
-        self.meta.prepend(p[1], p[3], separator=" ")
+        self.statement(p, "var", p[1], "PREPEND", p[3])
         return
 
     def p_prepend_flag_assignment(self, p):
         '''assignment : varflag PREPEND string'''
-        self.meta.prepend_flag(p[1][0], p[1][1], p[3], separator=" ")
+        self.statement(p, "flag", p[1][0], p[1][1], "PREPEND", p[3])
         return
 
     def p_prepend_override_assignment(self, p):
         '''assignment : varoverride PREPEND string'''
-        self.meta.prepend_override(p[1][0], p[1][1], p[3], separator=" ")
+        self.statement(p, "override", p[1][0], p[1][1], "PREPEND", p[3])
         return
 
     def p_predot_var_assignment(self, p):
         '''assignment : variable PREDOT string'''
-        self.meta.append(p[1], p[3])
+        self.statement(p, "var", p[1], "PREDOT", p[3])
         return
 
     def p_predot_flag_assignment(self, p):
         '''assignment : varflag PREDOT string'''
-        self.meta.append_flag(p[1][0], p[1][1], p[3])
+        self.statement(p, "flag", p[1][0], p[1][1], "PREDOT", p[3])
         return
 
     def p_predot_override_assignment(self, p):
         '''assignment : varoverride PREDOT string'''
-        self.meta.append_override(p[1][0], p[1][1], p[3])
+        self.statement(p, "override", p[1][0], p[1][1], "PREDOT", p[3])
         return
 
     def p_postdot_var_assignment(self, p):
         '''assignment : variable POSTDOT string'''
-        self.meta.prepend(p[1], p[3])
+        self.statement(p, "var", p[1], "POSTDOT", p[3])
         return
 
     def p_postdot_flag_assignment(self, p):
         '''assignment : varflag POSTDOT string'''
-        self.meta.prepend_flag(p[1][0], p[1][1], p[3])
+        self.statement(p, "flag", p[1][0], p[1][1], "POSTDOT", p[3])
         return
 
     def p_postdot_override_assignment(self, p):
         '''assignment : varoverride POSTDOT string'''
-        self.meta.prepend_override(p[1][0], p[1][1], p[3])
+        self.statement(p, "override", p[1][0], p[1][1], "POSTDOT", p[3])
         return
 
     def p_include(self, p):
         '''include : INCLUDE INCLUDEFILE'''
-        self.include(p[2], p)
+        self.statement(p, "include", p[2], False)
         return
 
     def p_require(self, p):
         '''require : REQUIRE INCLUDEFILE'''
-        try:
-            self.include(p[2], p, require=True)
-        except oelite.parse.FileNotFound, e:
-            # ParseError-2
-            raise oelite.parse.ParseError(
-                self, "File not found: require %s"%(p[2]), p)
+        self.statement(p, "include", p[2], True)
         return
 
     def p_inherit(self, p):
         '''inherit : INHERIT inherit_classes'''
-        for inherit_classes in p[2]:
-            try:
-                inherit_classes = self.meta.expand(inherit_classes,
-                                                   method=oelite.meta.FULL_EXPANSION)
-            except oelite.meta.ExpansionError, e:
-                # ParseError-3
-                raise oelite.parse.ParseError(
-                    self, str(e), p, more_details=e)
-
-            for inherit_class in (inherit_classes or "").split():
-                try:
-                    self.inherit(inherit_class, p)
-                except oelite.parse.FileNotFound, e:
-                    # ParseError-4
-                    raise oelite.parse.ParseError(
-                        self, "Class not found: inherit %s"%(inherit_class), p)
+        self.statement(p, "inherit", p[2])
         return
 
     def p_inherit_classes(self, p):
@@ -307,17 +349,14 @@ class OEParser(object):
 
     def p_addtask(self, p):
         '''addtask : addtask_task'''
-        self.meta.set_flag(p[1], "task", True)
+        self.statement(p, "addtask", p[1], None, [])
         #print "addtask %s"%(p[1])
         return
 
     def p_addtask_w_dependencies(self, p):
         '''addtask : addtask_task addtask_dependencies'''
         #print "addtask %s after %s before %s"%(p[1], p[2][0], p[2][1])
-        self.p_addtask(p)
-        self.meta.append_flag(p[1], "deps", " ".join(p[2][0]), " ")
-        for before_task in p[2][1]:
-            self.meta.append_flag(before_task, "deps", p[1], " ")
+        self.statement(p, "addtask", p[1], p[2][0], p[2][1])
         return
 
     def taskname(self, s):
@@ -369,22 +408,22 @@ class OEParser(object):
 
     def p_addhook1(self, p):
         '''addhook : ADDHOOK HOOK TO HOOKNAME'''
-        self.meta.add_hook(p[4], p[2])
+        self.statement(p, "addhook", p[4], p[2], 1, None, None)
         return
 
     def p_addhook2(self, p):
         '''addhook : ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCE'''
-        self.meta.add_hook(p[4], p[2], p[5])
+        self.statement(p, "addhook", p[4], p[2], p[5], None, None)
         return
 
     def p_addhook3(self, p):
         '''addhook : ADDHOOK HOOK TO HOOKNAME addhook_dependencies'''
-        self.meta.add_hook(p[4], p[2], after=p[5][0], before=p[5][1])
+        self.statement(p, "addhook", p[4], p[2], 1, p[5][0], p[5][1])
         return
 
     def p_addhook4(self, p):
         '''addhook : ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCE addhook_dependencies'''
-        self.meta.add_hook(p[4], p[2], p[5], after=p[6][0], before=p[6][1])
+        self.statement(p, "addhook", p[4], p[2], p[5], p[6][0], p[6][1])
         return
 
     def p_addhook_dependencies1(self, p):
@@ -426,13 +465,12 @@ class OEParser(object):
 
     def p_prefer_recipe(self, p):
         '''prefer : PREFER recipe maybe_layer maybe_version'''
-        self.meta.set_preference(recipe=p[2], layer=p[3], version=p[4])
+        self.statement(p, "prefer", [], p[2], p[3], p[4])
         return
 
     def p_prefer_package(self, p):
         '''prefer : PREFER packages maybe_recipe maybe_layer maybe_version'''
-        self.meta.set_preference(packages=p[2], recipe=p[3], layer=p[4],
-                                 version=p[5])
+        self.statement(p, "prefer", p[2], p[3], p[4], p[5])
         return
 
     def p_recipe(self, p):
@@ -498,8 +536,7 @@ class OEParser(object):
 
     def p_func(self, p):
         '''func : VARNAME FUNCSTART func_body FUNCSTOP'''
-        self.meta.set(p[1], p[3])
-        self.meta.set_flag(p[1], "bash", True)
+        self.statement(p, "func", p[1], p[3])
         p[0] = p[1]
         return
 
@@ -515,17 +552,14 @@ class OEParser(object):
 
     def p_fakeroot_func(self, p):
         '''fakeroot_func : FAKEROOT func'''
-        self.meta.set_flag(p[2], "fakeroot", True)
+        self.statement(p, "fakeroot", p[2])
         p[0] = p[2]
         return
 
     def p_python_func(self, p):
         '''python_func : python_func_start func_body FUNCSTOP'''
-        self.meta.set(p[1][0], p[2])
-        self.meta.set_flag(p[1][0], "python", True)
-        self.meta.set_flag(p[1][0], "args", "d")
-        self.meta.set_flag(p[1][0], "filename", p[1][1])
-        self.meta.set_flag(p[1][0], "lineno", p[1][2])
+        self.statement(p, "python_func", p[1][0], p[2], "d",
+                       p[1][1], p[1][2])
         p[0] = p[1][0]
         return
 
@@ -553,12 +587,8 @@ class OEParser(object):
     def p_def_func(self, p):
         '''def_func : DEF VARNAME def_funcargs NEWLINE func_body
                     | DEF VARNAME def_funcargs NEWLINE func_body FUNCSTOP'''
-        self.meta.set(p[2], p[5])
-        self.meta.set_flag(p[2], "python", True)
-        if p[3][0]:
-            self.meta.set_flag(p[2], "args", p[3][0])
-        self.meta.set_flag(p[2], "filename", p[3][1])
-        self.meta.set_flag(p[2], "lineno", p[3][2])
+        self.statement(p, "python_func", p[2], p[5], p[3][0],
+                       p[3][1], p[3][2])
         return
 
     def p_def_args1(self, p):
@@ -576,6 +606,158 @@ class OEParser(object):
         raise oelite.parse.ParseError(self, "Syntax error", p)
 
 
+    def statement(self, p, statement, *args):
+        if self.statements is not None:
+            self.statements.append(
+                (statement, args, (self.filename, p.lexer.lineno)))
+        return getattr(self, "stmt_" + statement)(p, *args)
+
+    def replay(self, statements):
+        # The (filename, lineno) location of each statement is passed
+        # in place of the yacc production, for ParseError details.
+        for (statement, args, location) in statements:
+            getattr(self, "stmt_" + statement)(location, *args)
+        return self.meta
+
+
+    def varname(self, var):
+        if isinstance(var, tuple):
+            # export_variable
+            return intern(self.meta.expand(var[1]))
+        return var
+
+    def stmt_var(self, p, var, op, val):
+        var = self.varname(var)
+        if op == "ASSIGN":
+            self.meta.set(var, val)
+        elif op == "EXPASSIGN":
+            self.meta.set(var, self.meta.expand(val))
+        elif op == "LAZYASSIGN":
+            self.meta.set_flag(var, "defaultval", val)
+        elif op == "WEAKASSIGN":
+            if not var in self.meta:
+                self.meta.set(var, val)
+        elif op == "APPEND":
+            self.meta.append(var, val, separator=" ")
+        elif op == "PREPEND":
+            self.meta.prepend(var, val, separator=" ")
+        elif op == "PREDOT":
+            self.meta.append(var, val)
+        elif op == "POSTDOT":
+            self.meta.prepend(var, val)
+        return
+
+    def stmt_flag(self, p, var, flag, op, val):
+        if op == "ASSIGN":
+            self.meta.set_flag(var, flag, val)
+        elif op == "EXPASSIGN":
+            self.meta.set_flag(var, flag, self.meta.expand(val))
+        elif op == "WEAKASSIGN":
+            if self.meta.get_flag(var, flag) == None:
+                self.meta.set_flag(var, flag, val)
+        elif op == "APPEND":
+            self.meta.append_flag(var, flag, val, separator=" ")
+        elif op == "PREPEND":
+            self.meta.prepend_flag(var, flag, val, separator=" ")
+        elif op == "PREDOT":
+            self.meta.append_flag(var, flag, val)
+        elif op == "POSTDOT":
+            self.meta.prepend_flag(var, flag, val)
+        return
+
+    def stmt_override(self, p, var, override, op, val):
+        try:
+            var = self.meta.expand(var)
+        except oelite.meta.ExpansionError as e:
+            raise oelite.parse.ParseError(self, str(e), p)
+        if op == "ASSIGN":
+            self.meta.set_override(var, override, val)
+        elif op == "EXPASSIGN":
+            self.meta.set_override(var, override, self.meta.expand(val))
+        elif op == "WEAKASSIGN":
+            if self.meta.get_override(var, override) == None:
+                self.meta.set_override(var, override, val)
+        elif op == "APPEND":
+            self.meta.append_override(var, override, val, separator=" ")
+        elif op == "PREPEND":
+            self.meta.prepend_override(var, override, val, separator=" ")
+        elif op == "PREDOT":
+            self.meta.append_override(var, override, val)
+        elif op == "POSTDOT":
+            self.meta.prepend_override(var, override, val)
+        return
+
+    def stmt_export(self, p, var):
+        self.meta.set_flag(intern(self.meta.expand(var)), "export", "1")
+        return
+
+    def stmt_include(self, p, filename, require):
+        if not require:
+            self.include(filename, p)
+            return
+        try:
+            self.include(filename, p, require=True)
+        except oelite.parse.FileNotFound, e:
+            # ParseError-2
+            raise oelite.parse.ParseError(
+                self, "File not found: require %s"%(filename), p)
+        return
+
+    def stmt_inherit(self, p, classes):
+        for inherit_classes in classes:
+            try:
+                inherit_classes = self.meta.expand(inherit_classes,
+                                                   method=oelite.meta.FULL_EXPANSION)
+            except oelite.meta.ExpansionError, e:
+                # ParseError-3
+                raise oelite.parse.ParseError(
+                    self, str(e), p, more_details=e)
+
+            for inherit_class in (inherit_classes or "").split():
+                try:
+                    self.inherit(inherit_class, p)
+                except oelite.parse.FileNotFound, e:
+                    # ParseError-4
+                    raise oelite.parse.ParseError(
+                        self, "Class not found: inherit %s"%(inherit_class), p)
+        return
+
+    def stmt_addtask(self, p, task, after, before):
+        self.meta.set_flag(task, "task", True)
+        if after is not None:
+            self.meta.append_flag(task, "deps", " ".join(after), " ")
+        for before_task in before:
+            self.meta.append_flag(before_task, "deps", task, " ")
+        return
+
+    def stmt_addhook(self, p, name, hook, sequence, after, before):
+        self.meta.add_hook(name, hook, sequence, after=after, before=before)
+        return
+
+    def stmt_prefer(self, p, packages, recipe, layer, version):
+        self.meta.set_preference(packages=packages, recipe=recipe,
+                                 layer=layer, version=version)
+        return
+
+    def stmt_func(self, p, name, body):
+        self.meta.set(name, body)
+        self.meta.set_flag(name, "bash", True)
+        return
+
+    def stmt_fakeroot(self, p, name):
+        self.meta.set_flag(name, "fakeroot", True)
+        return
+
+    def stmt_python_func(self, p, name, body, args, filename, lineno):
+        self.meta.set(name, body)
+        self.meta.set_flag(name, "python", True)
+        if args:
+            self.meta.set_flag(name, "args", args)
+        self.meta.set_flag(name, "filename", filename)
+        self.meta.set_flag(name, "lineno", lineno)
+        return
+
+
     def inherit(self, filename, p):
         #print "inherit", filename
         if not filename:
@@ -604,6 +786,7 @@ class OEParser(object):
 
 
     def parse(self, filename, require=True, parser=None, p=None, debug=False):
+        global statement_cache_dirty
         #print "parsing %s"%(filename)
         searchfn = filename
         if not os.path.isabs(filename):
@@ -613,12 +796,12 @@ class OEParser(object):
                 oepath = "%s:%s"%(dirname, oepath)
             filename = oelite.path.which(oepath, filename)
         else:
-            if not os.path.exists(filename):
+            if not oelite.path.exists(filename):
                 print "file not found: %s"%(filename)
                 return
             oepath = None
 
-        if not os.path.exists(filename):
+        if not filename:
             if require:
                 raise oelite.parse.FileNotFound(self, searchfn, p)
             else:
@@ -645,6 +828,17 @@ class OEParser(object):
 
         # FIXME: write lock file to safeguard against race condition
         mtime = os.path.getmtime(self.filename)
+        cache_key = None
+        if self.cache_statements and (
+            parser is not None or self.filename.endswith(".oeclass")):
+            cache_key = (self.__class__.__name__, self.filename)
+            cached = statement_cache.get(cache_key)
+            if cached and cached[0] == mtime:
+                self.meta.set_input_mtime(searchfn, oepath, mtime)
+                self.text = None
+                statement_cache_stats["replayed"] += 1
+                return self.replay(cached[1])
+
         f = open(self.filename)
         self.text = f.read()
         f.close()
@@ -652,14 +846,24 @@ class OEParser(object):
 
         if not parser:
             parser = self
-        return parser._parse(self.text, debug=debug)
+        if cache_key is None:
+            return parser._parse(self.text, debug=debug)
+        statement_cache_stats["parsed"] += 1
+        parser.statements = []
+        try:
+            meta = parser._parse(self.text, debug=debug)
+            statement_cache[cache_key] = (mtime, parser.statements)
+            statement_cache_dirty = True
+        finally:
+            parser.statements = None
+        return meta
 
 
     def _parse(self, s, debug=False):
         self.lexer.lineno = 0
         # To be able to properly stop parsing of Python functions at end
         # of file, we need a non-empty line
-        self.yacc.parse(s + '\n#EOF', lexer=self.lexer, debug=debug)
+        self.get_yacc().parse(s + '\n#EOF', lexer=self.lexer, debug=debug)
         return self.meta
 
 
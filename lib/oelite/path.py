@@ -1,4 +1,6 @@
 import os
+import atexit
+import oelite.profiling
 
 TOPDIR = os.getcwd()
 
@@ -16,12 +18,103 @@ def relpath(path):
     return path
 
 
+# Directory listing cache, used for avoiding a stat() call for each
+# OEPATH entry on every which() call.  Each directory is listed once,
+# and its mtime is checked again once per cache generation (see
+# revalidate()), and before a name not in the listing is reported
+# missing.
+#
+# dirname -> (generation, mtime, frozenset of names or None)
+dircache = {}
+dircache_generation = 0
+dircache_stats = {
+    "lookups": 0,
+    "found": 0,
+    "stat": 0,
+    "listdir": 0,
+    }
+
+
+def revalidate():
+    """Have cached directory listings revalidated (by directory
+    mtime) the next time they are used."""
+    global dircache_generation
+    dircache_generation += 1
+
+
+def listdir(dirname, check=False):
+    """Return a (cached) frozenset of the names in directory, or None
+    if it is not a directory.  The mtime of the directory is checked
+    once per cache generation, or always if check is True."""
+    try:
+        (generation, mtime, names) = dircache[dirname]
+        if generation == dircache_generation and not check:
+            return names
+    except KeyError:
+        mtime = names = None
+    dircache_stats["stat"] += 1
+    try:
+        cur_mtime = os.stat(dirname).st_mtime
+    except OSError:
+        cur_mtime = names = None
+    if cur_mtime is not None and (cur_mtime != mtime or names is None):
+        dircache_stats["listdir"] += 1
+        try:
+            names = frozenset(os.listdir(dirname))
+        except OSError:
+            names = None
+    dircache[dirname] = (dircache_generation, cur_mtime, names)
+    return names
+
+
+def exists(path):
+    """Equivalent of os.path.lexists(), using the directory listing
+    cache, ie. a symlink exists even if its target does not."""
+    dircache_stats["lookups"] += 1
+    if not os.path.isabs(path):
+        path = os.path.abspath(path)
+    (dirname, basename) = os.path.split(os.path.normpath(path))
+    if not basename:
+        return os.path.lexists(path)
+    cached = dircache.get(dirname, (None,))[0] == dircache_generation
+    names = listdir(dirname)
+    if cached and (names is None or not basename in names):
+        # The directory may have been created or changed since it was
+        # listed (fx. by a task), so check its mtime again
+        names = listdir(dirname, check=True)
+    if names is None or not basename in names:
+        return False
+    dircache_stats["found"] += 1
+    return True
+
+
 def which(path, filename, pathsep=os.pathsep):
     """Given a search path, find file."""
     if isinstance(path, basestring):
         path = path.split(pathsep)
     for p in path:
         f = os.path.join(p, filename)
-        if os.path.exists(f):
+        if exists(f):
             return os.path.abspath(f)
     return '' # TODO: change to None, and fixup the breakage it causes
+
+
+def write_dircache_stats():
+    if not dircache_stats["lookups"]:
+        return
+    # Most callers stat the files found (fx. for their mtime), so
+    # those syscalls are counted both with and without the cache,
+    # where each lookup would be a stat() call.
+    found = dircache_stats["found"]
+    uncached = dircache_stats["lookups"] + found
+    cached = dircache_stats["stat"] + dircache_stats["listdir"] + found
+    with oelite.profiling.profile_output("path_cache.txt") as f:
+        f.write("lookups:          %9d\n" % dircache_stats["lookups"])
+        f.write("found:            %9d\n" % found)
+        f.write("directories:      %9d\n" % len(dircache))
+        f.write("stat calls:       %9d\n" % dircache_stats["stat"])
+        f.write("listdir calls:    %9d\n" % dircache_stats["listdir"])
+        f.write("syscalls:         %9d\n" % cached)
+        f.write("uncached syscalls:%9d\n" % uncached)
+        f.write("avoided syscalls: %9d\n" % (uncached - cached))
+atexit.register(write_dircache_stats)
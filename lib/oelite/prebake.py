@@ -0,0 +1,278 @@
+from oebakery import die, err, warn, info, debug
+import oelite.fetch.url
+import oelite.path
+import oelite.util
+
+import os
+import errno
+import hashlib
+import shutil
+import subprocess
+
+# Name of the prebake index file, in the root of a prebake directory
+# or PREBAKE_URL.
+INDEX_NAME = "prebake.index"
+
+
+def read_index(f):
+    """Parse a prebake index.
+
+    Each line holds the path of a prebake (relative to the prebake
+    root, fx. "machine/foo-arch/foo_1.0_<metahash>.tar"), optionally
+    followed by a tab and the path of the file holding it, if that is
+    another file (fx. because it is identical to another prebake).
+    Returns dict of prebake path -> file path.
+    """
+    index = {}
+    for line in f:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) > 1:
+            index[fields[0]] = fields[1]
+        else:
+            index[fields[0]] = fields[0]
+    return index
+
+
+def write_index(f, index):
+    f.write("# %s\n"%(INDEX_NAME))
+    for path in sorted(index):
+        if index[path] == path:
+            f.write("%s\n"%(path))
+        else:
+            f.write("%s\t%s\n"%(path, index[path]))
+    return
+
+
+class PrebakeResolver:
+    """Find prebaked packages, in local directories or at PREBAKE_URL.
+
+    Local directories are probed through the oelite.path directory
+    listing cache, so that each package directory is only listed
+    once.  If an index file is available at PREBAKE_URL, it is
+    fetched once, and only prebakes listed in it are downloaded, with
+    up to PREBAKE_FETCH_JOBS concurrent downloads.  Without an index,
+    each missing prebake is probed for at PREBAKE_URL.
+    """
+
+    def __init__(self, config, prebake=True):
+        package_deploy_dir = config.get("PACKAGE_DEPLOY_DIR")
+        if not package_deploy_dir:
+            die("PACKAGE_DEPLOY_DIR not defined")
+        self.cache_dir = config.get("PREBAKE_CACHE_DIR")
+        if prebake:
+            self.path = [self.cache_dir, package_deploy_dir]
+            prebake_path = config.get("PREBAKE_PATH")
+            if prebake_path:
+                self.path += prebake_path.split(":")
+        else:
+            self.path = [package_deploy_dir]
+        self.url = config.get("PREBAKE_URL")
+        self.jobs = int(config.get("PREBAKE_FETCH_JOBS") or "1")
+        self.proxies = oelite.fetch.url.get_proxies(config)
+        self.passive_ftp = oelite.fetch.url.get_passive_ftp(config)
+        self.index = None
+        return
+
+    def find_local(self, path):
+        for base_dir in self.path:
+            filename = os.path.join(base_dir, path)
+            debug("checking for prebake: %s"%(filename))
+            if oelite.path.exists(filename):
+                debug("found prebake: %s"%(filename))
+                return filename
+        return None
+
+    def fetch_index(self):
+        filename = os.path.join(self.cache_dir, INDEX_NAME)
+        url = os.path.join(self.url, INDEX_NAME)
+        if os.path.exists(filename):
+            os.unlink(filename)
+        if not oelite.fetch.url.grab(url, filename, timeout=10, retry=1,
+                                     proxies=self.proxies,
+                                     passive_ftp=self.passive_ftp):
+            info("No prebake index at %s, probing for each prebake"%(
+                    self.url))
+            return None
+        with open(filename) as f:
+            return read_index(f)
+
+    def resolve(self, paths):
+        """Find prebakes for dict of key -> prebake path.  Returns dict
+        of key -> filename for the prebakes found."""
+        found = {}
+        missing = {}
+        for (key, path) in paths.iteritems():
+            filename = self.find_local(path)
+            if filename:
+                found[key] = filename
+            else:
+                missing.setdefault(path, []).append(key)
+        if not missing or self.url is None:
+            return found
+
+        self.index = self.fetch_index()
+        downloads = []
+        duplicates = []
+        remotes = {}
+        for path in sorted(missing):
+            if self.index is None:
+                remote = path
+            elif path in self.index:
+                remote = self.index[path]
+            else:
+                continue
+            url = os.path.join(self.url, remote)
+            filename = os.path.join(self.cache_dir, path)
+            if url in remotes:
+                # Identical to another prebake, only download it once
+                duplicates.append((remotes[url], filename))
+            else:
+                remotes[url] = filename
+            downloads.append((url, filename, path))
+        if self.index is None:
+            # Without an index, most probes are expected to fail, so
+            # keep the probes short, and do them one at a time like
+            # it has always been done.
+            for (url, filename, path) in downloads:
+                oelite.fetch.url.grab(url, filename, timeout=1, retry=1,
+                                      proxies=self.proxies,
+                                      passive_ftp=self.passive_ftp)
+        else:
+            fetch_all([(url, filename) for (url, filename)
+                       in remotes.iteritems()], self.jobs,
+                      proxies=self.proxies, passive_ftp=self.passive_ftp)
+            for (src, filename) in duplicates:
+                if os.path.exists(src):
+                    link_atomic(src, filename)
+        for (url, filename, path) in downloads:
+            if os.path.exists(filename) and os.path.getsize(filename) > 0:
+                debug("using prebake from web: %s"%(url))
+                for key in missing[path]:
+                    found[key] = filename
+            elif os.path.exists(filename):
+                os.unlink(filename)
+        return found
+
+
+def fetch_all(downloads, jobs, proxies=None, passive_ftp=True):
+    """Download list of (url, filename) with up to jobs concurrent
+    downloads.  Like oelite.fetch.url.grab(), and with the same wget
+    command, files are downloaded to a temporary file and linked into
+    place when complete."""
+    pending = list(downloads)
+    running = []
+    while pending or running:
+        while pending and len(running) < jobs:
+            (url, filename) = pending.pop(0)
+            running.append(start_fetch(url, filename, proxies,
+                                       passive_ftp))
+        (proc, url, filename, tmpfile) = running.pop(0)
+        try:
+            returncode = proc.wait()
+            if returncode != 0:
+                err("Fetching %s failed: %d"%(url, returncode))
+            elif os.path.getsize(tmpfile) == 0:
+                err("Fetching %s resulted in an empty file"%(url))
+            else:
+                try:
+                    os.link(tmpfile, filename)
+                except OSError, e:
+                    if e.errno != errno.EEXIST:
+                        raise
+        finally:
+            os.unlink(tmpfile)
+    return
+
+
+def start_fetch(url, filename, proxies=None, passive_ftp=True):
+    print "Grabbing", url
+    (cmd, env) = oelite.fetch.url.grab_command(
+        url, proxies=proxies, passive_ftp=passive_ftp)
+    (fd, tmpfile) = oelite.fetch.url.grab_tempfile(filename)
+    try:
+        proc = subprocess.Popen(cmd, env=env, stdout=fd)
+    finally:
+        os.close(fd)
+    return (proc, url, filename, tmpfile)
+
+
+def file_digest(filename):
+    hasher = hashlib.sha1()
+    with open(filename, "rb") as f:
+        while True:
+            buf = f.read(1 << 20)
+            if not buf:
+                break
+            hasher.update(buf)
+    return hasher.hexdigest()
+
+
+def link_atomic(src, dst):
+    """Hardlink (or copy, across file systems) src to dst, replacing
+    dst atomically."""
+    dstdir = os.path.dirname(dst)
+    oelite.util.makedirs(dstdir)
+    tmpfile = os.path.join(dstdir, ".%s.%d"%(os.path.basename(dst),
+                                             os.getpid()))
+    if os.path.lexists(tmpfile):
+        os.unlink(tmpfile)
+    try:
+        os.link(src, tmpfile)
+    except OSError, e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copyfile(src, tmpfile)
+        os.chmod(tmpfile, 0644)
+    os.rename(tmpfile, dst)
+    return
+
+
+def publish(source, dest):
+    """Publish the packages in source (a PACKAGE_DEPLOY_DIR) to the
+    prebake directory dest, and update its index.
+
+    Each distinct package file is stored once, as
+    objects/<sha1>.tar, and hardlinked to its prebake path (fx.
+    machine/foo-arch/foo_1.0_<metahash>.tar).  The index maps each
+    prebake path to the object holding it.  All files, including the
+    index, are written to a temporary file and renamed into place, so
+    that clients never see partial files.
+
+    Returns tuple with number of published packages and number of new
+    objects.
+    """
+    index_file = os.path.join(dest, INDEX_NAME)
+    if os.path.exists(index_file):
+        with open(index_file) as f:
+            index = read_index(f)
+    else:
+        index = {}
+    published = 0
+    objects = 0
+    for (dirpath, dirnames, filenames) in os.walk(source):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(".tar"):
+                continue
+            src = os.path.join(dirpath, filename)
+            path = os.path.relpath(src, source)
+            if len(path.split(os.sep)) != 3:
+                continue
+            if path in index and os.path.exists(os.path.join(dest, path)):
+                continue
+            obj = os.path.join("objects", file_digest(src) + ".tar")
+            if not os.path.exists(os.path.join(dest, obj)):
+                link_atomic(src, os.path.join(dest, obj))
+                objects += 1
+            link_atomic(os.path.join(dest, obj), os.path.join(dest, path))
+            index[path] = obj
+            published += 1
+            debug("published %s"%(path))
+    tmpfile = "%s.%d"%(index_file, os.getpid())
+    with open(tmpfile, "w") as f:
+        write_index(f, index)
+    os.rename(tmpfile, index_file)
+    return (published, objects)
@@ -57,6 +57,39 @@ def trace(payload = "", depth = 3):
         if len(trace_entries) > 10000:
             flush_trace_entries()
 
+# Timeline of the build in Chrome trace event format, written to
+# $profiledir/trace_events.json on exit.  Open it in chrome://tracing
+# or https://ui.perfetto.dev to see build phases and tasks over time.
+trace_events = []
+trace_events_start = now()
+
+def trace_event_span(name, start, end, tid=0, cat="phase", args=None):
+    e = {"name": name, "cat": cat, "ph": "X", "pid": 0, "tid": tid,
+         "ts": int((start - trace_events_start) * 1e6),
+         "dur": int((end - start) * 1e6)}
+    if args:
+        e["args"] = args
+    trace_events.append(e)
+
+def trace_event_counter(name, values, ts=None):
+    if ts is None:
+        ts = now()
+    trace_events.append({"name": name, "ph": "C", "pid": 0,
+                         "ts": int((ts - trace_events_start) * 1e6),
+                         "args": values})
+
+def trace_event_thread_name(tid, name):
+    trace_events.append({"name": "thread_name", "ph": "M", "pid": 0,
+                         "tid": tid, "args": {"name": name}})
+
+def write_trace_events():
+    if profiledir is None or not trace_events:
+        return
+    import json
+    with profile_output("trace_events.json", "w") as f:
+        json.dump({"traceEvents": trace_events,
+                   "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+
 # Decorating any function with @profile_calls will record the duration
 # of every call of that function. Some statistics on these are
 # automatically printed to $profiledir/callstats.txt on exit.
@@ -156,6 +189,7 @@ class Rusage:
         oelite.util.stracehack("end:" + self.name)
         self.after = self.current_rusage()
         self.compute_delta()
+        trace_event_span(self.name, self.before["wtime"], self.after["wtime"])
 
         if profiledir:
             self.print_delta()
@@ -219,6 +253,7 @@ def init(config):
 
     atexit.register(write_call_stats)
     atexit.register(flush_trace_entries)
+    atexit.register(write_trace_events)
 
 class SimpleStats:
     def __init__(self):
@@ -1,6 +1,9 @@
 from oebakery import die, err, warn, info, debug
 from oelite import InvalidRecipe
 import oelite.meta
+import oelite.package
+import oelite.profiling
+import oelite.fakeroot
 from oelite.dbutil import *
 
 import sys
@@ -8,6 +11,9 @@ import os
 import cPickle
 import warnings
 import shutil
+import re
+
+TASKFUNC_RE = re.compile(r"^do_[a-z]+")
 
 def unpickle(file, filename, cookbook):
     type = cPickle.load(file)
@@ -22,22 +28,35 @@ class OEliteRecipe:
         self.meta.pickle(file)
 
 
-    def __init__(self, filename, type, meta, cookbook):
+    def __init__(self, filename, type, meta, cookbook, summary=None):
         self.filename = filename
         self.type = type
         self.cookbook = cookbook
-        self.meta = meta
-        self.name = self.meta.get("PN")
-        self.version = self.meta.get("PV")
-        self.layer_priority = int(self.meta.get("LAYER_PRIORITY"))
-        self.priority_baseline = int(self.meta.get("PRIORITY_BASELINE"))
-        priority = self.meta.get("PRIORITY")
-        if priority is None:
-            priority = self.meta.get("DEFAULT_PREFERENCE")
-        priority = int(priority)
-        self.priority = self.layer_priority + self.priority_baseline + priority
+        if meta is None:
+            # Lazy recipe, metadata is loaded by the cookbook when
+            # first needed (see __getattr__)
+            self.name = summary["name"]
+            self.version = summary["version"]
+            self.layer_priority = summary["layer_priority"]
+            self.priority_baseline = summary["priority_baseline"]
+            self.priority = summary["priority"]
+        else:
+            self.meta = meta
+            self.name = self.meta.get("PN")
+            self.version = self.meta.get("PV")
+            self.layer_priority = int(self.meta.get("LAYER_PRIORITY"))
+            self.priority_baseline = int(self.meta.get("PRIORITY_BASELINE"))
+            priority = self.meta.get("PRIORITY")
+            if priority is None:
+                priority = self.meta.get("DEFAULT_PREFERENCE")
+            priority = int(priority)
+            self.priority = (self.layer_priority + self.priority_baseline
+                             + priority)
         self._datahash = None
         self._hash = None
+        # task name -> data hash (metadata signature), of the tasks
+        # hashed when planning the build
+        self.task_datahashes = {}
         self.recipe_deps = set([])
         self.tasks = set([])
         self.item_deps = {}
@@ -45,9 +64,22 @@ class OEliteRecipe:
             # (type, itemname) => version
             self.item_deps[deptype] = set()
         self.rmwork = False
+        self.faked = None
         return
 
 
+    def __getattr__(self, name):
+        # Only called when name is not found the normal way, which
+        # for meta means that this is a lazy recipe which has not yet
+        # been materialized.
+        if name != "meta":
+            raise AttributeError(name)
+        self.cookbook.materialize_recipe(self)
+        return self.__dict__["meta"]
+
+    def is_materialized(self):
+        return "meta" in self.__dict__
+
     def __str__(self):
         return "%s:%s_%s"%(self.type, self.name, self.version)
 
@@ -61,6 +93,82 @@ class OEliteRecipe:
     def set(self, var, val):
         return self.meta.set(var, val)
 
+    @oelite.profiling.profile_calls
+    def get_emit_index(self):
+        """Return the emit restrictions of the recipe metadata, as a
+        tuple of a list of variables emitted to all tasks, and a dict
+        of task -> list of variables only emitted to some tasks.
+
+        A variable with an emit flag is only emitted to the tasks
+        listed in it (none if it is empty), and META_EMIT_PREFIX
+        restricts variables by name prefix the same way.  Task
+        functions are only emitted to the task itself.
+
+        The index is kept in the recipe metadata, which discards it
+        when variables are added or removed, or an emit flag is
+        changed.  It is recomputed if META_EMIT_PREFIX is changed.
+        """
+        meta = self.meta
+        meta_emit_prefix = meta.get("META_EMIT_PREFIX") or ""
+        if meta.emit_index is not None:
+            (emit_prefix, index) = meta.emit_index
+            if emit_prefix == meta_emit_prefix:
+                return index
+        emit_prefixes = meta_emit_prefix.split()
+        def emit_prefix_pair(s):
+            task, prefix = s.split(":", 1)
+            if task:
+                task = "do_" + task
+            return (task, prefix)
+        # To avoid looping over the entire ~20 element list of pairs
+        # for every variable, split that list according to the first
+        # character of the prefix, and fetch the appropriate list
+        # based on var[0].
+        emit_prefix_table = {}
+        for s in emit_prefixes:
+            p = emit_prefix_pair(s)
+            c = p[1][0]
+            if c in emit_prefix_table:
+                emit_prefix_table[c].append(p)
+            else:
+                emit_prefix_table[c] = [p]
+        unrestricted = []
+        restricted = {}
+        for var in meta.keys():
+            emit_flag = meta.get_flag(var, "emit")
+            emit = (emit_flag or "").split()
+            taskfunc_match = TASKFUNC_RE.match(var)
+            if taskfunc_match:
+                emit.append(taskfunc_match.group(0))
+            for emit_task, emit_prefix in emit_prefix_table.get(var[0], []):
+                if not var.startswith(emit_prefix):
+                    continue
+                if emit_task == "":
+                    if emit_flag is None:
+                        emit_flag = ""
+                    continue
+                emit.append(emit_task)
+            if not (emit or emit_flag == ""):
+                unrestricted.append(var)
+                continue
+            for task in set(emit):
+                restricted.setdefault(task, []).append(var)
+        index = (unrestricted, restricted)
+        meta.emit_index = (meta_emit_prefix, index)
+        return index
+
+    def get_emit_vars(self, task):
+        """Return list of variables to emit to task."""
+        (unrestricted, restricted) = self.get_emit_index()
+        return unrestricted + restricted.get(task, [])
+
+    def get_stampdir(self):
+        try:
+            return self._stampdir
+        except AttributeError:
+            self._stampdir = self.meta.get("STAMPDIR")
+        return self._stampdir
+
     def get_flag(self, var, flag):
         return self.meta.get_flag(var, flag)
 
@@ -70,6 +178,39 @@ class OEliteRecipe:
     def get_packages(self):
         return self.cookbook.get_packages(recipe=self)
 
+    def summary(self):
+        """Return the information needed for adding the recipe and its
+        packages to the cookbook, as a picklable dict."""
+        summary = {
+            "name": self.name,
+            "version": self.version,
+            "layer_priority": self.layer_priority,
+            "priority_baseline": self.priority_baseline,
+            "priority": self.priority,
+            "depends": {},
+            "packages": [],
+            }
+        for deptype in ("DEPENDS", "RDEPENDS", "FDEPENDS"):
+            summary["depends"][deptype] = (
+                (self.meta.get(deptype) or "").split() +
+                (self.meta.get("CLASS_"+deptype) or "").split())
+        for package in self.meta.get_list("PACKAGES"):
+            arch = (self.meta.get("PACKAGE_ARCH_" + package) or
+                    self.meta.get("RECIPE_ARCH"))
+            type = (self.meta.get("PACKAGE_TYPE_" + package) or
+                    self.meta.get("RECIPE_TYPE"))
+            priority = oelite.package.package_priority(self, package)
+            provides = (self.meta.get("PROVIDES_" + package) or "").split()
+            if not package in provides:
+                provides.append(package)
+            depends = {}
+            for deptype in ("DEPENDS", "RDEPENDS"):
+                depends[deptype] = (self.meta.get("%s_%s"%(deptype, package))
+                                    or "").split()
+            summary["packages"].append(
+                (package, type, arch, priority, provides, depends))
+        return summary
+
     def get_depends(self, deptypes=[]):
         depends = []
         if not deptypes:
@@ -126,6 +267,28 @@ class OEliteRecipe:
             return False
         return True
 
+    def get_faked_session(self):
+        """Return the faked session shared by the fakeroot tasks of
+        the recipe, starting it if needed, or None if FAKED is not set
+        (in which case each fakeroot task is run with FAKEROOT)."""
+        if self.faked is not None:
+            return self.faked
+        faked = self.meta.get("FAKED")
+        if not faked:
+            return None
+        self.faked = oelite.fakeroot.FakedSession(
+            faked, self.meta.get("FAKEROOT_LIB"),
+            self.meta.get("FAKEROOT_STATE"))
+        self.faked.start()
+        return self.faked
+
+    def stop_faked_session(self):
+        if self.faked is None:
+            return
+        self.faked.stop()
+        self.faked = None
+        return
+
     def do_rmwork(self):
         if not self.rmwork:
             return
@@ -139,8 +302,17 @@ class OEliteRecipe:
             print "ERROR: rmwork %s: STAMPDIR not set" % self
             return
         dirs = (self.meta.get("RMWORK_DIRS") or "").split()
+        reclaimer = self.cookbook.baker.reclaimer
+        if reclaimer:
+            rmtree = reclaimer.reclaim
+        else:
+            rmtree = shutil.rmtree
         try:
-            shutil.rmtree(stampdir)
+            rmtree(stampdir)
+            statefile = self.meta.get("FAKEROOT_STATE")
+            if statefile and os.path.exists(statefile):
+                # The faked state refers to the files removed here
+                os.unlink(statefile)
             for d in dirs:
                 if not (d == workdir or d.startswith(workdir + "/")):
                     # We should probably canonicalize the paths before
@@ -153,7 +325,7 @@ class OEliteRecipe:
                     # or the directory not be applicable to this
                     # recipe (e.g. IMAGE_DIR).
                     continue
-                shutil.rmtree(d)
+                rmtree(d)
 
         except Exception as e:
             print "ERROR: rmwork %s: exception %s" % (self, e)
@@ -0,0 +1,136 @@
+from oebakery import die, err, warn, info, debug
+import oelite.signal
+import oelite.util
+
+import os
+import errno
+import pipes
+import shutil
+import subprocess
+import tempfile
+
+
+def low_priority():
+    oelite.signal.restore_defaults()
+    os.nice(19)
+
+
+class Reclaimer:
+    """Remove directories in the background.
+
+    Directories are renamed into a trash directory on the same file
+    system (which is atomic and fast), and then removed by up to jobs
+    background processes, running with nice 19 and (if available) in
+    the idle I/O scheduling class.
+
+    Each background process measures the size of a trash entry (with
+    du) before removing it, and leaves it in a "<entry>.pending" file
+    while removing it, so that pending_bytes() can tell how much disk
+    space is yet to be freed.  Entries not measured yet (fx. queued)
+    are counted by pending_bytes() too.
+
+    Arguments:
+    trashdir -- trash directory, used for directories on the same file
+        system.  For directories on other file systems, a .trash
+        directory next to the directory is used.
+    jobs -- maximum number of concurrent background processes
+    """
+
+    def __init__(self, trashdir, jobs=1):
+        self.trashdir = trashdir
+        self.jobs = jobs
+        self.trashdirs = {}
+        self.queue = []
+        self.running = {}
+        self.ionice = None
+        for d in ("/usr/bin", "/bin"):
+            if os.path.exists(os.path.join(d, "ionice")):
+                self.ionice = os.path.join(d, "ionice")
+                break
+        oelite.util.makedirs(trashdir)
+        self.trashdirs[os.stat(trashdir).st_dev] = trashdir
+        # Pick up leftovers from interrupted builds
+        for name in sorted(os.listdir(trashdir)):
+            if name.endswith(".pending") or name.endswith(".pending.tmp"):
+                continue
+            self.queue.append(os.path.join(trashdir, name))
+        return
+
+    def get_trashdir(self, path):
+        dev = os.lstat(path).st_dev
+        try:
+            return self.trashdirs[dev]
+        except KeyError:
+            pass
+        trashdir = os.path.join(os.path.dirname(path), ".trash")
+        oelite.util.makedirs(trashdir)
+        self.trashdirs[dev] = trashdir
+        return trashdir
+
+    def reclaim(self, path):
+        """Remove path (in the background)."""
+        try:
+            trashdir = self.get_trashdir(path)
+            entry = tempfile.mkdtemp(
+                prefix=os.path.basename(path) + ".", dir=trashdir)
+            os.rename(path, os.path.join(entry, os.path.basename(path)))
+        except OSError, e:
+            if e.errno == errno.ENOENT:
+                return
+            warn("Cannot move %s to trash, removing it now: %s"%(path, e))
+            shutil.rmtree(path)
+            return
+        self.queue.append(entry)
+        self.poll()
+        return
+
+    def start(self, entries):
+        cmd = []
+        for entry in entries:
+            pending = pipes.quote(entry + ".pending")
+            entry = pipes.quote(entry)
+            cmd.append("du -sk %s > %s.tmp && mv %s.tmp %s; "
+                       "rm -rf %s; rm -f %s"%(
+                    entry, pending, pending, pending, entry, pending))
+        cmd = " ; ".join(cmd)
+        if self.ionice:
+            cmd = [self.ionice, "-c", "3", "/bin/sh", "-c", cmd]
+        else:
+            cmd = ["/bin/sh", "-c", cmd]
+        return subprocess.Popen(cmd, preexec_fn=low_priority,
+                                close_fds=True)
+
+    def poll(self):
+        """Reap finished background processes, and start new ones for
+        queued trash entries."""
+        for (entry, proc) in self.running.items():
+            if proc.poll() is not None:
+                del self.running[entry]
+        while self.queue and len(self.running) < self.jobs:
+            entry = self.queue.pop(0)
+            self.running[entry] = self.start([entry])
+        return
+
+    def pending_bytes(self):
+        """Return tuple of the number of bytes known to be waiting to
+        be reclaimed, ie. the size of the trash entries which have
+        been measured but not yet removed, and the number of trash
+        entries not measured yet (ie. queued, or being measured)."""
+        total = 0
+        unmeasured = 0
+        for entry in self.queue + self.running.keys():
+            try:
+                with open(entry + ".pending") as f:
+                    total += int(f.read().split()[0]) * 1024
+            except (IOError, ValueError, IndexError):
+                unmeasured += 1
+        return (total, unmeasured)
+
+    def finish(self):
+        """Hand over all queued trash entries to a single background
+        process, which is left running when oe exits."""
+        self.poll()
+        if self.queue:
+            self.start(self.queue)
+            self.queue = []
+        return
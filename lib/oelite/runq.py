@@ -3,12 +3,14 @@ from oelite import *
 from oelite.dbutil import *
 import oelite.util
 import oelite.recipe
+import oelite.meta
 import oelite.profiling
+import oelite.depclosure
 
 import sys
 import os
-import copy
 import operator
+import cPickle
 
 class OEliteRunQueue:
 
@@ -29,6 +31,9 @@ class OEliteRunQueue:
         self.dbc = CursorWrapper(self.cookbook.db.cursor(), profile=False)
         self.init_db()
         self._provider = {}
+        self.load_provider_cache()
+        self.dependency_closure = oelite.depclosure.DependencyClosure(
+            self.resolve_package, self.cookbook.get_package_depends)
         return
 
 
@@ -258,105 +263,27 @@ class OEliteRunQueue:
                     needed_by=None, ignore_missing=False):
         # return list/set of packages
 
-        def resolve_dependency(item, recursion_path, deptype):
-            if not rec_deptype:
+        packages = set([])
+        for depend in set(items):
+            item = oelite.item.OEliteItem(depend, (deptype, context))
+            try:
                 if self.assume_provided(item):
-                    debug("ASSUME_PROVIDED %s"%(item))
-                    return set([])
+                    if not rec_deptype:
+                        debug("ASSUME_PROVIDED %s"%(item))
+                    continue
                 try:
                     (recipe, package) = self.get_recipe_provider(item)
                 except NoProvider, e:
                     if ignore_missing:
-                        return set([])
-                    if len(e.args) < 2 and len(recursion_path[0]):
-                        raise NoProvider(e.args[0], recursion_path[0][-1])
+                        continue
                     raise
-                return set([package])
-
-            if self.assume_provided(item):
-                #debug("ASSUME_PROVIDED %s"%(item))
-                return set([])
-            try:
-                (recipe, package) = self.get_recipe_provider(item)
-            except NoProvider, e:
-                if ignore_missing:
-                    return set([])
-                if len(e.args) < 2 and len(recursion_path[0]):
-                    raise NoProvider(e.args[0], recursion_path[0][-1])
-                raise
-
-            # detect circular package dependencies
-            if str(package) in recursion_path[0]:
-                # actually, this might not be a bug/problem.......
-                # Fx: package X rdepends on package Y, and package Y
-                # rdepends on package X. As long as X and Y can be
-                # built, anyone rdepend'ing on either X or Y will just
-                # get both.  Bad circular dependencies must be
-                # detected at runq task level.  If we cannot build a
-                # recipe because of circular task dependencies, it is
-                # clearly a bug.  Improve runq detection of this by
-                # always simulating runq execution before starting,
-                # and checking that all tasks can be completed, and if
-                # some tasks are unbuildable, print out remaining
-                # tasks and their dependencies.
-
-                # on the other hand.... circular dependencies can be
-                # arbitrarely complex, and it is pretty hard to handle
-                # them generally, so better refuse to handle any of
-                # them, to avoid having to add more and more complex
-                # code to handle growingly sophisticated types of
-                # circular dependencies.
-
-                err("circular dependency while resolving %s"%(item))
-                depends = []
-                recursion_path[0].append(package)
-                recursion_path[1].append(item)
-                for i in xrange(len(recursion_path[0])):
-                    depend_package = str(recursion_path[0][i])
-                    depend_item = str(recursion_path[1][i])
-                    if depend_item == depend_package:
-                        depends.append(depend_package)
-                    else:
-                        depends.append("%s (%s)"%(depend_package, depend_item))
-                #raise RecursiveDepends(depends) Simply break the circular
-                # dependency here. It is not possible to determine if it is a
-                # problem or not here, as this has to be done at task level
-                # instead.
-                return set([])
-
-            # Recipe/task based circular dependencies are detected
-            # later on when the entire runq has been constructed
-
-            recursion_path[0].append(str(package))
-            recursion_path[1].append(str(item))
-
-            # try to get cached recdepends list of packages
-            packages = package.get_recdepends(deptype)
-            if packages:
-                return packages + [package]
-
-            packages = set([])
-            depends = self.cookbook.get_package_depends(package, deptype)
-            if depends:
-                for depend in depends:
-                    _recursion_path = copy.deepcopy(recursion_path)
-                    _packages = resolve_dependency(
-                        oelite.item.OEliteItem(depend, (deptype, package.type)),
-                        _recursion_path, deptype)
-                    packages.update(_packages)
-            package.set_recdepends(deptype, packages)
-            packages.add(package)
-            return packages
-
-        depends = set([])
-        depends.update(items)
-
-        packages = set([])
-        for depend in depends:
-            try:
-                _packages = resolve_dependency(
-                    oelite.item.OEliteItem(depend, (deptype, context)),
-                    ([], []), rec_deptype)
+                if not rec_deptype:
+                    packages.add(package)
+                    continue
+                # Recipe/task based circular dependencies are detected
+                # later on when the entire runq has been constructed
+                packages.update(self.dependency_closure.get(
+                        package, rec_deptype, ignore_missing))
             except NoProvider, e:
                 if len(e.args) < 2:
                     _needed_by = needed_by
@@ -364,11 +291,16 @@ class OEliteRunQueue:
                     _needed_by = e.args[1]
                 raise die("No provider for %s (needed by %s)"%(
                         e.args[0], _needed_by))
-            packages.update(_packages)
 
         return packages
 
 
+    def resolve_package(self, item):
+        if self.assume_provided(item):
+            return None
+        return self.get_recipe_provider(item)[1]
+
+
     def get_recipe_provider(self, item):
         package = self.get_provider(item)
         if not package:
@@ -380,6 +312,54 @@ class OEliteRunQueue:
         t = (item.type, item.name, item.version)
         assert t not in self._provider
         self._provider[t] = package
+        self._set_cached_provider(t, package.id)
+        return
+
+
+    def load_provider_cache(self):
+        """Load provider resolutions of earlier runs, valid as long as
+        the cookbook recipes, packages (including their priorities,
+        and thus PREFERRED settings) and provides are unchanged."""
+        self._cached_provider = {}
+        self.provider_cache_dirty = False
+        cachedir = self.config.get("CACHEDIR")
+        if not cachedir:
+            self.provider_cache_file = None
+            return
+        self.provider_cache_file = os.path.join(cachedir, "providers.p")
+        if not os.path.exists(self.provider_cache_file):
+            return
+        try:
+            with open(self.provider_cache_file, "rb") as f:
+                abi = cPickle.load(f)
+                signature = cPickle.load(f)
+                if (abi != oelite.meta.cache.pickle_abi() or
+                    signature != self.cookbook.signature()):
+                    return
+                self._cached_provider = cPickle.load(f)
+        except Exception, e:
+            warn("Ignoring bad provider cache: %s"%(e))
+        return
+
+
+    def save_provider_cache(self):
+        if not self.provider_cache_file or not self.provider_cache_dirty:
+            return
+        oelite.util.makedirs(os.path.dirname(self.provider_cache_file))
+        tmpfile = "%s.%d"%(self.provider_cache_file, os.getpid())
+        with open(tmpfile, "wb") as f:
+            cPickle.dump(oelite.meta.cache.pickle_abi(), f, 2)
+            cPickle.dump(self.cookbook.signature(), f, 2)
+            cPickle.dump(self._cached_provider, f, 2)
+        os.rename(tmpfile, self.provider_cache_file)
+        self.provider_cache_dirty = False
+        return
+
+
+    def _set_cached_provider(self, t, package_id):
+        if self._cached_provider.get(t, -1) != package_id:
+            self._cached_provider[t] = package_id
+            self.provider_cache_dirty = True
         return
 
 
@@ -397,6 +377,17 @@ class OEliteRunQueue:
             assert item.version is None or item.version == provider.version
             return provider
 
+        t = (item.type, item.name, item.version)
+        if t in self._cached_provider:
+            package_id = self._cached_provider[t]
+            if package_id is None:
+                if allow_no_provider:
+                    return None
+                raise NoProvider(item)
+            provider = self.cookbook.get_package(id=package_id)
+            self._set_provider(item, provider)
+            return provider
+
         def choose_provider(providers):
             import bb.utils
 
@@ -437,6 +428,7 @@ class OEliteRunQueue:
         providers = self.cookbook.get_providers(
             item.type, item.name, item.version)
         if len(providers) == 0:
+            self._set_cached_provider(t, None)
             if allow_no_provider:
                 return None
             raise NoProvider(item)
@@ -517,6 +509,11 @@ class OEliteRunQueue:
         return tasks
 
 
+    def get_tasks_to_build(self):
+        return flatten_single_column_rows(self.dbc.execute(
+                "SELECT task FROM runq.task WHERE build IS NOT NULL"))
+
+
     def get_tasks_to_build_description(self, hashinfo=False):
         tasks = []
         if hashinfo:
@@ -1044,3 +1041,17 @@ class OEliteRunQueue:
         assert isinstance(task, oelite.task.OEliteTask)
         return flatten_single_value(self.dbc.execute(
                 "SELECT buildhash FROM runq.task WHERE task=?", (task.id,)))
+
+
+    def set_task_buildhash(self, task, buildhash):
+        assert isinstance(task, oelite.task.OEliteTask)
+        self.dbc.execute(
+            "UPDATE runq.task SET buildhash=? WHERE task=?",
+            (buildhash, task.id))
+        return
+
+
+    def get_task_tmphash(self, task):
+        assert isinstance(task, oelite.task.OEliteTask)
+        return flatten_single_value(self.dbc.execute(
+                "SELECT tmphash FROM runq.task WHERE task=?", (task.id,)))
@@ -0,0 +1,177 @@
+from oebakery import die, err, warn, info, debug
+import oelite.util
+
+import os
+import heapq
+
+
+class TaskHistory:
+    """Persistent history of a per-task measurement, keyed by task (as
+    printed, fx. "machine:gcc_4.9:do_compile")."""
+
+    # Estimate tasks not seen before from tasks with the same name
+    estimate_by_name = False
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.values = {}
+        self.name_estimates = None
+        self.dirty = False
+        if not filename or not os.path.exists(filename):
+            return
+        try:
+            with open(filename) as f:
+                for line in f:
+                    (task, value) = line.split()
+                    self.values[task] = float(value)
+        except Exception, e:
+            warn("Ignoring bad task history %s: %s"%(filename, e))
+            self.values = {}
+        return
+
+    def __contains__(self, task):
+        return str(task) in self.values
+
+    def combine(self, previous, value):
+        return value
+
+    def add(self, task, value):
+        task = str(task)
+        previous = self.values.get(task)
+        if previous is not None:
+            value = self.combine(previous, value)
+        self.values[task] = value
+        self.name_estimates = None
+        self.dirty = True
+        return
+
+    def estimate(self, task):
+        """Return expected value for task, or 0 if unknown."""
+        task = str(task)
+        try:
+            return self.values[task]
+        except KeyError:
+            pass
+        if not self.estimate_by_name:
+            return 0.0
+        if self.name_estimates is None:
+            sums = {}
+            for (other, value) in self.values.iteritems():
+                name = other.rsplit(":", 1)[-1]
+                (n, s) = sums.get(name, (0, 0.0))
+                sums[name] = (n + 1, s + value)
+            self.name_estimates = {}
+            for (name, (n, s)) in sums.iteritems():
+                self.name_estimates[name] = s / n
+        return self.name_estimates.get(task.rsplit(":", 1)[-1], 0.0)
+
+    def save(self):
+        if not self.filename or not self.dirty:
+            return
+        oelite.util.makedirs(os.path.dirname(self.filename))
+        tmpfile = "%s.%d"%(self.filename, os.getpid())
+        with open(tmpfile, "w") as f:
+            for task in sorted(self.values):
+                f.write("%s\t%.3f\n"%(task, self.values[task]))
+        os.rename(tmpfile, self.filename)
+        self.dirty = False
+        return
+
+
+class TaskDurations(TaskHistory):
+    """Durations of tasks in previous builds.  For tasks not seen
+    before, the mean duration of tasks with the same name is used."""
+
+    estimate_by_name = True
+
+    def combine(self, previous, duration):
+        # Average with the previous duration, so a single odd build
+        # (fx. on a busy host) does not decide the priority.
+        return (previous + duration) / 2
+
+
+class TaskMemory(TaskHistory):
+    """Peak memory usage (in bytes) of tasks in previous builds."""
+
+    def combine(self, previous, maxrss):
+        # Follow increases immediately, but only let a single build
+        # with lower memory usage halve the difference.
+        return max(maxrss, (previous + maxrss) / 2)
+
+
+def critical_paths(deps, duration):
+    """Return dict with the weighted longest path from each task to
+    the end of the build, ie. the duration of the task itself plus
+    the longest path of any task depending on it.
+
+    Arguments:
+    deps -- dict of task -> iterable of tasks it depends on
+    duration -- function returning the (expected) duration of a task
+    """
+    children = {}
+    for task in deps:
+        children.setdefault(task, [])
+        for parent in deps[task]:
+            children.setdefault(parent, []).append(task)
+    remaining = {}
+    ready = []
+    for task in children:
+        remaining[task] = len(children[task])
+        if not children[task]:
+            ready.append(task)
+    path = {}
+    while ready:
+        task = ready.pop()
+        path[task] = duration(task) + max(
+            [path[child] for child in children[task]] or [0.0])
+        for parent in deps.get(task, ()):
+            remaining[parent] -= 1
+            if remaining[parent] == 0:
+                ready.append(parent)
+    if len(path) != len(children):
+        # Should not happen, circular task dependencies are detected
+        # when the runqueue is built.
+        for task in children:
+            if not task in path:
+                path[task] = duration(task)
+    return path
+
+
+def simulate(deps, duration, weight, capacity, key):
+    """Simulate a build in an oven with the given capacity, starting
+    ready tasks in order of key (lowest first) whenever there is free
+    capacity, like the baker does.  Returns the makespan.
+
+    Arguments:
+    deps -- dict of task -> iterable of tasks it depends on
+    duration -- dict of task -> duration
+    weight -- dict of task -> weight
+    capacity -- oven capacity
+    key -- function returning the priority key of a task.  Called
+        when the task becomes ready.
+    """
+    waiting = {}
+    children = {}
+    for task in deps:
+        waiting[task] = len(deps[task])
+        for parent in deps[task]:
+            children.setdefault(parent, []).append(task)
+    pending = []
+    for task in deps:
+        if not waiting[task]:
+            heapq.heappush(pending, (key(task), task))
+    baking = []
+    now = 0.0
+    free = capacity
+    while pending or baking:
+        while pending and (free > 0 or not baking):
+            (_, task) = heapq.heappop(pending)
+            free -= weight.get(task, 1)
+            heapq.heappush(baking, (now + duration.get(task, 0.0), task))
+        (now, task) = heapq.heappop(baking)
+        free += weight.get(task, 1)
+        for child in children.get(task, ()):
+            waiting[child] -= 1
+            if not waiting[child]:
+                heapq.heappush(pending, (key(child), child))
+    return now
@@ -0,0 +1,154 @@
+from oebakery import die, err, warn, info, debug
+import oelite.util
+
+import os
+import errno
+
+
+class StampIndex:
+    """Index of task stamp files.
+
+    Each STAMPDIR is listed once, and all stamps in it are read in one
+    go, instead of probing each stamp file with several stat calls.
+
+    If a journal filename is given, all stamps written are also
+    appended to the journal, and stamps found in the journal are not
+    read from the stamp files, unless the mtime of the stamp file
+    differs from the journal (fx. if written by a build without the
+    journal).  The stamp directory is still listed, so that stamps
+    removed (fx. by rmwork or do_clean) are not used.
+    """
+
+    def __init__(self, journal=None):
+        self.dirs = {}
+        self.journal = journal
+        self.journal_stamps = {}
+        self.journal_fd = None
+        self.stats = { "listdir": 0, "read": 0, "journal": 0, "lstat": 0 }
+        if journal:
+            self.load_journal()
+        return
+
+    def load_journal(self):
+        lines = 0
+        try:
+            with open(self.journal) as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        (stampfile, mtime, stamp) = line.rstrip("\n").split("\t")
+                        self.journal_stamps[stampfile] = (float(mtime), stamp)
+                    except ValueError:
+                        # Probably a partially written line from an
+                        # interrupted build
+                        continue
+        except IOError, e:
+            if e.errno != errno.ENOENT:
+                warn("Ignoring bad stamp journal %s: %s"%(self.journal, e))
+            return
+        if lines > 2 * len(self.journal_stamps) + 1000:
+            self.compact_journal()
+        return
+
+    def compact_journal(self):
+        tmpfile = "%s.%d"%(self.journal, os.getpid())
+        with open(tmpfile, "w") as f:
+            for stampfile in sorted(self.journal_stamps):
+                (mtime, stamp) = self.journal_stamps[stampfile]
+                f.write("%s\t%.6f\t%s\n"%(stampfile, mtime, stamp))
+        os.rename(tmpfile, self.journal)
+        return
+
+    def scan(self, stampdir):
+        """Return dict of stamps in stampdir: name -> (mtime, stamp)."""
+        try:
+            return self.dirs[stampdir]
+        except KeyError:
+            pass
+        stamps = self.dirs[stampdir] = {}
+        self.stats["listdir"] += 1
+        try:
+            names = os.listdir(stampdir)
+        except OSError, e:
+            if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                raise
+            return stamps
+        for name in names:
+            stampfile = os.path.join(stampdir, name)
+            stamp = self.journal_stamps.get(stampfile)
+            if stamp is not None and self.is_current(stampfile, stamp[0]):
+                stamps[name] = stamp
+                self.stats["journal"] += 1
+                continue
+            stamps[name] = self.read_stampfile(stampfile)
+        return stamps
+
+    def is_current(self, stampfile, mtime):
+        """Return True if the stamp file has the mtime recorded in the
+        journal, ie. it is not written since."""
+        self.stats["lstat"] += 1
+        try:
+            st = os.lstat(stampfile)
+        except OSError:
+            return False
+        # The journal has the mtime with microsecond precision
+        return abs(st.st_mtime - mtime) < 0.00001
+
+    def read_stampfile(self, stampfile):
+        self.stats["read"] += 1
+        try:
+            with open(stampfile, "r") as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                return (mtime, f.read())
+        except IOError, e:
+            if e.errno == errno.EISDIR:
+                return (None, IOError)
+            if e.errno == errno.ENOENT:
+                return (None, None)
+            raise
+
+    def read(self, stampdir, name):
+        """Return (mtime, hash) from stamp file, or (None, None) if
+        there is no (complete) stamp."""
+        (mtime, stamp) = self.scan(stampdir).get(name, (None, None))
+        if stamp is IOError:
+            die("bad hash file: %s"%(os.path.join(stampdir, name)))
+        if not stamp:
+            return (None, None)
+        return (mtime, stamp)
+
+    def write(self, stampdir, name, stamp):
+        if not os.path.exists(stampdir):
+            os.makedirs(stampdir)
+        stampfile = os.path.join(stampdir, name)
+        with open(stampfile, "w") as f:
+            f.write(stamp)
+            f.flush()
+            mtime = os.fstat(f.fileno()).st_mtime
+        if stampdir in self.dirs:
+            self.dirs[stampdir][name] = (mtime, stamp)
+        if self.journal:
+            self.journal_append(stampfile, mtime, stamp)
+        return
+
+    def journal_append(self, stampfile, mtime, stamp):
+        self.journal_stamps[stampfile] = (mtime, stamp)
+        if self.journal_fd is None:
+            oelite.util.makedirs(os.path.dirname(self.journal))
+            self.journal_fd = os.open(
+                self.journal, os.O_WRONLY|os.O_APPEND|os.O_CREAT, 0666)
+        # A single write() with O_APPEND, so that lines are not mixed
+        # with lines written by concurrent builds.
+        os.write(self.journal_fd, "%s\t%.6f\t%s\n"%(stampfile, mtime, stamp))
+        return
+
+    def close(self):
+        if self.journal_fd is not None:
+            os.close(self.journal_fd)
+            self.journal_fd = None
+        return
+
+    def write_stats(self, f):
+        for (name, count) in sorted(self.stats.iteritems()):
+            f.write("%s\t%d\n"%(name, count))
+        return
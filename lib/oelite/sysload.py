@@ -0,0 +1,106 @@
+from oebakery import die, err, warn, info, debug
+
+import os
+
+
+def cpu_count():
+    try:
+        return os.sysconf("SC_NPROCESSORS_ONLN")
+    except (ValueError, OSError):
+        return 1
+
+
+def loadavg():
+    """Return the 1 minute load average, or None if it is not
+    available."""
+    try:
+        with open("/proc/loadavg") as f:
+            return float(f.read().split()[0])
+    except (IOError, ValueError, IndexError):
+        return None
+
+
+def memavail():
+    """Return the amount of memory (in bytes) available for starting
+    new processes without swapping, or None if it is not available."""
+    try:
+        with open("/proc/meminfo") as f:
+            meminfo = {}
+            for line in f:
+                fields = line.split()
+                meminfo[fields[0].rstrip(":")] = int(fields[1]) * 1024
+    except (IOError, ValueError, IndexError):
+        return None
+    try:
+        return meminfo["MemAvailable"]
+    except KeyError:
+        pass
+    # Kernels before 3.14 does not have MemAvailable
+    try:
+        return meminfo["MemFree"] + meminfo["Buffers"] + meminfo["Cached"]
+    except KeyError:
+        return None
+
+
+def disk_free(path):
+    """Return the disk space (in bytes) available to unprivileged
+    users on the file system of path, or None if it is not
+    available."""
+    try:
+        st = os.statvfs(path)
+    except (OSError, AttributeError):
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+def process_tree():
+    """Return tuple of dicts of pid -> command name, pid -> list of
+    child pids and pid -> resident memory (in bytes) of all processes,
+    or None if /proc is not available."""
+    if not os.path.isdir("/proc/self"):
+        return None
+    pagesize = os.sysconf("SC_PAGE_SIZE")
+    comms = {}
+    children = {}
+    rss = {}
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat"%(pid)) as f:
+                stat = f.read()
+        except IOError:
+            # Process exited while listing
+            continue
+        # The command name is in parentheses, and may itself contain
+        # parentheses and spaces
+        comm_end = stat.rindex(")")
+        pid = int(pid)
+        comms[pid] = stat[stat.index("(") + 1:comm_end]
+        fields = stat[comm_end + 2:].split()
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21]) * pagesize
+    return (comms, children, rss)
+
+
+def tree_rss(tree, pid):
+    """Return the total resident memory (in bytes) of the processes in
+    the process tree (as returned by process_tree()) rooted at pid."""
+    (comms, children, rss) = tree
+    total = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+def parse_size(size):
+    """Parse a size like "512M" or "2G" into a number of bytes."""
+    size = size.strip()
+    units = { "K": 1<<10, "M": 1<<20, "G": 1<<30, "T": 1<<40 }
+    unit = size[-1:].upper()
+    if unit in units:
+        return int(float(size[:-1]) * units[unit])
+    return int(size)
@@ -5,13 +5,13 @@ import oelite.recipe
 from oelite.dbutil import *
 import oelite.function
 import oelite.util
+import oelite.sysload
 from oelite.compat import open_cloexec
 
 import sys
 import os
 import warnings
 import shutil
-import re
 
 def task_name(name):
     if name.startswith("do_"):
@@ -21,8 +21,6 @@ def task_name(name):
 
 class OEliteTask:
 
-    TASKFUNC_RE = re.compile(r"^do_[a-z]+")
-
     def __init__(self, id, recipe, name, nostamp, cookbook):
         self.id = id
         self.recipe = cookbook.get_recipe(id=recipe)
@@ -32,82 +30,120 @@ class OEliteTask:
         self.debug = self.cookbook.debug
         self._meta = None
         self.result = None
+        self.maxrss = None
+        # Peak total memory usage of the process tree, as sampled by
+        # the oven while running
+        self.peak_rss = 0
+        self.faked = None
         return
 
     def __str__(self):
         return "%s:%s"%(self.recipe, self.name)
 
     def get_weight(self, meta):
-        if not self.name == "do_compile":
+        weight = meta.get_flag(self.name, "weight", oelite.meta.FULL_EXPANSION)
+        if weight:
+            try:
+                return int(weight)
+            except ValueError:
+                die("%s: invalid weight flag: %r"%(self, weight))
+        if not self.is_parallel(meta):
             return 1
+        return int(meta.get("PARALLEL_MAKE").replace("-j", ""))
+
+    def is_parallel(self, meta):
+        """Return True if the task runs PARALLEL_MAKE jobs, ie. it may
+        be given another number of jobs when started."""
+        if not self.name == "do_compile":
+            return False
+        if meta.get_flag(self.name, "weight"):
+            return False
         pmake = meta.get("PARALLEL_MAKE")
-        if pmake is None or pmake == "":
-            return 1
-        return int(pmake.replace("-j", ""))
+        return not (pmake is None or pmake == "")
+
+    def uses_jobserver(self, meta):
+        """Return True if the parallel jobs of the task may be run with
+        the jobserver of the oven, ie. unless disabled with the
+        nojobserver task flag (fx. for tasks not running make)."""
+        if not self.is_parallel(meta):
+            return False
+        return not meta.get_flag(self.name, "nojobserver")
+
+    def get_memory(self, meta):
+        """Return memory usage of task (in bytes) specified with the
+        memory task flag (fx. do_compile[memory] = "4G"), or None."""
+        memory = meta.get_flag(self.name, "memory", oelite.meta.FULL_EXPANSION)
+        if not memory:
+            return None
+        try:
+            return oelite.sysload.parse_size(memory)
+        except ValueError:
+            die("%s: invalid memory flag: %r"%(self, memory))
+
+    def set_parallel_jobs(self, jobs):
+        self.meta().set("PARALLEL_MAKE", "-j%d"%(jobs))
+        self.weight = jobs
+
+    def set_jobserver(self, makeflags):
+        """Run the make jobs of the task with the jobserver given by
+        makeflags, instead of its own PARALLEL_MAKE jobs."""
+        meta = self.meta()
+        # A -j option on the make command line disables the jobserver
+        meta.set("PARALLEL_MAKE", "")
+        meta.set("MAKEFLAGS", makeflags)
+        meta.set_flag("MAKEFLAGS", "export", True)
+        self.weight = 1
+
+    def pid(self):
+        """Return pid of the shell process running the task function,
+        or None if it is not running."""
+        function = getattr(self, "function", None)
+        subprocess = getattr(function, "subprocess", None)
+        if subprocess is None or subprocess.returncode is not None:
+            return None
+        return subprocess.pid
 
     def get_parents(self):
-        parents = flatten_single_column_rows(self.cookbook.dbc.execute(
-            "SELECT parent FROM task_parent WHERE recipe=? AND task=?",
-            (self.recipe.id, self.name,)))
+        parents = self.cookbook.get_task_parents(self)
         if not parents:
             return []
         return self.cookbook.get_tasks(recipe=self.recipe, name=parents)
 
     def get_deptasks(self, deptype):
-        return flatten_single_column_rows(self.cookbook.dbc.execute(
-            "SELECT deptask FROM task_deptask "
-            "WHERE deptype=? "
-            "AND task=?", (deptype,self.id)))
+        return list(self.cookbook.get_task_deptasks(self, deptype))
 
     def get_recdeptasks(self, deptype):
-        return flatten_single_column_rows(self.cookbook.dbc.execute(
-            "SELECT recdeptask FROM task_recdeptask "
-            "WHERE deptype=? "
-            "AND task=?", (deptype,self.id)))
+        return list(self.cookbook.get_task_recdeptasks(self, deptype))
 
 
     def stampfile_path(self):
         try:
             return self._stampfile
         except AttributeError:
-            stampdir = self.recipe.get("STAMPDIR")
+            stampdir = self.recipe.get_stampdir()
             self._stampfile = (stampdir, os.path.join(stampdir, self.name))
         return self._stampfile
 
 
     # return (mtime, hash) from stamp file
     def read_stamp(self):
-        stampfile = self.stampfile_path()[1]
-        if not os.path.exists(stampfile):
-            return (None, None)
-        if not os.path.isfile(stampfile):
-            die("bad hash file: %s"%(stampfile))
-        if os.path.getsize(stampfile) == 0:
-            return (None, None)
-        mtime = os.stat(stampfile).st_mtime
-        with open(stampfile, "r") as stampfile:
-            tmphash = stampfile.read()
-        return (mtime, tmphash)
+        stampdir = self.stampfile_path()[0]
+        return self.cookbook.baker.stamps.read(stampdir, self.name)
 
 
     def build_started(self):
         if self.nostamp:
             return
-        (stampdir, stampfile) = self.stampfile_path()
-        if not os.path.exists(stampdir):
-            os.makedirs(stampdir)
-        open(stampfile, "w").close()
+        stampdir = self.stampfile_path()[0]
+        self.cookbook.baker.stamps.write(stampdir, self.name, "")
         return
 
 
     def build_done(self, buildhash):
         if self.nostamp:
             return
-        (stampdir, stampfile) = self.stampfile_path()
-        if not os.path.exists(stampdir):
-            os.makedirs(stampdir)
-        with open(stampfile, "w") as _stampfile:
-            _stampfile.write(buildhash)
+        stampdir = self.stampfile_path()[0]
+        self.cookbook.baker.stamps.write(stampdir, self.name, buildhash)
         return
 
 
@@ -138,65 +174,42 @@ class OEliteTask:
                     stage[filename] = package
             return stage
 
+        # The data hashes of the tasks of the recipe, fx. for the
+        # source cache key (see oelite.fetch.srccache)
+        meta["__datahash"] = self.recipe.task_datahashes
+
         meta["__stage"] = prepare_stage("DEPENDS")
         meta["__rstage"] = prepare_stage("RDEPENDS")
         meta["__fstage"] = prepare_stage("FDEPENDS")
 
-    @oelite.profiling.profile_calls
-    def filter_meta(self):
-        meta = self._meta
-        assert(meta is not None)
-        # Filter meta-data, enforcing restrictions on which tasks to
-        # emit vars to and not including other task functions.
-        emit_prefixes = (meta.get("META_EMIT_PREFIX") or "").split()
-        def emit_prefix_pair(s):
-            task, prefix = s.split(":", 1)
-            if task:
-                task = "do_" + task
-            return (task, prefix)
-        # To avoid looping over the entire ~20 element list of pairs
-        # for every variable, split that list according to the first
-        # character of the prefix, and fetch the appropriate list
-        # based on var[0].
-        emit_prefix_table = {}
-        for s in emit_prefixes:
-            p = emit_prefix_pair(s)
-            c = p[1][0]
-            if c in emit_prefix_table:
-                emit_prefix_table[c].append(p)
-            else:
-                emit_prefix_table[c] = [p]
-        for var in meta.keys():
-            emit_flag = meta.get_flag(var, "emit")
-            emit = (emit_flag or "").split()
-            taskfunc_match = self.TASKFUNC_RE.match(var)
-            if taskfunc_match:
-                emit.append(taskfunc_match.group(0))
-            for emit_task, emit_prefix in emit_prefix_table.get(var[0], []):
-                if not var.startswith(emit_prefix):
-                    continue
-                if emit_task == "":
-                    if emit_flag is None:
-                        emit_flag = ""
-                    continue
-                emit.append(emit_task)
-            if (emit or emit_flag == "") and not self.name in emit:
-                del meta[var]
-                continue
-
     @oelite.profiling.profile_calls
     def meta(self):
         if self._meta is not None:
             return self._meta
         self.recipe.meta._fill_expand_cache()
-        self._meta = self.recipe.meta.copy()
-        self.filter_meta()
+        # Only copy the variables to be emitted to this task, as
+        # given by the emit restrictions (the emit flag and
+        # META_EMIT_PREFIX), and not including other task functions.
+        self._meta = self.recipe.meta.project(
+            self.recipe.get_emit_vars(self.name))
         self._meta.trim()
         return self._meta
 
+    def uses_fakeroot(self, meta):
+        for name in ([self.name] +
+                     (meta.get_flag(self.name, "prefuncs", 1) or "").split() +
+                     (meta.get_flag(self.name, "postfuncs", 1) or "").split()):
+            if meta.get_flag(name, "fakeroot"):
+                return True
+        return False
+
     def prepare_context(self):
         meta = self.meta()
         self.function = meta.get_function(self.name)
+        if self.uses_fakeroot(meta):
+            self.faked = self.recipe.get_faked_session()
+            if self.faked:
+                meta.set("FAKEROOT", self.faked.command())
         self.do_cleandirs()
         self.cwd = self.do_dirs() or meta.get("B")
         self.stdin = open_cloexec("/dev/null", os.O_RDONLY)
@@ -290,6 +303,7 @@ class OEliteTask:
         try:
             # Do the actual wait
             self.result = self.function.wait(poll)
+            self.maxrss = self.function.maxrss
             assert(self.result in (True, False, None))
             assert(poll or self.result is not None)
             # This may have returned None, in case we were just
@@ -335,7 +349,9 @@ class OEliteTask:
                     continue
                 try:
                     #print "cleandir %s"%(cleandir)
-                    if os.path.islink(cleandir):
+                    if self.faked:
+                        self.faked.rmtree(cleandir)
+                    elif os.path.islink(cleandir):
                         os.unlink(cleandir)
                     else:
                         shutil.rmtree(cleandir)
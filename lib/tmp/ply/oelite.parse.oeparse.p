@@ -0,0 +1,3344 @@
+S'3.10'
+p1
+.S'LALR'
+p1
+.S'syntaxADDHOOK ADDTASK AFTER APPEND ARGSTART ARGSTOP ASSIGN BEFORE COMMENT DEF EXPASSIGN EXPORT FAKEROOT FLAG FUNCLINE FUNCSTART FUNCSTOP HOOK HOOKNAME HOOKSEQUENCE INCLUDE INCLUDEFILE INHERIT INHERITCLASS LAYER LAYERNAME LAZYASSIGN NEWLINE OVERRIDE PACKAGE PACKAGENAME POSTDOT PREDOT PREFER PREPEND PYTHON QUOTE RECIPE RECIPENAME REQUIRE STRING TASK TO VARNAME VERSION VERSIONNAME WEAKASSIGNsyntax : statement\n                  | statement syntaxstatement : NEWLINE\n                     | assignment NEWLINE\n                     | export_variable NEWLINE\n                     | include NEWLINE\n                     | require NEWLINE\n                     | inherit NEWLINE\n                     | func NEWLINE\n                     | fakeroot_func NEWLINE\n                     | python_func NEWLINE\n                     | def_func\n                     | addtask NEWLINE\n                     | addhook NEWLINE\n                     | prefer NEWLINE\n                     | COMMENTvariable : VARNAME\n                    | export_variableexport_variable : EXPORT VARNAMEvarflag : VARNAME FLAGvaroverride : VARNAME OVERRIDEstring : empty_string\n                  | quoted_string\n                  | STRINGempty_string : QUOTE QUOTEquoted_string : QUOTE string_value QUOTEstring_value : STRINGstring_value : STRING string_valueassignment : variable ASSIGN stringassignment : varflag ASSIGN stringassignment : varoverride ASSIGN stringassignment : variable EXPASSIGN stringassignment : varflag EXPASSIGN stringassignment : varoverride EXPASSIGN stringassignment : variable LAZYASSIGN stringassignment : variable WEAKASSIGN stringassignment : varflag WEAKASSIGN stringassignment : varoverride WEAKASSIGN stringassignment : variable APPEND stringassignment : varflag APPEND stringassignment : varoverride APPEND stringassignment : variable PREPEND stringassignment : varflag PREPEND stringassignment : varoverride PREPEND stringassignment : variable PREDOT stringassignment : varflag PREDOT stringassignment : varoverride PREDOT stringassignment : variable POSTDOT stringassignment : varflag POSTDOT stringassignment : varoverride POSTDOT stringinclude : INCLUDE INCLUDEFILErequire : REQUIRE INCLUDEFILEinherit : INHERIT inherit_classesinherit_classes : INHERITCLASSinherit_classes : INHERITCLASS inherit_classesaddtask : addtask_taskaddtask : addtask_task addtask_dependenciesaddtask_task : ADDTASK TASKaddtask_dependencies : addtask_dependencyaddtask_dependencies : addtask_dependency addtask_dependenciesaddtask_dependency : addtask_after\n                              | addtask_beforeaddtask_after : AFTER tasksaddtask_before : BEFORE taskstasks : TASKtasks : TASK tasksaddhook : ADDHOOK HOOK TO HOOKNAMEaddhook : ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCEaddhook : ADDHOOK HOOK TO HOOKNAME addhook_dependenciesaddhook : ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCE addhook_dependenciesaddhook_dependencies : addhook_dependencyaddhook_dependencies : addhook_dependency addhook_dependenciesaddhook_dependency : addhook_after\n                              | addhook_beforeaddhook_after : AFTER hooksaddhook_before : BEFORE hookshooks : HOOKhooks : HOOK hooksprefer : PREFER recipe maybe_layer maybe_versionprefer : PREFER packages maybe_recipe maybe_layer maybe_versionrecipe : RECIPE RECIPENAMEmaybe_recipe : maybe_recipe : recipelayer : LAYER LAYERNAMEmaybe_layer : maybe_layer : layerversion : VERSION VERSIONNAMEmaybe_version : maybe_version : versionpackages : PACKAGE packagepackage : PACKAGENAMEpackage : PACKAGENAME packagefunc : VARNAME FUNCSTART func_body FUNCSTOPfunc_body : FUNCLINEfunc_body : FUNCLINE func_bodyfakeroot_func : FAKEROOT funcpython_func : python_func_start func_body FUNCSTOPpython_func_start : PYTHON VARNAME FUNCSTARTdef_func : DEF VARNAME def_funcargs NEWLINE func_body\n                    | DEF VARNAME def_funcargs NEWLINE func_body FUNCSTOPdef_funcargs : ARGSTART STRING ARGSTOPdef_funcargs : ARGSTART ARGSTOP'
+p1
+.(dp1
+I0
+(dp2
+S'COMMENT'
+p3
+I9
+sS'ADDTASK'
+p4
+I25
+sS'PYTHON'
+p5
+I26
+sS'VARNAME'
+p6
+I4
+sS'REQUIRE'
+p7
+I29
+sS'NEWLINE'
+p8
+I10
+sS'PREFER'
+p9
+I30
+sS'INHERIT'
+p10
+I20
+sS'FAKEROOT'
+p11
+I31
+sS'EXPORT'
+p12
+I8
+sS'ADDHOOK'
+p13
+I7
+sS'INCLUDE'
+p14
+I24
+sS'DEF'
+p15
+I14
+ssI1
+(dp16
+S'NEWLINE'
+p17
+I33
+ssI2
+(dp18
+g3
+I-12
+sg4
+I-12
+sg5
+I-12
+sg6
+I-12
+sg7
+I-12
+sg8
+I-12
+sg9
+I-12
+sg10
+I-12
+sg11
+I-12
+sg12
+I-12
+sg13
+I-12
+sg14
+I-12
+sg15
+I-12
+sS'$end'
+p19
+I-12
+ssI3
+(dp20
+g17
+I-56
+sS'AFTER'
+p21
+I37
+sS'BEFORE'
+p22
+I39
+ssI4
+(dp23
+S'LAZYASSIGN'
+p24
+I-17
+sS'EXPASSIGN'
+p25
+I-17
+sS'WEAKASSIGN'
+p26
+I-17
+sS'PREDOT'
+p27
+I-17
+sS'POSTDOT'
+p28
+I-17
+sS'PREPEND'
+p29
+I-17
+sS'FLAG'
+p30
+I40
+sS'OVERRIDE'
+p31
+I41
+sS'FUNCSTART'
+p32
+I42
+sS'ASSIGN'
+p33
+I-17
+sS'APPEND'
+p34
+I-17
+ssI5
+(dp35
+S'NEWLINE'
+p36
+I43
+ssI6
+(dp37
+S'$end'
+p38
+I0
+ssI7
+(dp39
+S'HOOK'
+p40
+I44
+ssI8
+(dp41
+S'VARNAME'
+p42
+I45
+ssI9
+(dp43
+g3
+I-16
+sg4
+I-16
+sg5
+I-16
+sg6
+I-16
+sg7
+I-16
+sg8
+I-16
+sg9
+I-16
+sg10
+I-16
+sg11
+I-16
+sg12
+I-16
+sg13
+I-16
+sg14
+I-16
+sg15
+I-16
+sg19
+I-16
+ssI10
+(dp44
+g3
+I-3
+sg4
+I-3
+sg5
+I-3
+sg6
+I-3
+sg7
+I-3
+sg8
+I-3
+sg9
+I-3
+sg10
+I-3
+sg11
+I-3
+sg12
+I-3
+sg13
+I-3
+sg14
+I-3
+sg15
+I-3
+sg19
+I-3
+ssI11
+(dp45
+S'WEAKASSIGN'
+p46
+I46
+sS'PREDOT'
+p47
+I47
+sS'POSTDOT'
+p48
+I48
+sS'PREPEND'
+p49
+I49
+sS'EXPASSIGN'
+p50
+I50
+sS'ASSIGN'
+p51
+I51
+sS'APPEND'
+p52
+I52
+ssI12
+(dp53
+g24
+I-18
+sg26
+I-18
+sg27
+I-18
+sS'NEWLINE'
+p54
+I53
+sg28
+I-18
+sg29
+I-18
+sg25
+I-18
+sg33
+I-18
+sg34
+I-18
+ssI13
+(dp55
+S'NEWLINE'
+p56
+I54
+ssI14
+(dp57
+S'VARNAME'
+p58
+I55
+ssI15
+(dp59
+g3
+I9
+sg4
+I25
+sg5
+I26
+sg6
+I4
+sg7
+I29
+sg8
+I10
+sg9
+I30
+sg10
+I20
+sg11
+I31
+sg12
+I8
+sg13
+I7
+sg14
+I24
+sg15
+I14
+sg19
+I-1
+ssI16
+(dp60
+S'NEWLINE'
+p61
+I57
+ssI17
+(dp62
+S'WEAKASSIGN'
+p63
+I58
+sS'PREDOT'
+p64
+I59
+sS'POSTDOT'
+p65
+I60
+sS'PREPEND'
+p66
+I61
+sS'EXPASSIGN'
+p67
+I62
+sS'ASSIGN'
+p68
+I63
+sS'APPEND'
+p69
+I64
+ssI18
+(dp70
+S'FUNCLINE'
+p71
+I66
+ssI19
+(dp72
+S'NEWLINE'
+p73
+I67
+ssI20
+(dp74
+S'INHERITCLASS'
+p75
+I68
+ssI21
+(dp76
+S'NEWLINE'
+p77
+I70
+ssI22
+(dp78
+g24
+I71
+sg26
+I72
+sg27
+I73
+sg28
+I74
+sg29
+I75
+sg25
+I76
+sg33
+I77
+sg34
+I78
+ssI23
+(dp79
+S'NEWLINE'
+p80
+I79
+ssI24
+(dp81
+S'INCLUDEFILE'
+p82
+I80
+ssI25
+(dp83
+S'TASK'
+p84
+I81
+ssI26
+(dp85
+S'VARNAME'
+p86
+I82
+ssI27
+(dp87
+S'NEWLINE'
+p88
+I83
+ssI28
+(dp89
+S'NEWLINE'
+p90
+I84
+ssI29
+(dp91
+S'INCLUDEFILE'
+p92
+I85
+ssI30
+(dp93
+S'RECIPE'
+p94
+I86
+sS'PACKAGE'
+p95
+I87
+ssI31
+(dp96
+g6
+I90
+ssI32
+(dp97
+S'NEWLINE'
+p98
+I92
+ssI33
+(dp99
+g3
+I-13
+sg4
+I-13
+sg5
+I-13
+sg6
+I-13
+sg7
+I-13
+sg8
+I-13
+sg9
+I-13
+sg10
+I-13
+sg11
+I-13
+sg12
+I-13
+sg13
+I-13
+sg14
+I-13
+sg15
+I-13
+sg19
+I-13
+ssI34
+(dp100
+g17
+I-57
+ssI35
+(dp101
+g17
+I-59
+sg21
+I37
+sg22
+I39
+ssI36
+(dp102
+g17
+I-61
+sg21
+I-61
+sg22
+I-61
+ssI37
+(dp103
+S'TASK'
+p104
+I95
+ssI38
+(dp105
+g17
+I-62
+sg21
+I-62
+sg22
+I-62
+ssI39
+(dp106
+g104
+I95
+ssI40
+(dp107
+g46
+I-20
+sg47
+I-20
+sg48
+I-20
+sg49
+I-20
+sg50
+I-20
+sg51
+I-20
+sg52
+I-20
+ssI41
+(dp108
+g63
+I-21
+sg64
+I-21
+sg65
+I-21
+sg66
+I-21
+sg67
+I-21
+sg68
+I-21
+sg69
+I-21
+ssI42
+(dp109
+g71
+I66
+ssI43
+(dp110
+g3
+I-15
+sg4
+I-15
+sg5
+I-15
+sg6
+I-15
+sg7
+I-15
+sg8
+I-15
+sg9
+I-15
+sg10
+I-15
+sg11
+I-15
+sg12
+I-15
+sg13
+I-15
+sg14
+I-15
+sg15
+I-15
+sg19
+I-15
+ssI44
+(dp111
+S'TO'
+p112
+I98
+ssI45
+(dp113
+g24
+I-19
+sg26
+I-19
+sg27
+I-19
+sg54
+I-19
+sg28
+I-19
+sg29
+I-19
+sg25
+I-19
+sg33
+I-19
+sg34
+I-19
+ssI46
+(dp114
+S'QUOTE'
+p115
+I101
+sS'STRING'
+p116
+I99
+ssI47
+(dp117
+g115
+I101
+sg116
+I99
+ssI48
+(dp118
+g115
+I101
+sg116
+I99
+ssI49
+(dp119
+g115
+I101
+sg116
+I99
+ssI50
+(dp120
+g115
+I101
+sg116
+I99
+ssI51
+(dp121
+g115
+I101
+sg116
+I99
+ssI52
+(dp122
+g115
+I101
+sg116
+I99
+ssI53
+(dp123
+g3
+I-5
+sg4
+I-5
+sg5
+I-5
+sg6
+I-5
+sg7
+I-5
+sg8
+I-5
+sg9
+I-5
+sg10
+I-5
+sg11
+I-5
+sg12
+I-5
+sg13
+I-5
+sg14
+I-5
+sg15
+I-5
+sg19
+I-5
+ssI54
+(dp124
+g3
+I-14
+sg4
+I-14
+sg5
+I-14
+sg6
+I-14
+sg7
+I-14
+sg8
+I-14
+sg9
+I-14
+sg10
+I-14
+sg11
+I-14
+sg12
+I-14
+sg13
+I-14
+sg14
+I-14
+sg15
+I-14
+sg19
+I-14
+ssI55
+(dp125
+S'ARGSTART'
+p126
+I111
+ssI56
+(dp127
+g19
+I-2
+ssI57
+(dp128
+g3
+I-6
+sg4
+I-6
+sg5
+I-6
+sg6
+I-6
+sg7
+I-6
+sg8
+I-6
+sg9
+I-6
+sg10
+I-6
+sg11
+I-6
+sg12
+I-6
+sg13
+I-6
+sg14
+I-6
+sg15
+I-6
+sg19
+I-6
+ssI58
+(dp129
+g115
+I101
+sg116
+I99
+ssI59
+(dp130
+g115
+I101
+sg116
+I99
+ssI60
+(dp131
+g115
+I101
+sg116
+I99
+ssI61
+(dp132
+g115
+I101
+sg116
+I99
+ssI62
+(dp133
+g115
+I101
+sg116
+I99
+ssI63
+(dp134
+g115
+I101
+sg116
+I99
+ssI64
+(dp135
+g115
+I101
+sg116
+I99
+ssI65
+(dp136
+S'FUNCSTOP'
+p137
+I119
+ssI66
+(dp138
+g3
+I-94
+sg4
+I-94
+sg137
+I-94
+sg5
+I-94
+sg6
+I-94
+sg7
+I-94
+sg8
+I-94
+sg9
+I-94
+sg10
+I-94
+sg11
+I-94
+sg12
+I-94
+sg13
+I-94
+sg14
+I-94
+sg71
+I66
+sg15
+I-94
+sg19
+I-94
+ssI67
+(dp139
+g3
+I-4
+sg4
+I-4
+sg5
+I-4
+sg6
+I-4
+sg7
+I-4
+sg8
+I-4
+sg9
+I-4
+sg10
+I-4
+sg11
+I-4
+sg12
+I-4
+sg13
+I-4
+sg14
+I-4
+sg15
+I-4
+sg19
+I-4
+ssI68
+(dp140
+g75
+I68
+sg90
+I-54
+ssI69
+(dp141
+g90
+I-53
+ssI70
+(dp142
+g3
+I-9
+sg4
+I-9
+sg5
+I-9
+sg6
+I-9
+sg7
+I-9
+sg8
+I-9
+sg9
+I-9
+sg10
+I-9
+sg11
+I-9
+sg12
+I-9
+sg13
+I-9
+sg14
+I-9
+sg15
+I-9
+sg19
+I-9
+ssI71
+(dp143
+g115
+I101
+sg116
+I99
+ssI72
+(dp144
+g115
+I101
+sg116
+I99
+ssI73
+(dp145
+g115
+I101
+sg116
+I99
+ssI74
+(dp146
+g115
+I101
+sg116
+I99
+ssI75
+(dp147
+g115
+I101
+sg116
+I99
+ssI76
+(dp148
+g115
+I101
+sg116
+I99
+ssI77
+(dp149
+g115
+I101
+sg116
+I99
+ssI78
+(dp150
+g115
+I101
+sg116
+I99
+ssI79
+(dp151
+g3
+I-10
+sg4
+I-10
+sg5
+I-10
+sg6
+I-10
+sg7
+I-10
+sg8
+I-10
+sg9
+I-10
+sg10
+I-10
+sg11
+I-10
+sg12
+I-10
+sg13
+I-10
+sg14
+I-10
+sg15
+I-10
+sg19
+I-10
+ssI80
+(dp152
+g61
+I-51
+ssI81
+(dp153
+g17
+I-58
+sg21
+I-58
+sg22
+I-58
+ssI82
+(dp154
+S'FUNCSTART'
+p155
+I130
+ssI83
+(dp156
+g3
+I-7
+sg4
+I-7
+sg5
+I-7
+sg6
+I-7
+sg7
+I-7
+sg8
+I-7
+sg9
+I-7
+sg10
+I-7
+sg11
+I-7
+sg12
+I-7
+sg13
+I-7
+sg14
+I-7
+sg15
+I-7
+sg19
+I-7
+ssI84
+(dp157
+g3
+I-8
+sg4
+I-8
+sg5
+I-8
+sg6
+I-8
+sg7
+I-8
+sg8
+I-8
+sg9
+I-8
+sg10
+I-8
+sg11
+I-8
+sg12
+I-8
+sg13
+I-8
+sg14
+I-8
+sg15
+I-8
+sg19
+I-8
+ssI85
+(dp158
+g88
+I-52
+ssI86
+(dp159
+S'RECIPENAME'
+p160
+I131
+ssI87
+(dp161
+S'PACKAGENAME'
+p162
+I132
+ssI88
+(dp163
+g36
+I-85
+sS'LAYER'
+p164
+I134
+sS'VERSION'
+p165
+I-85
+ssI89
+(dp166
+g36
+I-82
+sg164
+I-82
+sg165
+I-82
+sg94
+I86
+ssI90
+(dp167
+g32
+I42
+ssI91
+(dp168
+g80
+I-96
+ssI92
+(dp169
+g3
+I-11
+sg4
+I-11
+sg5
+I-11
+sg6
+I-11
+sg7
+I-11
+sg8
+I-11
+sg9
+I-11
+sg10
+I-11
+sg11
+I-11
+sg12
+I-11
+sg13
+I-11
+sg14
+I-11
+sg15
+I-11
+sg19
+I-11
+ssI93
+(dp170
+g17
+I-60
+ssI94
+(dp171
+g17
+I-63
+sg21
+I-63
+sg22
+I-63
+ssI95
+(dp172
+g17
+I-65
+sg21
+I-65
+sg104
+I95
+sg22
+I-65
+ssI96
+(dp173
+g17
+I-64
+sg21
+I-64
+sg22
+I-64
+ssI97
+(dp174
+S'FUNCSTOP'
+p175
+I140
+ssI98
+(dp176
+S'HOOKNAME'
+p177
+I141
+ssI99
+(dp178
+g73
+I-24
+ssI100
+(dp179
+g73
+I-22
+ssI101
+(dp180
+S'QUOTE'
+p181
+I142
+sS'STRING'
+p182
+I144
+ssI102
+(dp183
+g73
+I-23
+ssI103
+(dp184
+g73
+I-37
+ssI104
+(dp185
+g73
+I-46
+ssI105
+(dp186
+g73
+I-49
+ssI106
+(dp187
+g73
+I-43
+ssI107
+(dp188
+g73
+I-33
+ssI108
+(dp189
+g73
+I-30
+ssI109
+(dp190
+g73
+I-40
+ssI110
+(dp191
+S'NEWLINE'
+p192
+I145
+ssI111
+(dp193
+S'ARGSTOP'
+p194
+I146
+sS'STRING'
+p195
+I147
+ssI112
+(dp196
+g73
+I-38
+ssI113
+(dp197
+g73
+I-47
+ssI114
+(dp198
+g73
+I-50
+ssI115
+(dp199
+g73
+I-44
+ssI116
+(dp200
+g73
+I-34
+ssI117
+(dp201
+g73
+I-31
+ssI118
+(dp202
+g73
+I-41
+ssI119
+(dp203
+g98
+I-97
+ssI120
+(dp204
+g3
+I-95
+sg4
+I-95
+sg137
+I-95
+sg5
+I-95
+sg6
+I-95
+sg7
+I-95
+sg8
+I-95
+sg9
+I-95
+sg10
+I-95
+sg11
+I-95
+sg12
+I-95
+sg13
+I-95
+sg14
+I-95
+sg15
+I-95
+sg19
+I-95
+ssI121
+(dp205
+g90
+I-55
+ssI122
+(dp206
+g73
+I-35
+ssI123
+(dp207
+g73
+I-36
+ssI124
+(dp208
+g73
+I-45
+ssI125
+(dp209
+g73
+I-48
+ssI126
+(dp210
+g73
+I-42
+ssI127
+(dp211
+g73
+I-32
+ssI128
+(dp212
+g73
+I-29
+ssI129
+(dp213
+g73
+I-39
+ssI130
+(dp214
+g71
+I-98
+ssI131
+(dp215
+g36
+I-81
+sg164
+I-81
+sg165
+I-81
+ssI132
+(dp216
+g36
+I-91
+sg164
+I-91
+sg165
+I-91
+sg94
+I-91
+sg162
+I132
+ssI133
+(dp217
+g36
+I-90
+sg164
+I-90
+sg165
+I-90
+sg94
+I-90
+ssI134
+(dp218
+S'LAYERNAME'
+p219
+I149
+ssI135
+(dp220
+g165
+I152
+sg36
+I-88
+ssI136
+(dp221
+g36
+I-86
+sg165
+I-86
+ssI137
+(dp222
+g36
+I-85
+sg164
+I134
+sg165
+I-85
+ssI138
+(dp223
+g36
+I-83
+sg164
+I-83
+sg165
+I-83
+ssI139
+(dp224
+g17
+I-66
+sg21
+I-66
+sg22
+I-66
+ssI140
+(dp225
+g77
+I-93
+ssI141
+(dp226
+g56
+I-67
+sS'AFTER'
+p227
+I156
+sS'HOOKSEQUENCE'
+p228
+I159
+sS'BEFORE'
+p229
+I160
+ssI142
+(dp230
+g73
+I-25
+ssI143
+(dp231
+S'QUOTE'
+p232
+I161
+ssI144
+(dp233
+g232
+I-27
+sg182
+I144
+ssI145
+(dp234
+g71
+I66
+ssI146
+(dp235
+g192
+I-102
+ssI147
+(dp236
+S'ARGSTOP'
+p237
+I164
+ssI148
+(dp238
+g36
+I-92
+sg164
+I-92
+sg165
+I-92
+sg94
+I-92
+ssI149
+(dp239
+g36
+I-84
+sg165
+I-84
+ssI150
+(dp240
+g36
+I-79
+ssI151
+(dp241
+g36
+I-89
+ssI152
+(dp242
+S'VERSIONNAME'
+p243
+I165
+ssI153
+(dp244
+g165
+I152
+sg36
+I-88
+ssI154
+(dp245
+g56
+I-71
+sg227
+I156
+sg229
+I160
+ssI155
+(dp246
+g56
+I-69
+ssI156
+(dp247
+S'HOOK'
+p248
+I169
+ssI157
+(dp249
+g56
+I-74
+sg227
+I-74
+sg229
+I-74
+ssI158
+(dp250
+g56
+I-73
+sg227
+I-73
+sg229
+I-73
+ssI159
+(dp251
+g56
+I-68
+sg227
+I156
+sg229
+I160
+ssI160
+(dp252
+g248
+I169
+ssI161
+(dp253
+g73
+I-26
+ssI162
+(dp254
+g232
+I-28
+ssI163
+(dp255
+g3
+I-99
+sg4
+I-99
+sS'FUNCSTOP'
+p256
+I172
+sg5
+I-99
+sg6
+I-99
+sg7
+I-99
+sg8
+I-99
+sg9
+I-99
+sg10
+I-99
+sg11
+I-99
+sg12
+I-99
+sg13
+I-99
+sg14
+I-99
+sg15
+I-99
+sg19
+I-99
+ssI164
+(dp257
+g192
+I-101
+ssI165
+(dp258
+g36
+I-87
+ssI166
+(dp259
+g36
+I-80
+ssI167
+(dp260
+g56
+I-72
+ssI168
+(dp261
+g56
+I-75
+sg227
+I-75
+sg229
+I-75
+ssI169
+(dp262
+g248
+I169
+sg56
+I-77
+sg227
+I-77
+sg229
+I-77
+ssI170
+(dp263
+g56
+I-70
+ssI171
+(dp264
+g56
+I-76
+sg227
+I-76
+sg229
+I-76
+ssI172
+(dp265
+g3
+I-100
+sg4
+I-100
+sg5
+I-100
+sg6
+I-100
+sg7
+I-100
+sg8
+I-100
+sg9
+I-100
+sg10
+I-100
+sg11
+I-100
+sg12
+I-100
+sg13
+I-100
+sg14
+I-100
+sg15
+I-100
+sg19
+I-100
+ssI173
+(dp266
+g56
+I-78
+sg227
+I-78
+sg229
+I-78
+ss.(dp1
+I0
+(dp2
+S'varoverride'
+p3
+I17
+sS'addtask'
+p4
+I1
+sS'def_func'
+p5
+I2
+sS'func'
+p6
+I21
+sS'statement'
+p7
+I15
+sS'assignment'
+p8
+I19
+sS'require'
+p9
+I27
+sS'prefer'
+p10
+I5
+sS'varflag'
+p11
+I11
+sS'syntax'
+p12
+I6
+sS'export_variable'
+p13
+I12
+sS'addhook'
+p14
+I13
+sS'python_func'
+p15
+I32
+sS'inherit'
+p16
+I28
+sS'addtask_task'
+p17
+I3
+sS'variable'
+p18
+I22
+sS'fakeroot_func'
+p19
+I23
+sS'include'
+p20
+I16
+sS'python_func_start'
+p21
+I18
+ssI1
+(dp22
+sI2
+(dp23
+sI3
+(dp24
+S'addtask_after'
+p25
+I36
+sS'addtask_dependencies'
+p26
+I34
+sS'addtask_dependency'
+p27
+I35
+sS'addtask_before'
+p28
+I38
+ssI4
+(dp29
+sI5
+(dp30
+sI6
+(dp31
+sI7
+(dp32
+sI8
+(dp33
+sI9
+(dp34
+sI10
+(dp35
+sI11
+(dp36
+sI12
+(dp37
+sI13
+(dp38
+sI14
+(dp39
+sI15
+(dp40
+g3
+I17
+sg4
+I1
+sg5
+I2
+sg6
+I21
+sg7
+I15
+sg8
+I19
+sg9
+I27
+sg10
+I5
+sg11
+I11
+sS'syntax'
+p41
+I56
+sg13
+I12
+sg14
+I13
+sg15
+I32
+sg16
+I28
+sg17
+I3
+sg18
+I22
+sg19
+I23
+sg20
+I16
+sg21
+I18
+ssI16
+(dp42
+sI17
+(dp43
+sI18
+(dp44
+S'func_body'
+p45
+I65
+ssI19
+(dp46
+sI20
+(dp47
+S'inherit_classes'
+p48
+I69
+ssI21
+(dp49
+sI22
+(dp50
+sI23
+(dp51
+sI24
+(dp52
+sI25
+(dp53
+sI26
+(dp54
+sI27
+(dp55
+sI28
+(dp56
+sI29
+(dp57
+sI30
+(dp58
+S'packages'
+p59
+I89
+sS'recipe'
+p60
+I88
+ssI31
+(dp61
+S'func'
+p62
+I91
+ssI32
+(dp63
+sI33
+(dp64
+sI34
+(dp65
+sI35
+(dp66
+g25
+I36
+sS'addtask_dependencies'
+p67
+I93
+sg27
+I35
+sg28
+I38
+ssI36
+(dp68
+sI37
+(dp69
+S'tasks'
+p70
+I94
+ssI38
+(dp71
+sI39
+(dp72
+S'tasks'
+p73
+I96
+ssI40
+(dp74
+sI41
+(dp75
+sI42
+(dp76
+S'func_body'
+p77
+I97
+ssI43
+(dp78
+sI44
+(dp79
+sI45
+(dp80
+sI46
+(dp81
+S'empty_string'
+p82
+I100
+sS'quoted_string'
+p83
+I102
+sS'string'
+p84
+I103
+ssI47
+(dp85
+g82
+I100
+sg83
+I102
+sS'string'
+p86
+I104
+ssI48
+(dp87
+g82
+I100
+sg83
+I102
+sS'string'
+p88
+I105
+ssI49
+(dp89
+g82
+I100
+sg83
+I102
+sS'string'
+p90
+I106
+ssI50
+(dp91
+g82
+I100
+sg83
+I102
+sS'string'
+p92
+I107
+ssI51
+(dp93
+g82
+I100
+sg83
+I102
+sS'string'
+p94
+I108
+ssI52
+(dp95
+g82
+I100
+sg83
+I102
+sS'string'
+p96
+I109
+ssI53
+(dp97
+sI54
+(dp98
+sI55
+(dp99
+S'def_funcargs'
+p100
+I110
+ssI56
+(dp101
+sI57
+(dp102
+sI58
+(dp103
+g82
+I100
+sS'string'
+p104
+I112
+sg83
+I102
+ssI59
+(dp105
+g82
+I100
+sS'string'
+p106
+I113
+sg83
+I102
+ssI60
+(dp107
+g82
+I100
+sS'string'
+p108
+I114
+sg83
+I102
+ssI61
+(dp109
+g82
+I100
+sS'string'
+p110
+I115
+sg83
+I102
+ssI62
+(dp111
+g82
+I100
+sS'string'
+p112
+I116
+sg83
+I102
+ssI63
+(dp113
+g82
+I100
+sS'string'
+p114
+I117
+sg83
+I102
+ssI64
+(dp115
+g82
+I100
+sS'string'
+p116
+I118
+sg83
+I102
+ssI65
+(dp117
+sI66
+(dp118
+S'func_body'
+p119
+I120
+ssI67
+(dp120
+sI68
+(dp121
+S'inherit_classes'
+p122
+I121
+ssI69
+(dp123
+sI70
+(dp124
+sI71
+(dp125
+g82
+I100
+sS'string'
+p126
+I122
+sg83
+I102
+ssI72
+(dp127
+g82
+I100
+sS'string'
+p128
+I123
+sg83
+I102
+ssI73
+(dp129
+g82
+I100
+sS'string'
+p130
+I124
+sg83
+I102
+ssI74
+(dp131
+g82
+I100
+sS'string'
+p132
+I125
+sg83
+I102
+ssI75
+(dp133
+g82
+I100
+sS'string'
+p134
+I126
+sg83
+I102
+ssI76
+(dp135
+g82
+I100
+sS'string'
+p136
+I127
+sg83
+I102
+ssI77
+(dp137
+g82
+I100
+sS'string'
+p138
+I128
+sg83
+I102
+ssI78
+(dp139
+g82
+I100
+sS'string'
+p140
+I129
+sg83
+I102
+ssI79
+(dp141
+sI80
+(dp142
+sI81
+(dp143
+sI82
+(dp144
+sI83
+(dp145
+sI84
+(dp146
+sI85
+(dp147
+sI86
+(dp148
+sI87
+(dp149
+S'package'
+p150
+I133
+ssI88
+(dp151
+S'layer'
+p152
+I136
+sS'maybe_layer'
+p153
+I135
+ssI89
+(dp154
+S'recipe'
+p155
+I138
+sS'maybe_recipe'
+p156
+I137
+ssI90
+(dp157
+sI91
+(dp158
+sI92
+(dp159
+sI93
+(dp160
+sI94
+(dp161
+sI95
+(dp162
+S'tasks'
+p163
+I139
+ssI96
+(dp164
+sI97
+(dp165
+sI98
+(dp166
+sI99
+(dp167
+sI100
+(dp168
+sI101
+(dp169
+S'string_value'
+p170
+I143
+ssI102
+(dp171
+sI103
+(dp172
+sI104
+(dp173
+sI105
+(dp174
+sI106
+(dp175
+sI107
+(dp176
+sI108
+(dp177
+sI109
+(dp178
+sI110
+(dp179
+sI111
+(dp180
+sI112
+(dp181
+sI113
+(dp182
+sI114
+(dp183
+sI115
+(dp184
+sI116
+(dp185
+sI117
+(dp186
+sI118
+(dp187
+sI119
+(dp188
+sI120
+(dp189
+sI121
+(dp190
+sI122
+(dp191
+sI123
+(dp192
+sI124
+(dp193
+sI125
+(dp194
+sI126
+(dp195
+sI127
+(dp196
+sI128
+(dp197
+sI129
+(dp198
+sI130
+(dp199
+sI131
+(dp200
+sI132
+(dp201
+S'package'
+p202
+I148
+ssI133
+(dp203
+sI134
+(dp204
+sI135
+(dp205
+S'version'
+p206
+I151
+sS'maybe_version'
+p207
+I150
+ssI136
+(dp208
+sI137
+(dp209
+g152
+I136
+sS'maybe_layer'
+p210
+I153
+ssI138
+(dp211
+sI139
+(dp212
+sI140
+(dp213
+sI141
+(dp214
+S'addhook_dependencies'
+p215
+I155
+sS'addhook_before'
+p216
+I157
+sS'addhook_dependency'
+p217
+I154
+sS'addhook_after'
+p218
+I158
+ssI142
+(dp219
+sI143
+(dp220
+sI144
+(dp221
+S'string_value'
+p222
+I162
+ssI145
+(dp223
+S'func_body'
+p224
+I163
+ssI146
+(dp225
+sI147
+(dp226
+sI148
+(dp227
+sI149
+(dp228
+sI150
+(dp229
+sI151
+(dp230
+sI152
+(dp231
+sI153
+(dp232
+g206
+I151
+sS'maybe_version'
+p233
+I166
+ssI154
+(dp234
+S'addhook_dependencies'
+p235
+I167
+sg216
+I157
+sg217
+I154
+sg218
+I158
+ssI155
+(dp236
+sI156
+(dp237
+S'hooks'
+p238
+I168
+ssI157
+(dp239
+sI158
+(dp240
+sI159
+(dp241
+S'addhook_dependencies'
+p242
+I170
+sg216
+I157
+sg217
+I154
+sg218
+I158
+ssI160
+(dp243
+S'hooks'
+p244
+I171
+ssI161
+(dp245
+sI162
+(dp246
+sI163
+(dp247
+sI164
+(dp248
+sI165
+(dp249
+sI166
+(dp250
+sI167
+(dp251
+sI168
+(dp252
+sI169
+(dp253
+S'hooks'
+p254
+I173
+ssI170
+(dp255
+sI171
+(dp256
+sI172
+(dp257
+sI173
+(dp258
+s.(lp1
+(S"S' -> syntax"
+p2
+S"S'"
+p3
+I1
+NNNtp4
+a(S'syntax -> statement'
+p5
+S'syntax'
+p6
+I1
+S'p_syntax'
+p7
+S'oeparse.py'
+I129
+tp8
+a(S'syntax -> statement syntax'
+p9
+g6
+I2
+g7
+S'oeparse.py'
+I130
+tp10
+a(S'statement -> NEWLINE'
+p11
+S'statement'
+p12
+I1
+S'p_statement'
+p13
+S'oeparse.py'
+I134
+tp14
+a(S'statement -> assignment NEWLINE'
+p15
+g12
+I2
+g13
+S'oeparse.py'
+I135
+tp16
+a(S'statement -> export_variable NEWLINE'
+p17
+g12
+I2
+g13
+S'oeparse.py'
+I136
+tp18
+a(S'statement -> include NEWLINE'
+p19
+g12
+I2
+g13
+S'oeparse.py'
+I137
+tp20
+a(S'statement -> require NEWLINE'
+p21
+g12
+I2
+g13
+S'oeparse.py'
+I138
+tp22
+a(S'statement -> inherit NEWLINE'
+p23
+g12
+I2
+g13
+S'oeparse.py'
+I139
+tp24
+a(S'statement -> func NEWLINE'
+p25
+g12
+I2
+g13
+S'oeparse.py'
+I140
+tp26
+a(S'statement -> fakeroot_func NEWLINE'
+p27
+g12
+I2
+g13
+S'oeparse.py'
+I141
+tp28
+a(S'statement -> python_func NEWLINE'
+p29
+g12
+I2
+g13
+S'oeparse.py'
+I142
+tp30
+a(S'statement -> def_func'
+p31
+g12
+I1
+g13
+S'oeparse.py'
+I143
+tp32
+a(S'statement -> addtask NEWLINE'
+p33
+g12
+I2
+g13
+S'oeparse.py'
+I144
+tp34
+a(S'statement -> addhook NEWLINE'
+p35
+g12
+I2
+g13
+S'oeparse.py'
+I145
+tp36
+a(S'statement -> prefer NEWLINE'
+p37
+g12
+I2
+g13
+S'oeparse.py'
+I146
+tp38
+a(S'statement -> COMMENT'
+p39
+g12
+I1
+g13
+S'oeparse.py'
+I147
+tp40
+a(S'variable -> VARNAME'
+p41
+S'variable'
+p42
+I1
+S'p_variable'
+p43
+S'oeparse.py'
+I151
+tp44
+a(S'variable -> export_variable'
+p45
+g42
+I1
+g43
+S'oeparse.py'
+I152
+tp46
+a(S'export_variable -> EXPORT VARNAME'
+p47
+S'export_variable'
+p48
+I2
+S'p_export_variable'
+p49
+S'oeparse.py'
+I173
+tp50
+a(S'varflag -> VARNAME FLAG'
+p51
+S'varflag'
+p52
+I2
+S'p_flag'
+p53
+S'oeparse.py'
+I179
+tp54
+a(S'varoverride -> VARNAME OVERRIDE'
+p55
+S'varoverride'
+p56
+I2
+S'p_override'
+p57
+S'oeparse.py'
+I184
+tp58
+a(S'string -> empty_string'
+p59
+S'string'
+p60
+I1
+S'p_string'
+p61
+S'oeparse.py'
+I189
+tp62
+a(S'string -> quoted_string'
+p63
+g60
+I1
+g61
+S'oeparse.py'
+I190
+tp64
+a(S'string -> STRING'
+p65
+g60
+I1
+g61
+S'oeparse.py'
+I191
+tp66
+a(S'empty_string -> QUOTE QUOTE'
+p67
+S'empty_string'
+p68
+I2
+S'p_empty_string'
+p69
+S'oeparse.py'
+I196
+tp70
+a(S'quoted_string -> QUOTE string_value QUOTE'
+p71
+S'quoted_string'
+p72
+I3
+S'p_quoted_string'
+p73
+S'oeparse.py'
+I201
+tp74
+a(S'string_value -> STRING'
+p75
+S'string_value'
+p76
+I1
+S'p_string_value1'
+p77
+S'oeparse.py'
+I206
+tp78
+a(S'string_value -> STRING string_value'
+p79
+S'string_value'
+p80
+I2
+S'p_string_value2'
+p81
+S'oeparse.py'
+I211
+tp82
+a(S'assignment -> variable ASSIGN string'
+p83
+S'assignment'
+p84
+I3
+S'p_simple_var_assignment'
+p85
+S'oeparse.py'
+I216
+tp86
+a(S'assignment -> varflag ASSIGN string'
+p87
+S'assignment'
+p88
+I3
+S'p_simple_flag_assignment'
+p89
+S'oeparse.py'
+I221
+tp90
+a(S'assignment -> varoverride ASSIGN string'
+p91
+S'assignment'
+p92
+I3
+S'p_simple_override_assignment'
+p93
+S'oeparse.py'
+I226
+tp94
+a(S'assignment -> variable EXPASSIGN string'
+p95
+S'assignment'
+p96
+I3
+S'p_exp_var_assignment'
+p97
+S'oeparse.py'
+I231
+tp98
+a(S'assignment -> varflag EXPASSIGN string'
+p99
+S'assignment'
+p100
+I3
+S'p_exp_flag_assignment'
+p101
+S'oeparse.py'
+I236
+tp102
+a(S'assignment -> varoverride EXPASSIGN string'
+p103
+S'assignment'
+p104
+I3
+S'p_exp_override_assignment'
+p105
+S'oeparse.py'
+I241
+tp106
+a(S'assignment -> variable LAZYASSIGN string'
+p107
+S'assignment'
+p108
+I3
+S'p_defaultval_assignment'
+p109
+S'oeparse.py'
+I246
+tp110
+a(S'assignment -> variable WEAKASSIGN string'
+p111
+S'assignment'
+p112
+I3
+S'p_weak_var_assignment'
+p113
+S'oeparse.py'
+I251
+tp114
+a(S'assignment -> varflag WEAKASSIGN string'
+p115
+S'assignment'
+p116
+I3
+S'p_weak_flag_assignment'
+p117
+S'oeparse.py'
+I256
+tp118
+a(S'assignment -> varoverride WEAKASSIGN string'
+p119
+S'assignment'
+p120
+I3
+S'p_weak_override_assignment'
+p121
+S'oeparse.py'
+I261
+tp122
+a(S'assignment -> variable APPEND string'
+p123
+S'assignment'
+p124
+I3
+S'p_append_var_assignment'
+p125
+S'oeparse.py'
+I266
+tp126
+a(S'assignment -> varflag APPEND string'
+p127
+S'assignment'
+p128
+I3
+S'p_append_flag_assignment'
+p129
+S'oeparse.py'
+I271
+tp130
+a(S'assignment -> varoverride APPEND string'
+p131
+S'assignment'
+p132
+I3
+S'p_append_override_assignment'
+p133
+S'oeparse.py'
+I276
+tp134
+a(S'assignment -> variable PREPEND string'
+p135
+S'assignment'
+p136
+I3
+S'p_prepend_var_assignment'
+p137
+S'oeparse.py'
+I281
+tp138
+a(S'assignment -> varflag PREPEND string'
+p139
+S'assignment'
+p140
+I3
+S'p_prepend_flag_assignment'
+p141
+S'oeparse.py'
+I286
+tp142
+a(S'assignment -> varoverride PREPEND string'
+p143
+S'assignment'
+p144
+I3
+S'p_prepend_override_assignment'
+p145
+S'oeparse.py'
+I291
+tp146
+a(S'assignment -> variable PREDOT string'
+p147
+S'assignment'
+p148
+I3
+S'p_predot_var_assignment'
+p149
+S'oeparse.py'
+I296
+tp150
+a(S'assignment -> varflag PREDOT string'
+p151
+S'assignment'
+p152
+I3
+S'p_predot_flag_assignment'
+p153
+S'oeparse.py'
+I301
+tp154
+a(S'assignment -> varoverride PREDOT string'
+p155
+S'assignment'
+p156
+I3
+S'p_predot_override_assignment'
+p157
+S'oeparse.py'
+I306
+tp158
+a(S'assignment -> variable POSTDOT string'
+p159
+S'assignment'
+p160
+I3
+S'p_postdot_var_assignment'
+p161
+S'oeparse.py'
+I311
+tp162
+a(S'assignment -> varflag POSTDOT string'
+p163
+S'assignment'
+p164
+I3
+S'p_postdot_flag_assignment'
+p165
+S'oeparse.py'
+I316
+tp166
+a(S'assignment -> varoverride POSTDOT string'
+p167
+S'assignment'
+p168
+I3
+S'p_postdot_override_assignment'
+p169
+S'oeparse.py'
+I321
+tp170
+a(S'include -> INCLUDE INCLUDEFILE'
+p171
+S'include'
+p172
+I2
+S'p_include'
+p173
+S'oeparse.py'
+I326
+tp174
+a(S'require -> REQUIRE INCLUDEFILE'
+p175
+S'require'
+p176
+I2
+S'p_require'
+p177
+S'oeparse.py'
+I331
+tp178
+a(S'inherit -> INHERIT inherit_classes'
+p179
+S'inherit'
+p180
+I2
+S'p_inherit'
+p181
+S'oeparse.py'
+I336
+tp182
+a(S'inherit_classes -> INHERITCLASS'
+p183
+S'inherit_classes'
+p184
+I1
+S'p_inherit_classes'
+p185
+S'oeparse.py'
+I341
+tp186
+a(S'inherit_classes -> INHERITCLASS inherit_classes'
+p187
+S'inherit_classes'
+p188
+I2
+S'p_inherit_classes2'
+p189
+S'oeparse.py'
+I346
+tp190
+a(S'addtask -> addtask_task'
+p191
+S'addtask'
+p192
+I1
+S'p_addtask'
+p193
+S'oeparse.py'
+I351
+tp194
+a(S'addtask -> addtask_task addtask_dependencies'
+p195
+S'addtask'
+p196
+I2
+S'p_addtask_w_dependencies'
+p197
+S'oeparse.py'
+I357
+tp198
+a(S'addtask_task -> ADDTASK TASK'
+p199
+S'addtask_task'
+p200
+I2
+S'p_addtask_task'
+p201
+S'oeparse.py'
+I368
+tp202
+a(S'addtask_dependencies -> addtask_dependency'
+p203
+S'addtask_dependencies'
+p204
+I1
+S'p_addtask_dependencies1'
+p205
+S'oeparse.py'
+I373
+tp206
+a(S'addtask_dependencies -> addtask_dependency addtask_dependencies'
+p207
+S'addtask_dependencies'
+p208
+I2
+S'p_addtask_dependencies2'
+p209
+S'oeparse.py'
+I378
+tp210
+a(S'addtask_dependency -> addtask_after'
+p211
+S'addtask_dependency'
+p212
+I1
+S'p_addtask_dependency'
+p213
+S'oeparse.py'
+I383
+tp214
+a(S'addtask_dependency -> addtask_before'
+p215
+g212
+I1
+g213
+S'oeparse.py'
+I384
+tp216
+a(S'addtask_after -> AFTER tasks'
+p217
+S'addtask_after'
+p218
+I2
+S'p_addtask_after'
+p219
+S'oeparse.py'
+I389
+tp220
+a(S'addtask_before -> BEFORE tasks'
+p221
+S'addtask_before'
+p222
+I2
+S'p_addtask_before'
+p223
+S'oeparse.py'
+I394
+tp224
+a(S'tasks -> TASK'
+p225
+S'tasks'
+p226
+I1
+S'p_tasks'
+p227
+S'oeparse.py'
+I399
+tp228
+a(S'tasks -> TASK tasks'
+p229
+S'tasks'
+p230
+I2
+S'p_tasks2'
+p231
+S'oeparse.py'
+I404
+tp232
+a(S'addhook -> ADDHOOK HOOK TO HOOKNAME'
+p233
+S'addhook'
+p234
+I4
+S'p_addhook1'
+p235
+S'oeparse.py'
+I410
+tp236
+a(S'addhook -> ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCE'
+p237
+S'addhook'
+p238
+I5
+S'p_addhook2'
+p239
+S'oeparse.py'
+I415
+tp240
+a(S'addhook -> ADDHOOK HOOK TO HOOKNAME addhook_dependencies'
+p241
+S'addhook'
+p242
+I5
+S'p_addhook3'
+p243
+S'oeparse.py'
+I420
+tp244
+a(S'addhook -> ADDHOOK HOOK TO HOOKNAME HOOKSEQUENCE addhook_dependencies'
+p245
+S'addhook'
+p246
+I6
+S'p_addhook4'
+p247
+S'oeparse.py'
+I425
+tp248
+a(S'addhook_dependencies -> addhook_dependency'
+p249
+S'addhook_dependencies'
+p250
+I1
+S'p_addhook_dependencies1'
+p251
+S'oeparse.py'
+I430
+tp252
+a(S'addhook_dependencies -> addhook_dependency addhook_dependencies'
+p253
+S'addhook_dependencies'
+p254
+I2
+S'p_addhook_dependencies2'
+p255
+S'oeparse.py'
+I435
+tp256
+a(S'addhook_dependency -> addhook_after'
+p257
+S'addhook_dependency'
+p258
+I1
+S'p_addhook_dependency'
+p259
+S'oeparse.py'
+I440
+tp260
+a(S'addhook_dependency -> addhook_before'
+p261
+g258
+I1
+g259
+S'oeparse.py'
+I441
+tp262
+a(S'addhook_after -> AFTER hooks'
+p263
+S'addhook_after'
+p264
+I2
+S'p_addhook_after'
+p265
+S'oeparse.py'
+I446
+tp266
+a(S'addhook_before -> BEFORE hooks'
+p267
+S'addhook_before'
+p268
+I2
+S'p_addhook_before'
+p269
+S'oeparse.py'
+I451
+tp270
+a(S'hooks -> HOOK'
+p271
+S'hooks'
+p272
+I1
+S'p_hooks'
+p273
+S'oeparse.py'
+I456
+tp274
+a(S'hooks -> HOOK hooks'
+p275
+S'hooks'
+p276
+I2
+S'p_hooks2'
+p277
+S'oeparse.py'
+I461
+tp278
+a(S'prefer -> PREFER recipe maybe_layer maybe_version'
+p279
+S'prefer'
+p280
+I4
+S'p_prefer_recipe'
+p281
+S'oeparse.py'
+I467
+tp282
+a(S'prefer -> PREFER packages maybe_recipe maybe_layer maybe_version'
+p283
+S'prefer'
+p284
+I5
+S'p_prefer_package'
+p285
+S'oeparse.py'
+I472
+tp286
+a(S'recipe -> RECIPE RECIPENAME'
+p287
+S'recipe'
+p288
+I2
+S'p_recipe'
+p289
+S'oeparse.py'
+I477
+tp290
+a(S'maybe_recipe -> <empty>'
+p291
+S'maybe_recipe'
+p292
+I0
+S'p_maybe_recipe1'
+p293
+S'oeparse.py'
+I482
+tp294
+a(S'maybe_recipe -> recipe'
+p295
+S'maybe_recipe'
+p296
+I1
+S'p_maybe_recipe2'
+p297
+S'oeparse.py'
+I487
+tp298
+a(S'layer -> LAYER LAYERNAME'
+p299
+S'layer'
+p300
+I2
+S'p_layer'
+p301
+S'oeparse.py'
+I492
+tp302
+a(S'maybe_layer -> <empty>'
+p303
+S'maybe_layer'
+p304
+I0
+S'p_maybe_layer1'
+p305
+S'oeparse.py'
+I497
+tp306
+a(S'maybe_layer -> layer'
+p307
+S'maybe_layer'
+p308
+I1
+S'p_maybe_layer2'
+p309
+S'oeparse.py'
+I502
+tp310
+a(S'version -> VERSION VERSIONNAME'
+p311
+S'version'
+p312
+I2
+S'p_version'
+p313
+S'oeparse.py'
+I507
+tp314
+a(S'maybe_version -> <empty>'
+p315
+S'maybe_version'
+p316
+I0
+S'p_maybe_version1'
+p317
+S'oeparse.py'
+I512
+tp318
+a(S'maybe_version -> version'
+p319
+S'maybe_version'
+p320
+I1
+S'p_maybe_version2'
+p321
+S'oeparse.py'
+I517
+tp322
+a(S'packages -> PACKAGE package'
+p323
+S'packages'
+p324
+I2
+S'p_packages'
+p325
+S'oeparse.py'
+I522
+tp326
+a(S'package -> PACKAGENAME'
+p327
+S'package'
+p328
+I1
+S'p_package1'
+p329
+S'oeparse.py'
+I527
+tp330
+a(S'package -> PACKAGENAME package'
+p331
+S'package'
+p332
+I2
+S'p_packages2'
+p333
+S'oeparse.py'
+I532
+tp334
+a(S'func -> VARNAME FUNCSTART func_body FUNCSTOP'
+p335
+S'func'
+p336
+I4
+S'p_func'
+p337
+S'oeparse.py'
+I538
+tp338
+a(S'func_body -> FUNCLINE'
+p339
+S'func_body'
+p340
+I1
+S'p_func_body'
+p341
+S'oeparse.py'
+I544
+tp342
+a(S'func_body -> FUNCLINE func_body'
+p343
+S'func_body'
+p344
+I2
+S'p_func_body2'
+p345
+S'oeparse.py'
+I549
+tp346
+a(S'fakeroot_func -> FAKEROOT func'
+p347
+S'fakeroot_func'
+p348
+I2
+S'p_fakeroot_func'
+p349
+S'oeparse.py'
+I554
+tp350
+a(S'python_func -> python_func_start func_body FUNCSTOP'
+p351
+S'python_func'
+p352
+I3
+S'p_python_func'
+p353
+S'oeparse.py'
+I560
+tp354
+a(S'python_func_start -> PYTHON VARNAME FUNCSTART'
+p355
+S'python_func_start'
+p356
+I3
+S'p_python_func_start'
+p357
+S'oeparse.py'
+I567
+tp358
+a(S'def_func -> DEF VARNAME def_funcargs NEWLINE func_body'
+p359
+S'def_func'
+p360
+I5
+S'p_def_func'
+p361
+S'oeparse.py'
+I588
+tp362
+a(S'def_func -> DEF VARNAME def_funcargs NEWLINE func_body FUNCSTOP'
+p363
+g360
+I6
+g361
+S'oeparse.py'
+I589
+tp364
+a(S'def_funcargs -> ARGSTART STRING ARGSTOP'
+p365
+S'def_funcargs'
+p366
+I3
+S'p_def_args1'
+p367
+S'oeparse.py'
+I595
+tp368
+a(S'def_funcargs -> ARGSTART ARGSTOP'
+p369
+S'def_funcargs'
+p370
+I2
+S'p_def_args2'
+p371
+S'oeparse.py'
+I600
+tp372
+a.
\ No newline at end of file